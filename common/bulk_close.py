@@ -0,0 +1,100 @@
+# bulk_close.py
+
+import logging
+import time
+from mt5_gateway import gateway
+from order_executor import executor
+from order_templates import order_templates
+from trade_codes import DONE_CODES, classify_trade_return
+
+
+class CloseReport:
+    """Outcome of one close_all call."""
+
+    __slots__ = ("symbol", "requests", "results", "fills", "unconfirmed", "missing", "batches", "elapsed")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.requests = {}  # ticket -> close request last sent
+        self.results = {}  # ticket -> last order_send result, None when the terminal returned nothing
+        self.fills = []  # (request, result) per filled close, for PositionBook.apply_order_result
+        self.unconfirmed = []  # Tickets that went without a confirmed result but are no longer open
+        self.missing = []  # Requested tickets that were not open
+        self.batches = 0  # order_send batches sent
+        self.elapsed = 0.0  # Seconds from the first quote request until the last result came back
+
+    def closed(self):
+        """Tickets that were fully closed."""
+        return [ticket for ticket, result in self.results.items()
+                if ticket in self.unconfirmed or (result is not None and result.retcode in DONE_CODES)]
+
+    def failed(self):
+        """Tickets that are still open, or whose close got no answer."""
+        closed = set(self.closed())
+        return [ticket for ticket in self.results if ticket not in closed]
+
+
+async def close_all(symbol, tickets=None):
+    """
+    Close the open positions of a symbol in one gateway batch, all against the same quote.
+
+    Closes that come back requoted, partially filled or without an answer are sent again in a new
+    batch against a fresh quote, within the shared executor's latency budget. Every batch starts
+    from positions_get, so a close that went through unconfirmed is never sent twice.
+
+    Parameters:
+    - symbol (str): The symbol whose positions are closed.
+    - tickets (iterable): Only close these tickets; every open position of the symbol when None.
+
+    Returns:
+    - CloseReport: Per-ticket requests and results plus the total time taken to flatten.
+    """
+    started = time.perf_counter()
+    report = CloseReport(symbol)
+    templates = await order_templates.get(symbol)
+    if templates is None:
+        logging.error(f"Symbol {symbol} not found; nothing closed.")
+        return report
+
+    pending = None  # Tickets still to close; None until the first positions_get
+    while report.batches < executor.max_attempts:
+        # Positions and the quote they are closed against come back in one handoff
+        positions, tick = await gateway.call_many([
+            ("positions_get", (), {"symbol": symbol}),
+            ("symbol_info_tick", (symbol,), {}),
+        ])
+        if positions is None or tick is None:
+            logging.error(f"Failed to get positions or tick information for {symbol}: {await gateway.last_error()}")
+            break
+
+        if pending is None:
+            pending = {p.ticket for p in positions}
+            if tickets is not None:
+                wanted = set(tickets)
+                report.missing = sorted(wanted - pending)
+                pending &= wanted
+        else:
+            still_open = {p.ticket for p in positions}
+            report.unconfirmed.extend(sorted(pending - still_open))
+            pending &= still_open
+        positions = [p for p in positions if p.ticket in pending]
+        if not positions:
+            break
+
+        batch = [(position.ticket, templates.close_request(position, tick)) for position in positions]
+        results = await gateway.call_many([("order_send", (request,), {}) for _, request in batch])
+        report.batches += 1
+        pending = set()
+        for (ticket, request), result in zip(batch, results):
+            report.requests[ticket] = request
+            report.results[ticket] = result
+            outcome = classify_trade_return(result.retcode) if result is not None else "ambiguous"
+            if outcome in ("done", "partial"):
+                report.fills.append((request, result))
+            if outcome in ("partial", "retryable", "ambiguous"):
+                pending.add(ticket)
+        if not pending or time.perf_counter() - started >= executor.budget:
+            break
+
+    report.elapsed = time.perf_counter() - started
+    return report
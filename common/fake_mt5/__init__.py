@@ -0,0 +1,171 @@
+# fake_mt5
+# Drop-in stand-in for the MetaTrader5 package, for offline runs, profiling and load tests on Linux.
+#
+# Usage from an entry point, before anything imports MetaTrader5:
+#
+#     import fake_mt5
+#     fake_mt5.install_from_env()
+#
+# Environment variables read by install_from_env():
+# - FAKE_MT5_TICKS: CSV tick file (time_msc,symbol,bid,ask) to replay from its first tick; when unset,
+#   synthetic ticks around the current time are generated and replayed from now.
+# - FAKE_MT5_SYMBOLS: Comma separated symbols for the synthetic ticks (default EURUSD,GBPUSD,USDJPY).
+# - FAKE_MT5_LATENCY_MS: Latency added to every call, in milliseconds.
+# - FAKE_MT5_ORDER_LATENCY_MS: Latency added to order_send only, in milliseconds.
+# - FAKE_MT5_REJECT_RATE: Probability (0-1) that order_send answers with a requote.
+# - FAKE_MT5_SPEED: Replay speed relative to wall clock (default 1).
+
+import os
+import sys
+import time
+
+from .constants import *  # Constants are module attributes, as in MetaTrader5
+from .simulator import Simulator, load_tick_file, generate_ticks
+
+_simulator = None
+
+
+def configure(simulator):
+    """Makes simulator the one answering every API call."""
+    global _simulator
+    _simulator = simulator
+    return simulator
+
+
+def synthetic_ticks(names, days_back=3, days_ahead=1):
+    """Random-walk ticks for the given symbols, from days_back days ago until days_ahead days from now."""
+    start_msc = int(time.time() * 1000) - days_back * 86400 * 1000
+    return generate_ticks({name: (150.0, 0.001) if "JPY" in name else (1.1, 0.00001) for name in names},
+                          start_msc, (days_back + days_ahead) * 86400)
+
+
+def simulator():
+    """Returns the active simulator, creating a synthetic EURUSD/GBPUSD/USDJPY market if none is configured."""
+    if _simulator is None:
+        configure(Simulator(synthetic_ticks(["EURUSD", "GBPUSD", "USDJPY"]), start_msc=int(time.time() * 1000)))
+    return _simulator
+
+
+def install(sim=None):
+    """Registers this module as MetaTrader5, so `import MetaTrader5 as mt5` resolves to it."""
+    if sim is not None:
+        configure(sim)
+    sys.modules["MetaTrader5"] = sys.modules[__name__]
+    return simulator()
+
+
+def install_from_env():
+    """Builds a simulator from the FAKE_MT5_* environment variables and installs it, once per process."""
+    if sys.modules.get("MetaTrader5") is sys.modules[__name__]:
+        return simulator()
+    tick_file = os.environ.get("FAKE_MT5_TICKS")
+    if tick_file:
+        ticks = load_tick_file(tick_file)
+        start_msc = None  # Replay from the first recorded tick
+    else:
+        ticks = synthetic_ticks(os.environ.get("FAKE_MT5_SYMBOLS", "EURUSD,GBPUSD,USDJPY").split(","))
+        start_msc = int(time.time() * 1000)
+    order_latency = os.environ.get("FAKE_MT5_ORDER_LATENCY_MS")
+    sim = Simulator(
+        ticks,
+        latency=float(os.environ.get("FAKE_MT5_LATENCY_MS", "0")) / 1000,
+        call_latency={"order_send": float(order_latency) / 1000} if order_latency else None,
+        reject_rate=float(os.environ.get("FAKE_MT5_REJECT_RATE", "0")),
+        speed=float(os.environ.get("FAKE_MT5_SPEED", "1")),
+        start_msc=start_msc,
+    )
+    return install(sim)
+
+
+def _call(name, *args, **kwargs):
+    sim = simulator()
+    sim.delay(name)
+    return getattr(sim, name)(*args, **kwargs)
+
+
+def _log_in(sim, account):
+    if not sim.initialized:
+        sim.fail(RES_E_NO_IPC, "Terminal not initialized")
+        return False
+    sim.account_login = account
+    sim.logged_in = True
+    return True
+
+
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    sim = simulator()
+    sim.delay("initialize")
+    sim.initialized = True
+    sim.error = (RES_S_OK, "Success")
+    if login is not None:
+        return _log_in(sim, login)
+    return True
+
+
+def login(login, password=None, server=None, timeout=None):
+    sim = simulator()
+    sim.delay("login")
+    return _log_in(sim, login)
+
+
+def shutdown():
+    sim = simulator()
+    sim.initialized = False
+    sim.logged_in = False
+    return True
+
+
+def last_error():
+    return simulator().error
+
+
+def version():
+    return (500, 0, "fake_mt5")
+
+
+def terminal_info():
+    return _call("terminal_info")
+
+
+def account_info():
+    return _call("account_info")
+
+
+def symbol_select(symbol, enable=True):
+    return _call("symbol_select", symbol, enable)
+
+
+def symbol_info(symbol):
+    return _call("symbol_info", symbol)
+
+
+def symbol_info_tick(symbol):
+    return _call("symbol_info_tick", symbol)
+
+
+def copy_rates_from(symbol, timeframe, date_from, count):
+    return _call("copy_rates_from", symbol, timeframe, date_from, count)
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    return _call("copy_rates_range", symbol, timeframe, date_from, date_to)
+
+
+def copy_ticks_from(symbol, date_from, count, flags):
+    return _call("copy_ticks_from", symbol, date_from, count, flags)
+
+
+def copy_ticks_range(symbol, date_from, date_to, flags):
+    return _call("copy_ticks_range", symbol, date_from, date_to, flags)
+
+
+def positions_get(symbol=None, ticket=None, group=None):
+    return _call("positions_get", symbol=symbol, ticket=ticket, group=group)
+
+
+def order_send(request):
+    return _call("order_send", request)
+
+
+def order_calc_profit(action, symbol, volume, price_open, price_close):
+    return _call("order_calc_profit", action, symbol, volume, price_open, price_close)
@@ -0,0 +1,384 @@
+# simulator.py
+
+import csv
+import random
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from . import constants as c
+
+# Same layout as the arrays returned by MetaTrader5.copy_ticks_from
+TICK_DTYPE = np.dtype([
+    ("time", "i8"),
+    ("bid", "f8"),
+    ("ask", "f8"),
+    ("last", "f8"),
+    ("volume", "u8"),
+    ("time_msc", "i8"),
+    ("flags", "u4"),
+    ("volume_real", "f8"),
+])
+
+# Same layout as the arrays returned by MetaTrader5.copy_rates_from
+RATE_DTYPE = np.dtype([
+    ("time", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("tick_volume", "u8"),
+    ("spread", "i4"),
+    ("real_volume", "u8"),
+])
+
+
+def load_tick_file(path):
+    """
+    Reads a CSV tick file with the header time_msc,symbol,bid,ask.
+
+    Returns:
+    - dict: symbol name -> tick array (TICK_DTYPE) sorted by time_msc.
+    """
+    rows = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            rows.setdefault(row["symbol"], []).append((int(row["time_msc"]), float(row["bid"]), float(row["ask"])))
+
+    ticks = {}
+    for symbol, symbol_rows in rows.items():
+        symbol_rows.sort()
+        array = np.zeros(len(symbol_rows), dtype=TICK_DTYPE)
+        array["time_msc"] = [r[0] for r in symbol_rows]
+        array["bid"] = [r[1] for r in symbol_rows]
+        array["ask"] = [r[2] for r in symbol_rows]
+        array["time"] = array["time_msc"] // 1000
+        array["flags"] = c.TICK_FLAG_BID | c.TICK_FLAG_ASK
+        ticks[symbol] = array
+    return ticks
+
+
+def generate_ticks(symbols, start_msc, seconds, ticks_per_second=4, seed=0):
+    """
+    Builds a synthetic random-walk tick history, for runs without a recorded tick file.
+
+    Parameters:
+    - symbols (dict): symbol name -> (start bid, point).
+    - start_msc (int): Time of the first tick in milliseconds since the epoch.
+    - seconds (int): Length of the history.
+    - ticks_per_second (int): Average tick rate.
+    - seed (int): Random seed, so runs are reproducible.
+    """
+    rng = np.random.default_rng(seed)
+    count = seconds * ticks_per_second
+    ticks = {}
+    for symbol, (start_bid, point) in symbols.items():
+        array = np.zeros(count, dtype=TICK_DTYPE)
+        array["time_msc"] = start_msc + np.sort(rng.integers(0, seconds * 1000, count))
+        array["bid"] = np.round(start_bid + np.cumsum(rng.normal(0, 2 * point, count)), 6)
+        array["ask"] = array["bid"] + 10 * point
+        array["time"] = array["time_msc"] // 1000
+        array["flags"] = c.TICK_FLAG_BID | c.TICK_FLAG_ASK
+        ticks[symbol] = array
+    return ticks
+
+
+def default_symbol_spec(symbol):
+    """Plausible contract specification for a symbol name."""
+    if symbol.startswith(("BTC", "ETH")):
+        digits, contract_size = 2, 1.0
+    elif "JPY" in symbol:
+        digits, contract_size = 3, 100000.0
+    elif symbol.startswith("XAU"):
+        digits, contract_size = 2, 100.0
+    else:
+        digits, contract_size = 5, 100000.0
+    return {
+        "name": symbol,
+        "digits": digits,
+        "point": round(10 ** -digits, digits),
+        "trade_contract_size": contract_size,
+        "volume_min": 0.01,
+        "volume_max": 100.0,
+        "volume_step": 0.01,
+        "filling_mode": c.SYMBOL_FILLING_FOK | c.SYMBOL_FILLING_IOC,
+        "visible": False,
+    }
+
+
+class Simulator:
+    """Replays recorded ticks and fills market orders the way a MetaTrader 5 terminal would."""
+
+    def __init__(self, ticks, latency=0.0, call_latency=None, reject_rate=0.0, speed=1.0,
+                 start_msc=None, account_login=1, balance=10000.0, seed=0):
+        """
+        Initialize the simulator.
+
+        Parameters:
+        - ticks (dict): symbol name -> tick array, see load_tick_file / generate_ticks.
+        - latency (float): Seconds every API call sleeps before answering.
+        - call_latency (dict): Per-function latency overrides in seconds, e.g. {"order_send": 0.05}.
+        - reject_rate (float): Probability that order_send answers with a requote.
+        - speed (float): Replay speed relative to wall clock; None freezes the clock for manual advance().
+        - start_msc (int): Replay time at start-up; defaults to the first tick.
+        - account_login (int), balance (float): Account reported by account_info.
+        - seed (int): Seed for the reject decisions.
+        """
+        self.ticks = ticks
+        self.tick_times = {symbol: np.ascontiguousarray(array["time_msc"]) for symbol, array in ticks.items()}
+        self.latency = latency
+        self.call_latency = call_latency or {}
+        self.reject_rate = reject_rate
+        self.speed = speed
+        self.account_login = account_login
+        self.balance = balance
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.specs = {symbol: default_symbol_spec(symbol) for symbol in ticks}
+        self.positions = {}  # ticket -> position namespace
+        self.next_ticket = 1000
+        self.error = (c.RES_S_OK, "Success")
+        self.initialized = False
+        self.logged_in = False
+
+        if start_msc is None:
+            starts = [int(array["time_msc"][0]) for array in ticks.values() if len(array)]
+            start_msc = min(starts) if starts else int(time.time() * 1000)
+        self.start_msc = start_msc
+        self.clock_msc = self.start_msc
+        self.started_at = time.monotonic()
+
+    # -- clock ---------------------------------------------------------------
+
+    def now_msc(self):
+        """Current replay time in milliseconds since the epoch."""
+        if self.speed is None:
+            return self.clock_msc
+        return self.start_msc + int((time.monotonic() - self.started_at) * 1000 * self.speed)
+
+    def advance(self, time_msc):
+        """Moves a manually driven clock (speed=None) forward to time_msc."""
+        self.clock_msc = max(self.clock_msc, int(time_msc))
+
+    def delay(self, name):
+        latency = self.call_latency.get(name, self.latency)
+        if latency:
+            time.sleep(latency)
+
+    def fail(self, code, message):
+        self.error = (code, message)
+        return None
+
+    # -- market data ---------------------------------------------------------
+
+    def visible_ticks(self, symbol):
+        """Ticks of a symbol that have already happened at the current replay time."""
+        array = self.ticks.get(symbol)
+        if array is None:
+            return None
+        end = int(self.tick_times[symbol].searchsorted(self.now_msc(), side="right"))
+        return array[:end]
+
+    def last_tick(self, symbol):
+        past = self.visible_ticks(symbol)
+        if past is None or not len(past):
+            return None
+        return past[-1]
+
+    def symbol_info_tick(self, symbol):
+        tick = self.last_tick(symbol)
+        if tick is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"No ticks for {symbol}")
+        return SimpleNamespace(time=int(tick["time"]), bid=float(tick["bid"]), ask=float(tick["ask"]),
+                               last=0.0, volume=0, time_msc=int(tick["time_msc"]), flags=int(tick["flags"]),
+                               volume_real=0.0)
+
+    def symbol_info(self, symbol):
+        spec = self.specs.get(symbol)
+        if spec is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        tick = self.last_tick(symbol)
+        bid = float(tick["bid"]) if tick is not None else 0.0
+        ask = float(tick["ask"]) if tick is not None else 0.0
+        spread = int(round((ask - bid) / spec["point"])) if tick is not None else 0
+        return SimpleNamespace(bid=bid, ask=ask, spread=spread, **spec)
+
+    def symbol_select(self, symbol, enable=True):
+        spec = self.specs.get(symbol)
+        if spec is None:
+            self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+            return False
+        spec["visible"] = bool(enable)
+        return True
+
+    def copy_ticks_from(self, symbol, date_from, count, flags):
+        past = self.visible_ticks(symbol)
+        if past is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        times = self.tick_times[symbol][:len(past)]
+        start = int(times.searchsorted(to_msc(date_from), side="left"))
+        return past[start:start + count].copy()
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        past = self.visible_ticks(symbol)
+        if past is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        times = self.tick_times[symbol][:len(past)]
+        start = int(times.searchsorted(to_msc(date_from), side="left"))
+        end = int(times.searchsorted(to_msc(date_to), side="right"))
+        return past[start:end].copy()
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        """Bars built from bid ticks, the last one being the bar that contains date_from."""
+        seconds = c.TIMEFRAME_SECONDS.get(timeframe)
+        if seconds is None:
+            return self.fail(c.RES_E_INVALID_PARAMS, f"Unsupported timeframe {timeframe}")
+        end_time = (to_msc(date_from) // 1000 // seconds + 1) * seconds
+        span = count * seconds
+        while True:
+            rates = self.build_rates(symbol, seconds, end_time - span, end_time)
+            if rates is None or len(rates) >= count or span > end_time:
+                break
+            span *= 4  # Not enough bars in the window, e.g. over a weekend gap
+        return rates if rates is None else rates[-count:]
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        """Bars built from bid ticks whose open time lies between date_from and date_to."""
+        seconds = c.TIMEFRAME_SECONDS.get(timeframe)
+        if seconds is None:
+            return self.fail(c.RES_E_INVALID_PARAMS, f"Unsupported timeframe {timeframe}")
+        start_time = -(-to_msc(date_from) // 1000 // seconds) * seconds
+        end_time = (to_msc(date_to) // 1000 // seconds + 1) * seconds
+        return self.build_rates(symbol, seconds, start_time, end_time)
+
+    def build_rates(self, symbol, seconds, start_time, end_time):
+        """Aggregates the visible ticks in [start_time, end_time) into bars of the given length."""
+        past = self.visible_ticks(symbol)
+        if past is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        times = self.tick_times[symbol][:len(past)]
+        window = past[int(times.searchsorted(max(start_time, 0) * 1000, side="left")):
+                      int(times.searchsorted(end_time * 1000, side="left"))]
+        if not len(window):
+            return np.zeros(0, dtype=RATE_DTYPE)
+
+        bar_times = window["time"] // seconds * seconds
+        starts = np.flatnonzero(np.diff(bar_times, prepend=bar_times[0] - 1))
+        ends = np.append(starts[1:], len(window))
+        bids = window["bid"]
+        rates = np.zeros(len(starts), dtype=RATE_DTYPE)
+        rates["time"] = bar_times[starts]
+        rates["open"] = bids[starts]
+        rates["close"] = bids[ends - 1]
+        rates["high"] = np.maximum.reduceat(bids, starts)
+        rates["low"] = np.minimum.reduceat(bids, starts)
+        rates["tick_volume"] = ends - starts
+        return rates
+
+    # -- trading -------------------------------------------------------------
+
+    def positions_get(self, symbol=None, ticket=None, group=None):
+        with self.lock:
+            positions = list(self.positions.values())
+        if symbol is not None:
+            positions = [p for p in positions if p.symbol == symbol]
+        if ticket is not None:
+            positions = [p for p in positions if p.ticket == ticket]
+        return tuple(positions)
+
+    def order_calc_profit(self, action, symbol, volume, price_open, price_close):
+        spec = self.specs.get(symbol)
+        if spec is None:
+            return self.fail(c.RES_E_NOT_FOUND, f"Unknown symbol {symbol}")
+        direction = 1 if action == c.ORDER_TYPE_BUY else -1
+        profit = direction * (price_close - price_open) * spec["trade_contract_size"] * volume
+        if symbol.startswith("USD") and price_close:
+            profit /= price_close  # Quote currency is not the account currency
+        return round(profit, 2)
+
+    def order_send(self, request):
+        symbol = request.get("symbol")
+        spec = self.specs.get(symbol)
+        if spec is None:
+            return self.fail(c.RES_E_INVALID_PARAMS, f"Unknown symbol {symbol}")
+        tick = self.last_tick(symbol)
+        if tick is None:
+            return self.result(request, c.TRADE_RETCODE_PRICE_OFF)
+
+        order_type = request.get("type")
+        volume = request.get("volume", 0.0)
+        if order_type not in (c.ORDER_TYPE_BUY, c.ORDER_TYPE_SELL) or request.get("action") != c.TRADE_ACTION_DEAL:
+            return self.result(request, c.TRADE_RETCODE_INVALID, tick=tick)
+        steps = round(volume / spec["volume_step"], 6)
+        if volume < spec["volume_min"] or volume > spec["volume_max"] or steps != int(steps):
+            return self.result(request, c.TRADE_RETCODE_INVALID_VOLUME, tick=tick)
+        if self.reject_rate and self.random.random() < self.reject_rate:
+            return self.result(request, c.TRADE_RETCODE_REQUOTE, tick=tick)
+
+        fill_price = float(tick["ask"] if order_type == c.ORDER_TYPE_BUY else tick["bid"])
+        requested = request.get("price")
+        if requested and abs(fill_price - requested) > request.get("deviation", 0) * spec["point"] + 1e-12:
+            return self.result(request, c.TRADE_RETCODE_REQUOTE, tick=tick)
+
+        with self.lock:
+            ticket = self.next_ticket
+            self.next_ticket += 1
+            closing = request.get("position")
+            if closing is None:
+                self.positions[ticket] = SimpleNamespace(
+                    ticket=ticket, time=int(tick["time"]), time_msc=int(tick["time_msc"]), type=order_type,
+                    magic=request.get("magic", 0), identifier=ticket, volume=volume, price_open=fill_price,
+                    sl=request.get("sl", 0.0), tp=request.get("tp", 0.0), price_current=fill_price, swap=0.0,
+                    profit=0.0, symbol=symbol, comment=request.get("comment", ""))
+            else:
+                position = self.positions.get(closing)
+                if position is None:
+                    return self.result(request, c.TRADE_RETCODE_POSITION_CLOSED, tick=tick)
+                if order_type == position.type or volume > position.volume + 1e-9:
+                    return self.result(request, c.TRADE_RETCODE_INVALID_CLOSE_VOLUME, tick=tick)
+                self.balance += self.order_calc_profit(position.type, symbol, volume, position.price_open, fill_price)
+                position.volume = round(position.volume - volume, 8)
+                if position.volume <= 0:
+                    del self.positions[closing]
+        return self.result(request, c.TRADE_RETCODE_DONE, tick=tick, ticket=ticket, volume=volume, price=fill_price)
+
+    def result(self, request, retcode, tick=None, ticket=0, volume=0.0, price=0.0):
+        self.error = (c.RES_S_OK, "Success")
+        return SimpleNamespace(
+            retcode=retcode, deal=ticket, order=ticket, volume=volume, price=price,
+            bid=float(tick["bid"]) if tick is not None else 0.0,
+            ask=float(tick["ask"]) if tick is not None else 0.0,
+            comment=c.RETCODE_COMMENTS.get(retcode, ""), request_id=0, retcode_external=0,
+            request=SimpleNamespace(**request))
+
+    # -- account -------------------------------------------------------------
+
+    def account_info(self):
+        if not self.logged_in:
+            return self.fail(c.RES_E_AUTH_FAILED, "Not logged in")
+        with self.lock:
+            positions = list(self.positions.values())
+        floating = 0.0
+        for p in positions:
+            tick = self.last_tick(p.symbol)
+            if tick is not None:
+                close_price = float(tick["bid"] if p.type == c.ORDER_TYPE_BUY else tick["ask"])
+                floating += self.order_calc_profit(p.type, p.symbol, p.volume, p.price_open, close_price)
+        return SimpleNamespace(login=self.account_login, balance=round(self.balance, 2),
+                               equity=round(self.balance + floating, 2), profit=round(floating, 2),
+                               currency="USD", server="fake_mt5")
+
+    def terminal_info(self):
+        if not self.initialized:
+            return self.fail(c.RES_E_NO_IPC, "Terminal not initialized")
+        return SimpleNamespace(connected=True, trade_allowed=True, name="fake_mt5", build=0)
+
+
+def to_msc(value):
+    """Converts a datetime or seconds timestamp (as accepted by copy_ticks_*) to milliseconds."""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value) * 1000
@@ -0,0 +1,248 @@
+# job_scheduler.py
+
+import asyncio
+import heapq
+import logging
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import pytz
+
+# (name, lowest, highest) of the five cron fields; weekday 0 is Sunday, and 7 is accepted for it too
+FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+
+MAX_SLEEP = 60.0  # Longest single sleep, so a wall clock step (NTP, suspend) is noticed within a minute
+SEARCH_DAYS = 5 * 366  # Days searched for a next fire time before a spec is declared unsatisfiable
+
+
+def parse_field(text, name, lowest, highest):
+    """Values of one cron field: '*', 'a', 'a-b', any of them with '/step', and comma separated lists of those."""
+    values = set()
+    for part in text.split(","):
+        body, _, step = part.partition("/")
+        if body == "*":
+            first, last = lowest, highest
+        elif "-" in body:
+            first, last = (int(value) for value in body.split("-", 1))
+        else:
+            first = last = int(body)
+            if step:
+                last = highest  # 'a/step' runs from a to the end of the range
+        step = int(step) if step else 1
+        if not lowest <= first <= last <= highest or step < 1:
+            raise ValueError(f"Invalid cron {name} field: {text!r}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+class CronSpec:
+    """
+    A five field cron expression (minute hour day month weekday) evaluated in a timezone.
+
+    As in cron, when both day and weekday are restricted a date matches if either of them does.
+    """
+
+    __slots__ = ("expression", "timezone", "minutes", "hours", "days", "months", "weekdays",
+                 "any_day", "any_weekday")
+
+    def __init__(self, expression, timezone="Asia/Kolkata"):
+        """
+        Parse a cron expression.
+
+        Parameters:
+        - expression (str): Five fields, e.g. "0,30 9-23 * * *", or one of the @hourly/@daily/@weekly/... aliases.
+        - timezone (str): Timezone the fields are read in.
+        """
+        self.expression = expression
+        self.timezone = pytz.timezone(timezone)
+        fields = ALIASES.get(expression, expression).split()
+        if len(fields) != len(FIELDS):
+            raise ValueError(f"Cron expression needs {len(FIELDS)} fields: {expression!r}")
+        minutes, hours, days, months, weekdays = (
+            parse_field(text, *field) for text, field in zip(fields, FIELDS))
+        self.minutes = sorted(minutes)
+        self.hours = sorted(hours)
+        self.days = days
+        self.months = months
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_date(self, day):
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays  # datetime's Monday is 0, cron's Sunday is
+        if self.any_day or self.any_weekday:
+            return day_match and weekday_match
+        return day_match or weekday_match
+
+    def next_local(self, local):
+        """First naive local time at or after `local` (whole minutes) the spec matches, or None."""
+        day = local.date()
+        hour, minute = local.hour, local.minute
+        for _ in range(SEARCH_DAYS):
+            if self.matches_date(day):
+                for h in self.hours[bisect_left(self.hours, hour):]:
+                    index = bisect_left(self.minutes, minute if h == hour else 0)
+                    if index < len(self.minutes):
+                        return datetime(day.year, day.month, day.day, h, self.minutes[index])
+            day += timedelta(days=1)
+            hour = minute = 0
+        return None
+
+    def next_after(self, moment):
+        """
+        Next fire time strictly after a moment.
+
+        Parameters:
+        - moment (datetime): Timezone-aware datetime.
+
+        Returns:
+        - datetime: Timezone-aware fire time in the spec's timezone. Local times skipped by a DST change are
+          left out; of the two occurrences of a repeated local time, the first one fires.
+        """
+        local = moment.astimezone(self.timezone).replace(tzinfo=None, second=0, microsecond=0)
+        local += timedelta(minutes=1)
+        while True:
+            candidate = self.next_local(local)
+            if candidate is None:
+                raise ValueError(f"Cron expression never fires: {self.expression!r}")
+            try:
+                return self.timezone.localize(candidate, is_dst=None)
+            except pytz.NonExistentTimeError:
+                local = candidate + timedelta(minutes=1)
+            except pytz.AmbiguousTimeError:
+                return self.timezone.localize(candidate, is_dst=True)
+
+    def __repr__(self):
+        return f"CronSpec({self.expression!r}, {self.timezone.zone!r})"
+
+
+class Job:
+    """A coroutine function run on a CronSpec, with at most max_concurrency runs in flight."""
+
+    __slots__ = ("name", "spec", "func", "max_concurrency", "running", "runs", "skipped", "failures", "next_run")
+
+    def __init__(self, name, spec, func, max_concurrency=1):
+        self.name = name
+        self.spec = spec
+        self.func = func
+        self.max_concurrency = max_concurrency
+        self.running = 0  # Runs in flight
+        self.runs = 0  # Runs started
+        self.skipped = 0  # Fire times dropped because max_concurrency runs were still in flight
+        self.failures = 0  # Runs that raised
+        self.next_run = None  # Timezone-aware datetime of the next fire time
+
+    def stats(self):
+        return {
+            "cron": self.spec.expression,
+            "timezone": self.spec.timezone.zone,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "running": self.running,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+        }
+
+
+class JobScheduler:
+    """
+    Runs any number of cron jobs from one task: next fire times sit in a min-heap, and the scheduler
+    sleeps on the event loop's monotonic clock until the earliest one is due.
+    """
+
+    def __init__(self):
+        self.heap = []  # (fire timestamp, sequence, Job)
+        self.jobs = {}  # name -> Job
+        self.sequence = 0  # Tie-breaker keeping jobs due at the same time in registration order
+        self.tasks = set()  # Runs in flight
+        self.wakeup = asyncio.Event()  # Set when a job is added, so a sleeping run() looks at the heap again
+
+    def add(self, name, cron, func, timezone="Asia/Kolkata", max_concurrency=1):
+        """
+        Register a job.
+
+        Parameters:
+        - name (str): Unique job name, used in logs and stats.
+        - cron (str): Cron expression, see CronSpec.
+        - func (callable): Coroutine function called without arguments at every fire time.
+        - timezone (str): Timezone the cron expression is read in.
+        - max_concurrency (int): Runs allowed in flight at once; a fire time arriving at the limit is skipped.
+
+        Returns:
+        - Job: The registered job.
+        """
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already scheduled")
+        job = Job(name, CronSpec(cron, timezone), func, max_concurrency)
+        self.jobs[name] = job
+        self.push(job, datetime.now(pytz.utc))
+        self.wakeup.set()
+        return job
+
+    def push(self, job, after):
+        job.next_run = job.spec.next_after(after)
+        self.sequence += 1
+        heapq.heappush(self.heap, (job.next_run.timestamp(), self.sequence, job))
+
+    def start(self, job):
+        """Starts one run of a job unless it is at its concurrency limit."""
+        if job.running >= job.max_concurrency:
+            job.skipped += 1
+            logging.warning(f"Skipping job {job.name}: {job.running} run(s) still in flight")
+            return
+        job.running += 1
+        job.runs += 1
+        task = asyncio.get_running_loop().create_task(self.execute(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def execute(self, job):
+        try:
+            await job.func()
+        except Exception:
+            job.failures += 1
+            logging.exception(f"Job {job.name} failed")
+        finally:
+            job.running -= 1
+
+    async def run(self):
+        """Fires jobs as they come due until cancelled; runs still in flight are cancelled with it."""
+        try:
+            while True:
+                if not self.heap:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                fire_at, _, job = self.heap[0]
+                delay = fire_at - time.time()
+                if delay > 0:
+                    # Wall time only picks the next fire time; the wait itself runs on the monotonic loop clock
+                    self.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), min(delay, MAX_SLEEP))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                heapq.heappop(self.heap)
+                self.start(job)
+                # After a long stall the missed fire times collapse into this one run
+                self.push(job, max(job.next_run, datetime.now(pytz.utc)))
+        finally:
+            for task in list(self.tasks):
+                task.cancel()
+
+    def stats(self):
+        """Stats of every job by name."""
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -0,0 +1,86 @@
+# latency_histogram.py
+
+import json
+import os
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # Values below this many microseconds get one bucket each
+HALF_BUCKETS = SUB_BUCKETS // 2  # Buckets per power of two above that, i.e. about 3% relative precision
+
+
+def bucket_index(micros):
+    """HDR-style log-linear bucket of a latency in whole microseconds."""
+    if micros < SUB_BUCKETS:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (micros >> shift) - HALF_BUCKETS
+
+
+def bucket_upper_bound(index):
+    """Largest latency in microseconds that falls into a bucket."""
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    shift += 1
+    return ((offset + HALF_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-precision latency histogram; recording is a few integer operations and one list increment."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = []
+        self.count = 0
+        self.total = 0.0  # Seconds
+        self.max = 0.0  # Seconds
+
+    def record(self, seconds):
+        index = bucket_index(int(seconds * 1_000_000))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent):
+        """Latency in seconds below which percent of the recorded calls fall; never more than the max."""
+        if not self.count:
+            return 0.0
+        target = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucket_count in enumerate(list(self.counts)):
+            seen += bucket_count
+            if seen >= target:
+                return min(bucket_upper_bound(index) / 1_000_000, self.max)
+        return self.max
+
+    def summary(self):
+        """Count, mean, p50, p99 and max in milliseconds."""
+        if not self.count:
+            return {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+    def export(self):
+        """Summary plus the non-empty buckets as {upper bound in microseconds: count}, for merging elsewhere."""
+        data = self.summary()
+        data["buckets"] = {str(bucket_upper_bound(index)): bucket_count
+                           for index, bucket_count in enumerate(list(self.counts)) if bucket_count}
+        return data
+
+
+def write_json(path, data):
+    """Writes data as JSON through a temporary file, so readers never see a half-written dump."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
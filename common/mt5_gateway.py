@@ -0,0 +1,202 @@
+# mt5_gateway.py
+
+import MetaTrader5 as mt5
+import asyncio
+import queue
+import threading
+import time
+from latency_histogram import LatencyHistogram, write_json
+
+
+class Mt5Gateway:
+    """Runs every MetaTrader5 call on one dedicated worker thread."""
+
+    def __init__(self, broker=mt5, max_batch=64):
+        """
+        Initialize the gateway.
+
+        Parameters:
+        - broker (module): The MetaTrader5 module (or a compatible stand-in) to call.
+        - max_batch (int): Maximum number of queued requests drained per wake-up of the worker.
+        """
+        self.broker = broker
+        self.max_batch = max_batch
+        self.requests = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.handoffs = 0
+        self.latency = {}  # function name -> LatencyHistogram
+        self.symbol_latency = {}  # (function name, symbol) -> LatencyHistogram
+
+    def start(self):
+        """Start the worker thread if it is not already running."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="mt5-gateway", daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the worker thread after the already queued requests are served."""
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread is not None and thread.is_alive():
+            self.requests.put(None)
+            thread.join(timeout)
+
+    def _run(self):
+        """Worker loop: drain the queue and execute every pending request in order."""
+        running = True
+        while running:
+            job = self.requests.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.max_batch:
+                try:
+                    job = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+
+            self.handoffs += 1
+            for calls, future, loop in batch:
+                try:
+                    results = [self._execute(name, args, kwargs) for name, args, kwargs in calls]
+                except BaseException as e:
+                    loop.call_soon_threadsafe(_resolve, future, None, e)
+                else:
+                    loop.call_soon_threadsafe(_resolve, future, results, None)
+
+    def _execute(self, name, args, kwargs):
+        """Execute one broker function and record its latency, per function and per symbol."""
+        started = time.perf_counter()
+        try:
+            return getattr(self.broker, name)(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            histogram = self.latency.get(name)
+            if histogram is None:
+                histogram = self.latency[name] = LatencyHistogram()
+            histogram.record(elapsed)
+            symbol = _call_symbol(args, kwargs)
+            if symbol is not None:
+                key = (name, symbol)
+                histogram = self.symbol_latency.get(key)
+                if histogram is None:
+                    histogram = self.symbol_latency[key] = LatencyHistogram()
+                histogram.record(elapsed)
+
+    async def call_many(self, calls):
+        """
+        Run several broker calls in a single handoff to the worker thread.
+
+        Parameters:
+        - calls (list): A list of (function name, args tuple, kwargs dict) entries.
+
+        Returns:
+        - list: The results of the calls, in the same order.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests.put((calls, future, loop))
+        return await future
+
+    async def call(self, name, *args, **kwargs):
+        """Run a single broker function on the worker thread."""
+        results = await self.call_many([(name, args, kwargs)])
+        return results[0]
+
+    async def initialize(self, *args, **kwargs):
+        return await self.call("initialize", *args, **kwargs)
+
+    async def login(self, login, password, server):
+        return await self.call("login", login, password, server)
+
+    async def shutdown(self):
+        return await self.call("shutdown")
+
+    async def last_error(self):
+        return await self.call("last_error")
+
+    async def symbol_select(self, symbol, enable=True):
+        return await self.call("symbol_select", symbol, enable)
+
+    async def symbol_info(self, symbol):
+        return await self.call("symbol_info", symbol)
+
+    async def symbol_info_tick(self, symbol):
+        return await self.call("symbol_info_tick", symbol)
+
+    async def copy_rates_from(self, symbol, timeframe, date_from, count):
+        return await self.call("copy_rates_from", symbol, timeframe, date_from, count)
+
+    async def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        return await self.call("copy_rates_range", symbol, timeframe, date_from, date_to)
+
+    async def copy_ticks_from(self, symbol, date_from, count, flags):
+        return await self.call("copy_ticks_from", symbol, date_from, count, flags)
+
+    async def copy_ticks_range(self, symbol, date_from, date_to, flags):
+        return await self.call("copy_ticks_range", symbol, date_from, date_to, flags)
+
+    async def positions_get(self, **kwargs):
+        return await self.call("positions_get", **kwargs)
+
+    async def order_send(self, request):
+        return await self.call("order_send", request)
+
+    def queue_depth(self):
+        """Number of requests waiting for the worker thread."""
+        return self.requests.qsize()
+
+    def stats(self):
+        """Returns queue depth, handoff count and per-function latency in milliseconds."""
+        calls = {name: histogram.summary() for name, histogram in list(self.latency.items())}
+        return {"queue_depth": self.queue_depth(), "handoffs": self.handoffs, "calls": calls}
+
+    def latency_report(self):
+        """Exports the latency histograms of every function, overall and per symbol."""
+        calls = {name: {"all": histogram.export(), "symbols": {}} for name, histogram in list(self.latency.items())}
+        for (name, symbol), histogram in list(self.symbol_latency.items()):
+            calls[name]["symbols"][symbol] = histogram.export()
+        return {"time": time.time(), "queue_depth": self.queue_depth(), "handoffs": self.handoffs, "calls": calls}
+
+    def dump_latency(self, path):
+        """Writes latency_report() to a JSON file."""
+        write_json(path, self.latency_report())
+
+    async def dump_latency_forever(self, path, interval=60):
+        """Dumps the latency histograms to path every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            self.dump_latency(path)
+
+
+def _call_symbol(args, kwargs):
+    """Symbol a broker call is about, if any: the first string argument, symbol= or an order request's symbol."""
+    if args:
+        first = args[0]
+        if isinstance(first, str):
+            return first
+        if isinstance(first, dict):
+            return first.get("symbol")
+    return kwargs.get("symbol")
+
+
+def _resolve(future, results, error):
+    """Completes a gateway future on its event loop unless the caller gave up on it."""
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(results)
+
+
+# Shared gateway used by every module in this bot
+gateway = Mt5Gateway()
@@ -0,0 +1,157 @@
+# order_executor.py
+
+import MetaTrader5 as mt5
+import itertools
+import time
+from mt5_gateway import gateway
+from trade_codes import classify_trade_return
+
+COMMENT_LIMIT = 31  # Longer order comments are cut off by the trade server
+KEY_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+class Attempt:
+    """One order_send of an execution."""
+
+    __slots__ = ("number", "price", "retcode", "outcome", "elapsed_ms")
+
+    def __init__(self, number, price, retcode, outcome, elapsed_ms):
+        self.number = number
+        self.price = price
+        self.retcode = retcode
+        self.outcome = outcome
+        self.elapsed_ms = elapsed_ms
+
+
+class ExecutionReport:
+    """Outcome of OrderExecutor.execute: final result, every attempt and every (partial) fill."""
+
+    __slots__ = ("key", "request", "result", "status", "attempts", "fills", "unconfirmed", "elapsed")
+
+    def __init__(self, key, request):
+        self.key = key  # Idempotency key of the latest submission
+        self.request = request
+        self.result = None  # Result of the last attempt
+        self.status = None  # 'done', 'partial', 'fatal' or 'expired'
+        self.attempts = []
+        self.fills = []  # (request as sent, result) per filled attempt, for PositionBook.apply_order_result
+        self.unconfirmed = False  # An attempt went through without a result; only the terminal knows its fill
+        self.elapsed = 0.0  # Seconds over all attempts
+
+    def timings(self):
+        """Per-attempt retcode and latency, e.g. '#1 10004 12.3ms, #2 10009 8.1ms'."""
+        return ", ".join(f"#{a.number} {a.retcode} {a.elapsed_ms:.1f}ms" for a in self.attempts)
+
+
+def idempotency_key(counter):
+    """Eight base-36 characters from the clock in milliseconds and a per-process counter."""
+    value = (int(time.time() * 1000) * 100 + next(counter) % 100) % 36 ** 8
+    digits = []
+    for _ in range(8):
+        value, digit = divmod(value, 36)
+        digits.append(KEY_DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def tag_comment(comment, key):
+    """Appends #key to an order comment, shortening the comment so the key always fits."""
+    suffix = f"#{key}"
+    return comment[:COMMENT_LIMIT - len(suffix)] + suffix
+
+
+class OrderExecutor:
+    """Sends market orders, re-quoting and resubmitting retryable rejections within a latency budget."""
+
+    def __init__(self, budget=0.5, max_attempts=5):
+        """
+        Initialize the executor.
+
+        Parameters:
+        - budget (float): Seconds after the first attempt during which rejected orders are retried.
+        - max_attempts (int): Maximum number of order_send calls per execution.
+        """
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.counter = itertools.count()
+
+    async def execute(self, request):
+        """
+        Send a market order until it is filled, rejected for good, or the budget runs out.
+
+        The request is tagged with an idempotency key in its comment. When the terminal gives no answer,
+        or the server times out, the open positions are checked for that key before anything is resent.
+        The remaining volume of a partial fill is resubmitted under a new key, so the partially filled
+        position is never mistaken for the resubmission.
+
+        Returns:
+        - ExecutionReport: The final result, the status and the timing of every attempt.
+        """
+        comment = request.get("comment", "")
+        key = idempotency_key(self.counter)
+        request["comment"] = tag_comment(comment, key)
+        report = ExecutionReport(key, request)
+        started = time.perf_counter()
+
+        for number in range(1, self.max_attempts + 1):
+            sent = time.perf_counter()
+            result = await gateway.order_send(request)
+            retcode = result.retcode if result is not None else None
+            outcome = classify_trade_return(retcode) if result is not None else "ambiguous"
+            report.attempts.append(Attempt(number, request["price"], retcode, outcome,
+                                           (time.perf_counter() - sent) * 1000))
+            report.result = result
+
+            if outcome == "ambiguous":
+                if await self.already_executed(request):
+                    outcome = "done"
+                    report.unconfirmed = True
+                else:
+                    outcome = "retryable"
+            elif outcome == "done":
+                report.fills.append((dict(request), result))
+            elif outcome == "partial":
+                report.fills.append((dict(request), result))
+                remaining = round(request["volume"] - result.volume, 8)
+                if remaining <= 0:
+                    outcome = "done"
+                else:
+                    request["volume"] = remaining
+                    report.key = idempotency_key(self.counter)
+                    request["comment"] = tag_comment(comment, report.key)
+
+            if outcome in ("done", "fatal"):
+                report.status = outcome
+                break
+            if (number == self.max_attempts or time.perf_counter() - started >= self.budget
+                    or not await self.requote(request, result)):
+                break
+
+        if report.status is None:
+            report.status = "partial" if report.fills else "expired"
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    async def requote(self, request, result):
+        """Moves the request to the current price. Returns False if no price is available."""
+        buy = request["type"] == mt5.ORDER_TYPE_BUY
+        if result is not None and result.bid and result.ask:
+            # Requotes and price changes come back with the server's current prices
+            request["price"] = result.ask if buy else result.bid
+            return True
+        tick = await gateway.symbol_info_tick(request["symbol"])
+        if tick is None:
+            return False
+        request["price"] = tick.ask if buy else tick.bid
+        return True
+
+    async def already_executed(self, request):
+        """Whether an unconfirmed request went through: its position was closed, or one carries its key."""
+        if request.get("position") is not None:
+            positions = await gateway.positions_get(ticket=request["position"])
+            return positions is not None and len(positions) == 0
+        positions = await gateway.positions_get(symbol=request["symbol"])
+        return positions is not None and any(p.comment == request["comment"] for p in positions)
+
+
+# Shared executor used by every order path in this bot
+executor = OrderExecutor()
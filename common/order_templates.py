@@ -0,0 +1,126 @@
+# order_templates.py
+
+import MetaTrader5 as mt5
+import math
+from config import symbols_config
+from symbol_registry import registry
+
+OPEN_DEVIATION = 50
+OPEN_MAGIC = 234000
+CLOSE_DEVIATION = 20
+CLOSE_MAGIC = 123456
+
+ORDER_TYPES = {"buy": mt5.ORDER_TYPE_BUY, "sell": mt5.ORDER_TYPE_SELL}
+OPEN_QUOTE = {"buy": "ask", "sell": "bid"}  # Tick field a new order of each side fills at
+CLOSE_QUOTE = {mt5.ORDER_TYPE_BUY: "bid", mt5.ORDER_TYPE_SELL: "ask"}  # Tick field a position of each type closes at
+
+
+def normalize_volume(spec, volume):
+    """Rounds a volume down to the symbol's volume step and clamps it between its minimum and maximum."""
+    steps = math.floor(volume / spec.volume_step + 1e-9)
+    volume = round(steps * spec.volume_step, 8)
+    return min(max(volume, spec.volume_min), spec.volume_max)
+
+
+def _template(spec, order_type, deviation, magic, comment):
+    return {
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": spec.name,
+        "volume": spec.volume_min,
+        "type": order_type,
+        "price": 0.0,
+        "deviation": deviation,
+        "magic": magic,
+        "comment": comment,
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": spec.order_filling,
+    }
+
+
+class SymbolTemplates:
+    """Prebuilt order requests of one symbol; only price, volume and position change per order."""
+
+    __slots__ = ("spec", "volumes", "lot", "opens", "hedges", "closes")
+
+    def __init__(self, spec, lot_size=None):
+        self.spec = spec
+        self.volumes = {}  # requested volume -> volume normalised to the symbol's step
+        self.lot = self.volume(lot_size if lot_size is not None else 1.0)
+        self.opens = {side: _template(spec, order_type, OPEN_DEVIATION, OPEN_MAGIC, "python script open")
+                      for side, order_type in ORDER_TYPES.items()}
+        self.hedges = {side: _template(spec, order_type, OPEN_DEVIATION, OPEN_MAGIC, "hedge trade by script")
+                       for side, order_type in ORDER_TYPES.items()}
+        self.closes = {
+            mt5.ORDER_TYPE_BUY: _template(spec, mt5.ORDER_TYPE_SELL, CLOSE_DEVIATION, CLOSE_MAGIC, "Closing trade by script"),
+            mt5.ORDER_TYPE_SELL: _template(spec, mt5.ORDER_TYPE_BUY, CLOSE_DEVIATION, CLOSE_MAGIC, "Closing trade by script"),
+        }
+
+    def volume(self, volume):
+        """Returns a volume normalised to the symbol's step; each distinct volume is normalised only once."""
+        normalised = self.volumes.get(volume)
+        if normalised is None:
+            normalised = self.volumes[volume] = normalize_volume(self.spec, volume)
+        return normalised
+
+    def open_request(self, side, tick, volume=None, hedge=False):
+        """
+        Market request opening a position.
+
+        Parameters:
+        - side (str): 'buy' or 'sell'.
+        - tick: The quote to fill at; buys use the ask, sells the bid.
+        - volume (float): Lot size; the configured lot size of the symbol when None.
+        - hedge (bool): Use the hedge template instead of the regular open template.
+        """
+        request = (self.hedges if hedge else self.opens)[side].copy()
+        request["price"] = getattr(tick, OPEN_QUOTE[side])
+        request["volume"] = self.lot if volume is None else self.volume(volume)
+        return request
+
+    def close_request(self, position, tick):
+        """Market request closing an open position at the given quote."""
+        request = self.closes[position.type].copy()
+        request["price"] = getattr(tick, CLOSE_QUOTE[position.type])
+        request["volume"] = position.volume
+        request["position"] = position.ticket
+        return request
+
+
+class OrderTemplateCache:
+    """Per-symbol order templates, rebuilt whenever the registry reloads a symbol's spec."""
+
+    def __init__(self, symbols_config=()):
+        """
+        Initialize the cache.
+
+        Parameters:
+        - symbols_config (list): Symbol configurations; their lot_size becomes the default order volume.
+        """
+        self.lot_sizes = {config["symbol"]: config.get("lot_size") for config in symbols_config}
+        self.templates = {}  # symbol name -> SymbolTemplates
+
+    async def build(self, symbol_names=None):
+        """Builds the templates of the given symbols (all configured symbols by default) up front."""
+        if symbol_names is None:
+            symbol_names = list(self.lot_sizes)
+        failed = await registry.load(symbol_names)
+        for name in symbol_names:
+            spec = registry.get(name)
+            if spec is not None:
+                self.templates[name] = SymbolTemplates(spec, self.lot_sizes.get(name))
+        return failed
+
+    async def get(self, symbol_name):
+        """Returns the templates of a symbol, loading its spec on first use. None if the symbol is unavailable."""
+        templates = self.templates.get(symbol_name)
+        if templates is not None and templates.spec is registry.get(symbol_name):
+            return templates
+        spec = await registry.ensure(symbol_name)
+        if spec is None:
+            return None
+        templates = self.templates[symbol_name] = SymbolTemplates(spec, self.lot_sizes.get(symbol_name))
+        return templates
+
+
+# Shared template cache used by every order path in this bot
+order_templates = OrderTemplateCache(symbols_config)
@@ -0,0 +1,143 @@
+# position_book.py
+
+import MetaTrader5 as mt5
+import asyncio
+import logging
+import time
+from mt5_gateway import gateway
+from trade_codes import FILLED_CODES
+
+
+class BookPosition:
+    """One open position as tracked locally."""
+
+    __slots__ = ("ticket", "symbol", "type", "volume", "price_open", "magic")
+
+    def __init__(self, ticket, symbol, type, volume, price_open, magic=0):
+        self.ticket = ticket
+        self.symbol = symbol
+        self.type = type
+        self.volume = volume
+        self.price_open = price_open
+        self.magic = magic  # Magic number of the order that opened the position
+
+    def signed_volume(self):
+        return self.volume if self.type == mt5.ORDER_TYPE_BUY else -self.volume
+
+
+class PositionBook:
+    """In-memory view of open positions, updated from order_send results and reconciled periodically."""
+
+    def __init__(self, reconcile_interval=60):
+        """
+        Initialize the position book.
+
+        Parameters:
+        - reconcile_interval (float): Seconds between positions_get reconciliations.
+        """
+        self.reconcile_interval = reconcile_interval
+        self.positions = {}  # ticket -> BookPosition
+        self.by_symbol = {}  # symbol -> {ticket: BookPosition}
+        self.net_volume = {}  # symbol -> bought minus sold volume
+        self.seeded = False
+        self.last_reconcile = 0.0
+        self.drift_count = 0
+        self.reconciler = None
+        self.fill_callbacks = []  # Called with (request, result) for every order that was filled
+
+    def count(self, symbol):
+        """Number of open positions for a symbol."""
+        return len(self.by_symbol.get(symbol, ()))
+
+    def exposure(self, symbol):
+        """Net open volume for a symbol: positive when long, negative when short."""
+        return self.net_volume.get(symbol, 0.0)
+
+    def positions_for(self, symbol):
+        """Open positions of a symbol."""
+        return list(self.by_symbol.get(symbol, {}).values())
+
+    def add(self, position):
+        self.positions[position.ticket] = position
+        self.by_symbol.setdefault(position.symbol, {})[position.ticket] = position
+        self.net_volume[position.symbol] = self.net_volume.get(position.symbol, 0.0) + position.signed_volume()
+
+    def remove(self, ticket):
+        position = self.positions.pop(ticket, None)
+        if position is None:
+            return None
+        symbol_positions = self.by_symbol[position.symbol]
+        del symbol_positions[ticket]
+        if not symbol_positions:
+            del self.by_symbol[position.symbol]
+        self.net_volume[position.symbol] -= position.signed_volume()
+        return position
+
+    def apply_order_result(self, request, result):
+        """Updates the book from a market order request and the result order_send returned for it."""
+        if result is None or result.retcode not in FILLED_CODES:
+            return
+        for callback in self.fill_callbacks:
+            callback(request, result)
+        ticket = request.get("position")
+        if ticket is None:
+            self.add(BookPosition(result.order, request["symbol"], request["type"], result.volume, result.price,
+                                  request.get("magic", 0)))
+            return
+
+        position = self.remove(ticket)
+        if position is not None and result.volume < position.volume:
+            position.volume = round(position.volume - result.volume, 8)
+            self.add(position)
+
+    def load(self, positions):
+        """Replaces the book with the positions returned by positions_get."""
+        self.positions = {}
+        self.by_symbol = {}
+        self.net_volume = {}
+        for p in positions:
+            self.add(BookPosition(p.ticket, p.symbol, p.type, p.volume, p.price_open, p.magic))
+        self.seeded = True
+        self.last_reconcile = time.monotonic()
+
+    async def reconcile(self):
+        """
+        Rebuilds the book from positions_get and reports how far it had drifted.
+
+        Returns:
+        - int: Number of tickets that were missing from, or stale in, the local book; None on failure.
+        """
+        positions = await gateway.positions_get()
+        if positions is None:
+            self.last_reconcile = time.monotonic()
+            logging.error(f"positions_get failed during reconciliation: {await gateway.last_error()}")
+            return None
+        was_seeded = self.seeded
+        before = set(self.positions)
+        self.load(positions)
+        drift = len(before ^ set(self.positions)) if was_seeded else 0
+        if drift:
+            self.drift_count += drift
+            logging.warning(f"Position book drifted by {drift} ticket(s); reconciled with the terminal")
+        return drift
+
+    async def reconcile_forever(self):
+        """Reconciles the book every reconcile_interval seconds."""
+        while True:
+            await asyncio.sleep(max(0.0, self.last_reconcile + self.reconcile_interval - time.monotonic()))
+            await self.reconcile()
+
+    def invalidate(self):
+        """Forces a full reseed on next use, e.g. after a reconnect."""
+        self.seeded = False
+
+    async def ensure_current(self):
+        """Seeds the book on first use and keeps the reconciliation task running on this event loop."""
+        if not self.seeded:
+            await self.reconcile()
+        if self.reconciler is None or self.reconciler.done():
+            self.reconciler = asyncio.get_running_loop().create_task(self.reconcile_forever())
+
+
+# Shared position book used by every module in this bot
+book = PositionBook()
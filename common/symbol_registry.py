@@ -0,0 +1,101 @@
+# symbol_registry.py
+
+import MetaTrader5 as mt5
+import logging
+from mt5_gateway import gateway
+
+
+class SymbolSpec:
+    """Static trading specification of a symbol, read once from symbol_info."""
+
+    __slots__ = ("name", "point", "digits", "contract_size", "volume_min", "volume_max",
+                 "volume_step", "filling_mode", "order_filling")
+
+    def __init__(self, info):
+        self.name = info.name
+        self.point = info.point
+        self.digits = info.digits
+        self.contract_size = info.trade_contract_size
+        self.volume_min = info.volume_min
+        self.volume_max = info.volume_max
+        self.volume_step = info.volume_step
+        self.filling_mode = info.filling_mode
+        self.order_filling = preferred_order_filling(info.filling_mode)
+
+    def __repr__(self):
+        return (f"SymbolSpec({self.name}, point={self.point}, digits={self.digits}, "
+                f"contract_size={self.contract_size}, volume_step={self.volume_step})")
+
+
+def preferred_order_filling(filling_mode):
+    """Pick the order filling type allowed by a symbol's filling_mode flags, preferring FOK."""
+    if filling_mode & mt5.SYMBOL_FILLING_FOK:
+        return mt5.ORDER_FILLING_FOK
+    if filling_mode & mt5.SYMBOL_FILLING_IOC:
+        return mt5.ORDER_FILLING_IOC
+    return mt5.ORDER_FILLING_RETURN
+
+
+class SymbolRegistry:
+    """Selects symbols in Market Watch once and caches their static specifications."""
+
+    def __init__(self):
+        self.specs = {}  # symbol name -> SymbolSpec
+
+    async def load(self, symbol_names):
+        """
+        Selects and caches every symbol that is not loaded yet, in one gateway round trip.
+
+        Parameters:
+        - symbol_names (list): Symbol names to make available.
+
+        Returns:
+        - list: The names that could not be selected or described by the terminal.
+        """
+        missing = [name for name in symbol_names if name not in self.specs]
+        if not missing:
+            return []
+
+        calls = []
+        for name in missing:
+            calls.append(("symbol_select", (name, True), {}))
+            calls.append(("symbol_info", (name,), {}))
+        results = await gateway.call_many(calls)
+
+        failed = []
+        for index, name in enumerate(missing):
+            selected, info = results[2 * index], results[2 * index + 1]
+            if selected and info is not None:
+                self.specs[name] = SymbolSpec(info)
+            else:
+                logging.error(f"Failed to select symbol {name}")
+                failed.append(name)
+        return failed
+
+    async def ensure(self, symbol_name):
+        """Returns the cached spec for a symbol, loading it on first use. None if unavailable."""
+        spec = self.specs.get(symbol_name)
+        if spec is None:
+            await self.load([symbol_name])
+            spec = self.specs.get(symbol_name)
+        return spec
+
+    async def refresh(self, symbol_names=None):
+        """Reloads the given symbols (all cached symbols by default) from the terminal."""
+        if symbol_names is None:
+            symbol_names = list(self.specs)
+        for name in symbol_names:
+            self.specs.pop(name, None)
+        return await self.load(symbol_names)
+
+    def invalidate(self):
+        """Drops every cached spec, e.g. after a reconnect; symbols reload lazily on next use."""
+        self.specs.clear()
+
+    def get(self, symbol_name):
+        """Returns the cached spec for a symbol without touching the terminal."""
+        return self.specs.get(symbol_name)
+
+
+# Shared registry used by every module in this bot
+registry = SymbolRegistry()
@@ -0,0 +1,149 @@
+# test_job_scheduler.py
+
+import asyncio
+import heapq
+from datetime import datetime, timedelta
+import pytest
+import pytz
+from job_scheduler import CronSpec, JobScheduler, parse_field
+
+NEW_YORK = pytz.timezone("America/New_York")
+KOLKATA = pytz.timezone("Asia/Kolkata")
+
+
+def fire_times(spec, start, end):
+    """Every fire time of a spec after start and up to end."""
+    times = []
+    moment = spec.next_after(start)
+    while moment <= end:
+        times.append(moment)
+        moment = spec.next_after(moment)
+    return times
+
+
+def test_parse_field_forms():
+    assert parse_field("*", "hour", 0, 23) == set(range(24))
+    assert parse_field("*/15", "minute", 0, 59) == {0, 15, 30, 45}
+    assert parse_field("9-23", "hour", 0, 23) == set(range(9, 24))
+    assert parse_field("10-20/5", "minute", 0, 59) == {10, 15, 20}
+    assert parse_field("5/20", "minute", 0, 59) == {5, 25, 45}
+    assert parse_field("0,30", "minute", 0, 59) == {0, 30}
+
+
+@pytest.mark.parametrize("expression", ["60 * * * *", "* 24 * * *", "0 0 0 * *", "*/0 * * * *", "5-1 * * * *",
+                                        "0 0 * *", "x * * * *"])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError):
+        CronSpec(expression)
+
+
+def test_spec_that_never_fires_is_reported():
+    with pytest.raises(ValueError):
+        CronSpec("0 0 31 2 *").next_after(datetime.now(pytz.utc))
+
+
+def test_half_hourly_trading_day_schedule():
+    spec = CronSpec("0,30 9-23 * * *", "Asia/Kolkata")
+    start = KOLKATA.localize(datetime(2026, 6, 1, 0, 0))
+    times = fire_times(spec, start, start + timedelta(days=1))
+    assert len(times) == 30
+    assert times[0] == KOLKATA.localize(datetime(2026, 6, 1, 9, 0))
+    assert times[-1] == KOLKATA.localize(datetime(2026, 6, 1, 23, 30))
+
+
+def test_next_fire_time_is_strictly_after_the_moment():
+    spec = CronSpec("@hourly", "Asia/Kolkata")
+    moment = KOLKATA.localize(datetime(2026, 6, 1, 10, 0))
+    assert spec.next_after(moment) == KOLKATA.localize(datetime(2026, 6, 1, 11, 0))
+    assert spec.next_after(moment - timedelta(seconds=1)) == moment
+
+
+def test_day_and_weekday_match_either():
+    spec = CronSpec("0 0 13 * 5", "UTC")  # The 13th, or any Friday
+    start = pytz.utc.localize(datetime(2026, 2, 1))
+    days = [moment.day for moment in fire_times(spec, start, start + timedelta(days=28))]
+    assert days == [6, 13, 20, 27]  # Fridays in February 2026; the 13th is one of them
+    sunday = CronSpec("0 0 * * 7", "UTC").next_after(start)
+    assert sunday.weekday() == 6
+
+
+def test_time_skipped_by_spring_forward_does_not_fire():
+    spec = CronSpec("30 2 * * *", "America/New_York")
+    start = NEW_YORK.localize(datetime(2026, 3, 7, 3, 0))
+    assert spec.next_after(start) == NEW_YORK.localize(datetime(2026, 3, 9, 2, 30))
+
+
+def test_repeated_hour_fires_once_at_its_first_occurrence():
+    spec = CronSpec("30 1 * * *", "America/New_York")
+    first = spec.next_after(NEW_YORK.localize(datetime(2026, 10, 31, 12, 0)))
+    assert first == NEW_YORK.localize(datetime(2026, 11, 1, 1, 30), is_dst=True)
+    assert first.utcoffset() == timedelta(hours=-4)
+    assert spec.next_after(first) == NEW_YORK.localize(datetime(2026, 11, 2, 1, 30))
+
+
+def test_hourly_job_across_fall_back_fires_once_per_local_hour():
+    spec = CronSpec("0 * * * *", "America/New_York")
+    start = NEW_YORK.localize(datetime(2026, 10, 31, 23, 30))
+    end = NEW_YORK.localize(datetime(2026, 11, 1, 3, 0))
+    hours = [moment.hour for moment in fire_times(spec, start, end)]
+    assert hours == [0, 1, 2, 3]
+
+
+def test_duplicate_job_names_are_rejected():
+    async def main():
+        scheduler = JobScheduler()
+        scheduler.add("job", "* * * * *", asyncio.sleep)
+        with pytest.raises(ValueError):
+            scheduler.add("job", "* * * * *", asyncio.sleep)
+
+    asyncio.run(main())
+
+
+def test_due_job_runs_and_is_rescheduled():
+    async def main():
+        ran = asyncio.Event()
+
+        async def job():
+            ran.set()
+
+        scheduler = JobScheduler()
+        registered = scheduler.add("job", "@daily", job, timezone="UTC")
+        fire_at, sequence, _ = heapq.heappop(scheduler.heap)
+        # Pretend the previous fire time has just come due
+        registered.next_run = datetime.now(pytz.utc) - timedelta(seconds=1)
+        heapq.heappush(scheduler.heap, (registered.next_run.timestamp(), sequence, registered))
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.wait_for(ran.wait(), 5)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        assert registered.runs == 1
+        assert scheduler.heap[0][0] == fire_at
+        assert scheduler.stats()["job"]["failures"] == 0
+
+    asyncio.run(main())
+
+
+def test_runs_at_the_concurrency_limit_are_skipped():
+    async def main():
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        scheduler = JobScheduler()
+        slow_job = scheduler.add("slow", "* * * * *", slow)
+        failing_job = scheduler.add("failing", "* * * * *", failing)
+        scheduler.start(slow_job)
+        scheduler.start(slow_job)
+        scheduler.start(failing_job)
+        await asyncio.sleep(0)
+        assert (slow_job.running, slow_job.runs, slow_job.skipped) == (1, 1, 1)
+        release.set()
+        await asyncio.gather(*scheduler.tasks)
+        assert slow_job.running == 0
+        assert (failing_job.runs, failing_job.failures) == (1, 1)
+
+    asyncio.run(main())
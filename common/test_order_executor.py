@@ -0,0 +1,146 @@
+# test_order_executor.py
+
+import asyncio
+import itertools
+import time
+from types import SimpleNamespace
+import pytest
+import fake_mt5
+from fake_mt5.simulator import Simulator, generate_ticks
+
+fake_mt5.install()  # Before anything imports MetaTrader5
+
+import MetaTrader5 as mt5
+from order_executor import COMMENT_LIMIT, OrderExecutor, idempotency_key, tag_comment
+
+
+@pytest.fixture
+def sim():
+    now = int(time.time() * 1000)
+    ticks = generate_ticks({"EURUSD": (1.1, 0.00001)}, now - 60000, 120)
+    return fake_mt5.install(Simulator(ticks, start_msc=now))
+
+
+def script(sim, outcomes):
+    """
+    Makes order_send answer from a list of outcomes, one per call, and returns the requests it got.
+
+    'requote' rejects; 'lost' executes and returns None; 'placed' executes and returns 10008;
+    ('partial', volume) fills only volume with 10010; 'fatal' rejects with 10019; 'done' executes normally.
+    """
+    send = sim.order_send
+    sent = []
+
+    def order_send(request):
+        sent.append(dict(request))
+        outcome = outcomes.pop(0) if outcomes else "done"
+        if outcome == "requote":
+            return sim.result(request, mt5.TRADE_RETCODE_REQUOTE, tick=sim.last_tick(request["symbol"]))
+        if outcome == "fatal":
+            return sim.result(request, mt5.TRADE_RETCODE_NO_MONEY, tick=sim.last_tick(request["symbol"]))
+        if isinstance(outcome, tuple):
+            result = send(dict(request, volume=outcome[1]))
+            return SimpleNamespace(**dict(vars(result), retcode=mt5.TRADE_RETCODE_DONE_PARTIAL))
+        result = send(request)
+        if outcome == "lost":
+            return None
+        if outcome == "placed":
+            return SimpleNamespace(**dict(vars(result), retcode=mt5.TRADE_RETCODE_PLACED))
+        return result
+
+    sim.order_send = order_send
+    return sent
+
+
+def buy(volume=0.1):
+    tick = mt5.symbol_info_tick("EURUSD")
+    return {"action": mt5.TRADE_ACTION_DEAL, "symbol": "EURUSD", "volume": volume, "type": mt5.ORDER_TYPE_BUY,
+            "price": tick.ask, "deviation": 50, "magic": 234000, "comment": "python script open"}
+
+
+def execute(request, **kwargs):
+    return asyncio.run(OrderExecutor(**kwargs).execute(request))
+
+
+def test_requote_is_resent_at_the_quoted_price(sim):
+    sent = script(sim, ["requote", "done"])
+    report = execute(buy())
+    assert report.status == "done"
+    assert [a.retcode for a in report.attempts] == [mt5.TRADE_RETCODE_REQUOTE, mt5.TRADE_RETCODE_DONE]
+    assert sent[1]["price"] == mt5.symbol_info_tick("EURUSD").ask
+    assert sent[0]["comment"] == sent[1]["comment"] == tag_comment("python script open", report.key)
+    assert len(report.fills) == 1
+    assert len(mt5.positions_get()) == 1
+
+
+def test_lost_answer_is_not_resent_when_the_order_went_through(sim):
+    sent = script(sim, ["lost"])
+    report = execute(buy())
+    assert report.status == "done" and report.unconfirmed
+    assert len(sent) == 1
+    assert report.fills == []
+    assert [p.comment for p in mt5.positions_get()] == [sent[0]["comment"]]
+
+
+def test_lost_request_is_resent(sim):
+    send = sim.order_send
+    calls = []
+
+    def order_send(request):
+        calls.append(dict(request))
+        return None if len(calls) == 1 else send(request)  # The first request never reaches the server
+
+    sim.order_send = order_send
+    report = execute(buy())
+    assert report.status == "done" and not report.unconfirmed
+    assert len(calls) == 2
+    assert len(mt5.positions_get()) == 1
+
+
+def test_placed_is_confirmed_before_it_counts_as_filled(sim):
+    script(sim, ["placed"])
+    report = execute(buy())
+    assert report.status == "done" and report.unconfirmed
+    assert report.fills == []  # Nothing for the position book; the caller reconciles instead
+    assert len(mt5.positions_get()) == 1
+
+
+def test_partial_fill_remainder_goes_out_under_a_new_key(sim):
+    sent = script(sim, [("partial", 0.3), "done"])
+    report = execute(buy(1.0))
+    assert report.status == "done"
+    assert [round(result.volume, 8) for _, result in report.fills] == [0.3, 0.7]
+    assert sent[1]["volume"] == 0.7
+    assert sent[0]["comment"] != sent[1]["comment"]
+    assert sent[1]["comment"].endswith(report.key)
+    assert round(sum(p.volume for p in mt5.positions_get()), 8) == 1.0
+
+
+def test_fatal_rejection_is_not_retried(sim):
+    sent = script(sim, ["fatal", "done"])
+    report = execute(buy())
+    assert report.status == "fatal"
+    assert len(sent) == 1
+    assert mt5.positions_get() == ()
+
+
+def test_retries_stop_at_max_attempts(sim):
+    sent = script(sim, ["requote"] * 10)
+    report = execute(buy(), max_attempts=3)
+    assert report.status == "expired"
+    assert len(sent) == len(report.attempts) == 3
+    assert mt5.positions_get() == ()
+
+
+def test_comment_is_shortened_to_fit_the_key():
+    key = idempotency_key(itertools.count())
+    comment = tag_comment("x" * 40, key)
+    assert len(comment) == COMMENT_LIMIT
+    assert comment.endswith("#" + key)
+
+
+def test_keys_are_unique_within_a_process():
+    counter = itertools.count()
+    keys = [idempotency_key(counter) for _ in range(100)]
+    assert len(set(keys)) == len(keys)
+    assert all(len(key) == 8 for key in keys)
@@ -47,3 +47,26 @@ MT5_TRADE_RETURN_CODES = {
 
 def get_trade_return_description(code):
     return MT5_TRADE_RETURN_CODES.get(code, "Unknown trade return code")
+
+# How an order_send result should be handled, by return code
+DONE_CODES = {10009}
+PARTIAL_CODES = {10010}
+# Codes whose result carries a fill; the position book books exactly these
+FILLED_CODES = DONE_CODES | PARTIAL_CODES
+# Price moved or the server was briefly unavailable: re-quote and send again
+RETRYABLE_CODES = {10004, 10020, 10021, 10024, 10028, 10031}
+# The request may have been executed even though no confirmation came back; 10008 only says the order
+# was accepted, not that it was filled
+AMBIGUOUS_CODES = {10008, 10012}
+
+def classify_trade_return(code):
+    """Returns 'done', 'partial', 'retryable', 'ambiguous' or 'fatal' for a trade return code."""
+    if code in DONE_CODES:
+        return "done"
+    if code in PARTIAL_CODES:
+        return "partial"
+    if code in RETRYABLE_CODES:
+        return "retryable"
+    if code in AMBIGUOUS_CODES:
+        return "ambiguous"
+    return "fatal"
@@ -0,0 +1,260 @@
+# account_supervisor.py
+# Trades symbols_config on every account in accounts_config, one worker process per terminal.
+# The MetaTrader5 package talks to one terminal per process, so this process only reads prices
+# and fans them out; every worker logs into its own account and places its own orders.
+#
+#     python account_supervisor.py                    # live terminals
+#     MT5_BACKEND=fake python account_supervisor.py   # every process on its own fake_mt5 broker
+
+import os
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+
+# MT5_BACKEND=fake runs the supervisor against the fake_mt5 simulator instead of a live terminal
+if os.environ.get("MT5_BACKEND") == "fake":
+    import fake_mt5
+    fake_mt5.install_from_env()
+
+import asyncio
+import collections
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import numpy as np
+import account_worker
+from account_worker import SNAPSHOT_DTYPE
+from config import symbols_config, accounts_config
+from mt5_gateway import gateway
+from symbol_registry import registry
+from utils import session, connect_mt5
+
+FILL_HISTORY = 1000  # Latest fills kept per account; counts and volume cover all of them
+
+
+class PriceSender:
+    """
+    Writes snapshots to one worker's pipe from a thread of its own. Only the newest unsent snapshot is kept,
+    so a worker that stops reading fills at most its pipe and never blocks the supervisor's event loop.
+    """
+
+    __slots__ = ("connection", "condition", "pending", "closed", "dropped", "thread")
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.condition = threading.Condition()
+        self.pending = None  # Newest snapshot not yet written
+        self.closed = False
+        self.dropped = 0  # Snapshots replaced before the worker's pipe could take them
+        self.thread = threading.Thread(target=self.write_loop, name=name, daemon=True)
+        self.thread.start()
+
+    def send(self, data):
+        """Queues a snapshot without blocking, replacing one still waiting to be written."""
+        with self.condition:
+            if self.closed:
+                return
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = data
+            self.condition.notify()
+
+    def close(self):
+        """Stops the thread once the pending snapshot, if any, is written."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def write_loop(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    break
+                data, self.pending = self.pending, None
+            try:
+                self.connection.send_bytes(data)
+            except (BrokenPipeError, OSError) as e:
+                logging.error(f"Failed to send prices ({self.thread.name}): {e}")
+                break
+        self.connection.close()
+
+
+class WorkerHandle:
+    """One account's worker process and the pipe its snapshots go through."""
+
+    __slots__ = ("account", "process", "prices", "started", "last_seen", "restarts", "hangs")
+
+    def __init__(self, account):
+        self.account = account
+        self.process = None
+        self.prices = None  # PriceSender
+        self.started = 0.0
+        self.last_seen = 0.0  # time.monotonic() of the worker's latest event
+        self.restarts = 0
+        self.hangs = 0  # Restarts because the worker stopped reporting while alive
+
+
+class AccountSupervisor:
+    """Starts one worker per account, fans out price snapshots and aggregates fills and metrics."""
+
+    def __init__(self, accounts, symbols_config, interval=0.25, restart_delay=5, report_interval=60,
+                 hang_timeout=60):
+        """
+        Initialize the supervisor.
+
+        Parameters:
+        - accounts (list): Account dicts with login, password, server and an optional terminal path.
+        - symbols_config (list): Symbols traded on every account.
+        - interval (float): Seconds between price snapshots.
+        - restart_delay (float): Minimum seconds between restarts of a crashed worker.
+        - report_interval (float): Seconds between aggregated summaries in the log.
+        - hang_timeout (float): Seconds without a heartbeat after which a live worker is killed and restarted.
+        """
+        self.symbols_config = symbols_config
+        self.symbol_names = [symbol["symbol"] for symbol in symbols_config]
+        self.interval = interval
+        self.restart_delay = restart_delay
+        self.report_interval = report_interval
+        self.hang_timeout = hang_timeout
+        self.context = multiprocessing.get_context("spawn")  # Every worker needs a fresh MetaTrader5 module
+        self.events = self.context.Queue()
+        self.workers = {account["login"]: WorkerHandle(account) for account in accounts}
+        self.fills = {login: collections.deque(maxlen=FILL_HISTORY) for login in self.workers}  # login -> fill dicts
+        self.fill_counts = {login: 0 for login in self.workers}
+        self.fill_volume = {login: 0.0 for login in self.workers}
+        self.metrics = {login: {} for login in self.workers}  # login -> latest metrics report
+        self.snapshots = 0
+
+    def start_worker(self, handle):
+        receiver, sender = self.context.Pipe(duplex=False)
+        handle.process = self.context.Process(
+            target=account_worker.run,
+            args=(handle.account, self.symbols_config, receiver, self.events),
+            name=f"account-{handle.account['login']}",
+            daemon=True,
+        )
+        handle.process.start()
+        receiver.close()  # Only the worker reads
+        handle.prices = PriceSender(sender, f"prices-{handle.account['login']}")
+        handle.started = handle.last_seen = time.monotonic()
+
+    def check_workers(self):
+        """
+        Kills workers that are alive but sent no heartbeat for hang_timeout seconds, and restarts workers
+        that exited, at most once per restart_delay seconds each.
+        """
+        now = time.monotonic()
+        for login, handle in self.workers.items():
+            if handle.process.is_alive():
+                if now - handle.last_seen < self.hang_timeout:
+                    continue
+                logging.error(f"Worker for account {login} sent no heartbeat for {now - handle.last_seen:.0f} s; killing it")
+                handle.hangs += 1
+                handle.process.kill()
+                handle.process.join(1)
+            if now - handle.started < self.restart_delay:
+                continue
+            logging.error(f"Worker for account {login} exited with code {handle.process.exitcode}; restarting")
+            handle.prices.close()
+            handle.restarts += 1
+            self.start_worker(handle)
+
+    async def read_snapshot(self):
+        """Latest tick of every symbol in one gateway round trip, as a SNAPSHOT_DTYPE array."""
+        ticks = await gateway.call_many([("symbol_info_tick", (name,), {}) for name in self.symbol_names])
+        read_at = time.time()
+        snapshot = np.empty(len(ticks), dtype=SNAPSHOT_DTYPE)
+        for row, (name, tick) in enumerate(zip(self.symbol_names, ticks)):
+            if tick:
+                snapshot[row] = (name, tick.bid, tick.ask, tick.time_msc, read_at)
+            else:
+                snapshot[row] = (name, np.nan, np.nan, 0, read_at)
+        return snapshot
+
+    def broadcast(self, data):
+        """Hands a snapshot to every live worker's sender; never blocks, however far behind a worker is."""
+        for handle in self.workers.values():
+            if handle.process.is_alive():
+                handle.prices.send(data)
+
+    def collect_events(self):
+        """Folds every queued worker event into fills and metrics without blocking."""
+        while True:
+            try:
+                kind, login, payload = self.events.get_nowait()
+            except queue.Empty:
+                return
+            self.workers[login].last_seen = time.monotonic()
+            if kind == "fill":
+                self.fills[login].append(payload)
+                self.fill_counts[login] += 1
+                self.fill_volume[login] += payload["volume"]
+            elif kind == "metrics":
+                self.metrics[login] = payload
+            elif kind == "error":
+                logging.error(f"Account {login}: {payload}")
+
+    def summary(self):
+        """Fill counts, traded volume and the latest metrics per account."""
+        return {
+            login: {
+                "fills": self.fill_counts[login],
+                "volume": round(self.fill_volume[login], 2),
+                "restarts": handle.restarts,
+                "hangs": handle.hangs,
+                "dropped_snapshots": handle.prices.dropped if handle.prices is not None else 0,
+                "alive": handle.process is not None and handle.process.is_alive(),
+                "metrics": self.metrics[login],
+            }
+            for login, handle in self.workers.items()
+        }
+
+    async def run(self):
+        """Reads and fans out snapshots every interval seconds until cancelled."""
+        if not await connect_mt5():
+            return
+        for name in await registry.load(self.symbol_names):
+            logging.error(f"Failed to select symbol {name}")
+        for handle in self.workers.values():
+            self.start_worker(handle)
+
+        next_report = time.monotonic() + self.report_interval
+        try:
+            while True:
+                snapshot = await self.read_snapshot()
+                self.broadcast(snapshot.tobytes())
+                self.snapshots += 1
+                self.collect_events()
+                self.check_workers()
+                if time.monotonic() >= next_report:
+                    next_report = time.monotonic() + self.report_interval
+                    logging.info(f"Account summary: {self.summary()}")
+                await asyncio.sleep(self.interval)
+        finally:
+            self.stop()
+
+    def stop(self, timeout=10):
+        """Asks every worker to finish (an empty message) and waits for them."""
+        self.broadcast(b"")
+        for handle in self.workers.values():
+            if handle.prices is not None:
+                handle.prices.close()
+            if handle.process is not None:
+                handle.process.join(timeout)
+                if handle.process.is_alive():
+                    handle.process.terminate()
+        self.collect_events()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    # This process only reads prices, from the first account's terminal
+    market_account = accounts_config[0]
+    session.use_account(market_account["login"], market_account["password"],
+                        market_account["server"], market_account.get("path"))
+    try:
+        asyncio.run(AccountSupervisor(accounts_config, symbols_config).run())
+    except KeyboardInterrupt:
+        print("Account supervisor stopped manually.")
@@ -0,0 +1,109 @@
+# account_worker.py
+# Runs the threshold strategy for one account in its own process; started by account_supervisor.py.
+
+import os
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+
+# MT5_BACKEND=fake gives every worker its own fake_mt5 broker instead of a live terminal
+if os.environ.get("MT5_BACKEND") == "fake":
+    import fake_mt5
+    fake_mt5.install_from_env()
+
+import asyncio
+import logging
+import time
+import numpy as np
+from mt5_gateway import gateway
+from position_book import book
+from start_price_store import StartPriceStore
+from utils import session, connect_mt5, check_thresholds_and_place_trades
+
+# Layout of the price snapshots the supervisor sends to every worker
+SNAPSHOT_DTYPE = np.dtype([
+    ("symbol", "U16"),
+    ("bid", "f8"),
+    ("ask", "f8"),
+    ("time_msc", "i8"),  # Trade server time, in the broker's time zone rather than UTC
+    ("read_at", "f8"),  # Supervisor's time.time() when the snapshot was read
+])
+
+METRICS_INTERVAL = 10  # Seconds between metrics reports to the supervisor
+HEARTBEAT_INTERVAL = 1  # Seconds between heartbeats; the supervisor restarts a worker whose heartbeats stop
+
+
+def receive_latest(prices):
+    """Blocks for the next snapshot and skips any older ones still queued, so a slow worker never trades stale prices."""
+    data = prices.recv_bytes()
+    while data and prices.poll():
+        data = prices.recv_bytes()
+    return data
+
+
+def fill_event(login, request, result):
+    return ("fill", login, {
+        "symbol": request["symbol"],
+        "type": request["type"],
+        "position": request.get("position"),
+        "order": result.order,
+        "volume": result.volume,
+        "price": result.price,
+        "time": time.time(),
+    })
+
+
+async def serve(account, symbols_config, prices, events):
+    login = account["login"]
+    session.use_account(login, account["password"], account["server"], account.get("path"))
+    book.fill_callbacks.append(lambda request, result: events.put(fill_event(login, request, result)))
+    if not await connect_mt5():
+        events.put(("error", login, "Failed to connect to MetaTrader5"))
+        return
+
+    # Each worker keeps its own start price file, so workers never write the same file
+    start_prices = StartPriceStore(path=f"start_prices_{login}.json")
+    configs = {symbol["symbol"]: symbol for symbol in symbols_config}
+    loop = asyncio.get_running_loop()
+    snapshots = 0
+    age_ms = 0.0
+    next_report = time.monotonic() + METRICS_INTERVAL
+    next_heartbeat = 0.0
+
+    while True:
+        data = await loop.run_in_executor(None, receive_latest, prices)
+        if not data:
+            break  # Supervisor is shutting down
+        snapshot = np.frombuffer(data, dtype=SNAPSHOT_DTYPE)
+        snapshots += 1
+        known = await start_prices.ensure(list(configs))
+        for row in snapshot:
+            name = str(row["symbol"])
+            if np.isnan(row["bid"]) or name not in known:
+                continue
+            await check_thresholds_and_place_trades(configs[name], known[name], float(row["bid"]))
+        if len(snapshot):
+            # Both clocks are this machine's, unlike time_msc, so the difference is the real fan-out delay
+            age_ms = (time.time() - float(snapshot["read_at"][0])) * 1000
+
+        # Sent from the trading loop itself, so a worker stuck anywhere in it stops beating
+        if time.monotonic() >= next_heartbeat:
+            next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+            events.put(("heartbeat", login, snapshots))
+
+        if time.monotonic() >= next_report:
+            next_report = time.monotonic() + METRICS_INTERVAL
+            events.put(("metrics", login, {
+                "snapshots": snapshots,
+                "snapshot_age_ms": round(age_ms, 1),
+                "exposure": dict(book.net_volume),
+                "gateway": gateway.stats(),
+            }))
+
+
+def run(account, symbols_config, prices, events):
+    """Process entry point: trade one account from the snapshots received on prices, report on events."""
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [{account['login']}] %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(account, symbols_config, prices, events))
+    except KeyboardInterrupt:
+        pass
+    events.put(("exit", account["login"], None))
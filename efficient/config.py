@@ -67,3 +67,14 @@ symbols_config = [
     #     "lot_size": 1.0
     # }
 ]
+
+# Accounts traded by account_supervisor.py, one terminal process each.
+# "path" is the terminal64.exe of that account's terminal; None uses the default terminal.
+accounts_config = [
+    {
+        "login": 213171528,
+        "password": "AHe@Yps3",
+        "server": "OctaFX-Demo",
+        "path": None
+    },
+]
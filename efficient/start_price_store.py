@@ -0,0 +1,164 @@
+# start_price_store.py
+
+import MetaTrader5 as mt5
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from time import monotonic
+import pytz
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from bar_store import bar_store
+
+CALENDAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "trading_calendar.json")
+
+RETRY_DELAY = 5.0  # Seconds before a symbol whose start price could not be fetched is tried again
+MAX_RETRY_DELAY = 300.0  # The retry delay doubles after every further failure, up to this
+
+
+class TradingCalendar:
+    """Weekends plus the market holidays listed in trading_calendar.json."""
+
+    def __init__(self, path=CALENDAR_FILE):
+        self.holidays = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.holidays = {date.fromisoformat(day) for day in json.load(f).get("holidays", [])}
+        self.previous = {}  # day -> last trading day before it
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def previous_trading_day(self, day):
+        """The last trading day strictly before day."""
+        previous = self.previous.get(day)
+        if previous is None:
+            previous = day - timedelta(days=1)
+            while not self.is_trading_day(previous):
+                previous -= timedelta(days=1)
+            self.previous[day] = previous
+        return previous
+
+    def anchor(self, day, timezone):
+        """
+        Time whose M5 close is the start price of day.
+
+        Midnight of day, unless the market was closed the day before (Monday, or after a holiday):
+        then the close of the last trading day, as the Friday closing price used to be on Mondays.
+        """
+        previous = self.previous_trading_day(day)
+        if previous == day - timedelta(days=1):
+            return timezone.localize(datetime.combine(day, time(0, 0)))
+        return timezone.localize(datetime.combine(previous, time(23, 59, 59)))
+
+
+class StartPriceStore:
+    """Start prices keyed by (symbol, trading date), kept in memory and in a small JSON file across restarts."""
+
+    def __init__(self, path="start_prices.json", calendar=None, timezone="Asia/Kolkata", keep_days=10, bars=bar_store):
+        """
+        Initialize the store.
+
+        Parameters:
+        - path (str): JSON file holding the known start prices.
+        - calendar (TradingCalendar): Trading calendar; weekends plus trading_calendar.json by default.
+        - timezone (str): Timezone whose midnight starts a trading date.
+        - keep_days (int): Number of most recent dates kept per symbol.
+        - bars (BarStore): Local M5 history consulted before the terminal; None to always ask the terminal.
+        """
+        self.bars = bars
+        self.path = path
+        self.calendar = calendar if calendar is not None else TradingCalendar()
+        self.timezone = pytz.timezone(timezone)
+        self.keep_days = keep_days
+        self.prices = {}  # symbol name -> {ISO date: start price}
+        self.failures = {}  # symbol name -> (ISO date, monotonic time of the next attempt, retry delay)
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.prices = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.error(f"Ignoring unreadable start price file {path}: {e}")
+
+    def today(self):
+        """Current trading date in the store's timezone."""
+        return datetime.now(self.timezone).date()
+
+    def get(self, symbol_name, day=None):
+        """Known start price of a symbol for a date (today by default), without touching the terminal."""
+        day = day if day is not None else self.today()
+        return self.prices.get(symbol_name, {}).get(day.isoformat())
+
+    async def ensure(self, symbol_names, day=None):
+        """
+        Returns the start prices of the given symbols. Missing ones are read from the local bar store when it
+        covers the day, and otherwise fetched in one gateway round trip. A symbol whose fetch failed is not
+        tried again for that day until its retry delay has passed.
+
+        Returns:
+        - dict: symbol name -> start price; symbols whose price could not be fetched are left out.
+        """
+        day = day if day is not None else self.today()
+        key = day.isoformat()
+        now = monotonic()
+        missing = [name for name in symbol_names
+                   if key not in self.prices.get(name, {}) and not self.backing_off(name, key, now)]
+        if missing:
+            stored = len(missing)
+            anchor = self.calendar.anchor(day, self.timezone).astimezone(pytz.utc)
+            if self.bars is not None:
+                for name in list(missing):
+                    price = self.bars.series(name, mt5.TIMEFRAME_M5).close_at(anchor)
+                    if price is not None:
+                        self.store(name, key, price)
+                        missing.remove(name)
+            if missing:
+                results = await gateway.call_many(
+                    [("copy_rates_from", (name, mt5.TIMEFRAME_M5, anchor, 1), {}) for name in missing])
+                for name, rates in zip(missing, results):
+                    if rates is not None and len(rates) > 0:
+                        self.store(name, key, float(rates[0]["close"]))
+                    else:
+                        self.failed(name, key, now)
+                        stored -= 1
+            if stored:
+                self.save()
+        return {name: self.prices[name][key] for name in symbol_names if key in self.prices.get(name, {})}
+
+    async def start_price(self, symbol_name, day=None):
+        """Start price of one symbol, or None if it could not be fetched."""
+        return (await self.ensure([symbol_name], day)).get(symbol_name)
+
+    def backing_off(self, symbol_name, key, now):
+        """True while a symbol's failed fetch for a date waits out its retry delay."""
+        failure = self.failures.get(symbol_name)
+        return failure is not None and failure[0] == key and now < failure[1]
+
+    def failed(self, symbol_name, key, now):
+        """Records a failed fetch and schedules the next attempt, backing off further on every failure."""
+        failure = self.failures.get(symbol_name)
+        delay = min(failure[2] * 2, MAX_RETRY_DELAY) if failure is not None and failure[0] == key else RETRY_DELAY
+        self.failures[symbol_name] = (key, now + delay, delay)
+        logging.error(f"Failed to get start price for {symbol_name} on {key}; retrying in {delay:.0f} s")
+
+    def store(self, symbol_name, key, price):
+        self.failures.pop(symbol_name, None)
+        days = self.prices.setdefault(symbol_name, {})
+        days[key] = price
+        for old in sorted(days)[:-self.keep_days]:
+            del days[old]
+
+    def save(self):
+        """Writes the store through a temporary file, so a crash never leaves a half-written file behind."""
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self.prices, f, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.error(f"Failed to save start prices to {self.path}: {e}")
+
+
+# Shared start price store used by every module in this bot
+start_prices = StartPriceStore()
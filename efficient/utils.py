@@ -2,7 +2,15 @@ import MetaTrader5 as mt5
 import pytz
 from datetime import datetime, timedelta
 from notifications import send_discord_message_async
-import asyncio
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from mt5_session import Mt5Session
+from symbol_registry import registry
+from position_book import book
+from start_price_store import start_prices
+from bulk_close import close_all
+from order_templates import order_templates
+from order_executor import executor
 import logging
 from trade_codes import get_trade_return_description
 
@@ -12,6 +20,8 @@ last_message_time = {}
 # Define the interval between messages in seconds
 MESSAGE_INTERVAL = 60  # Example: 30 seconds
 TRADE_LIMIT = 3  # Maximum of 3 trades per symbol
+CONNECT_TIMEOUT = 30  # Seconds to wait for the session at startup
+ORDER_READY_TIMEOUT = 5  # Seconds an order waits for a lost session to come back
 
 
 async def log_error_and_notify(message):
@@ -30,35 +40,27 @@ async def send_limited_message(symbol, message):
         # Skip sending the message to respect the rate limit
         logging.info(f"Message for {symbol} rate-limited; not sent.")
 
-async def connect_mt5():
-    """Asynchronously initialize and log in to MetaTrader 5."""
-    initialized = await asyncio.to_thread(mt5.initialize)
-    if not initialized:
-        print("Failed to initialize MetaTrader5")
-        return False
-
-    login = 213171528  # Replace with actual login
-    password = "AHe@Yps3"  # Replace with actual password
-    server = "OctaFX-Demo"  # Replace with actual server
-
-    authorized = await asyncio.to_thread(mt5.login, login, password, server)
-    if not authorized:
-        print(f"Login failed for account {login}")
-        return False
+# Long-lived MetaTrader 5 login shared by every order call
+session = Mt5Session(213171528, "AHe@Yps3", "OctaFX-Demo")  # Replace with actual login, password and server
+session.connect_callbacks.append(registry.invalidate)  # Symbol specs are reloaded after every (re)connect
+session.connect_callbacks.append(book.invalidate)  # Positions are reseeded after every (re)connect
 
-    print(f"Successfully logged into account {login} on server {server}")
-    return True
+async def connect_mt5():
+    """Asynchronously wait until the shared MetaTrader 5 session is initialized and logged in."""
+    connected = await session.wait_ready(CONNECT_TIMEOUT)
+    if not connected:
+        print("Failed to connect to MetaTrader5")
+    return connected
 
 async def fetch_current_price(symbol):
     symbol_name = symbol["symbol"]
     # Ensure the symbol is available in Market Watch
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
         return None
 
     # Fetch current price
-    tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+    tick = await gateway.symbol_info_tick(symbol_name)
     if tick:
         return tick.bid  # or tick.ask depending on your logic
     else:
@@ -67,22 +69,15 @@ async def fetch_current_price(symbol):
 
 async def fetch_start_price(symbol):
     symbol_name = symbol["symbol"]
-    now = datetime.now(pytz.timezone('Asia/Kolkata'))
 
     # Ensure the symbol is available in Market Watch
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching start price.")
         return None
 
-    if now.weekday() == 0:  # Monday
-        return await fetch_friday_closing_price(symbol)
-
-    start_of_day_utc = now.replace(hour=0, minute=0, second=0).astimezone(pytz.utc)
-    rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
-
-    if rates:
-        start_price = rates[0]["close"]
+    # Mondays and days after a holiday start from the last trading day's close, see TradingCalendar
+    start_price = await start_prices.start_price(symbol_name)
+    if start_price is not None:
         print(f"Fetched start price for {symbol_name}: {start_price}")
         return start_price
 
@@ -94,25 +89,19 @@ async def fetch_price(symbol, price_type):
     symbol_name = symbol["symbol"]
 
     # Ensure the symbol is selected in Market Watch
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching {price_type} price.")
         return None
 
     if price_type == "current":
-        tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+        tick = await gateway.symbol_info_tick(symbol_name)
         if tick:
             return tick.bid  # or tick.ask depending on requirements
 
     elif price_type == "start":
-        now = datetime.now(pytz.timezone('Asia/Kolkata'))
-        if now.weekday() == 0:  # Monday
-            return await fetch_friday_closing_price(symbol)
-
-        start_of_day_utc = now.replace(hour=0, minute=0, second=0).astimezone(pytz.utc)
-        rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
-        if rates:
-            return rates[0]["close"]
+        start_price = await start_prices.start_price(symbol_name)
+        if start_price is not None:
+            return start_price
 
     await log_error_and_notify(f"Failed to get {price_type} price for {symbol_name}")
     return None
@@ -126,7 +115,7 @@ async def fetch_friday_closing_price(symbol):
     last_friday = last_friday.replace(hour=23, minute=59, second=59)
     utc_from = last_friday.astimezone(pytz.utc)
 
-    rates = await asyncio.to_thread(mt5.copy_rates_from, symbol["symbol"], mt5.TIMEFRAME_M5, utc_from, 1)
+    rates = await gateway.copy_rates_from(symbol["symbol"], mt5.TIMEFRAME_M5, utc_from, 1)
     if rates is not None and len(rates) > 0:
         closing_price = rates[0]['close']
         print(f"Fetched last Friday's closing price for {symbol_name}: {closing_price}")
@@ -141,144 +130,115 @@ async def place_trade_notify(symbol, action, lot_size):
     if open_positions["no_of_positions"] >= TRADE_LIMIT:
         await send_limited_message(symbol, f"Trade limit reached for {symbol}. No further trades will be placed.")
         return  # Skip trade placement if limit is reached
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "python script open",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Trade executed successfully at {now}, order={result}"
+        message = (f"Trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol,message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def hedge_place_trade(symbol, action, lot_size):
     """Asynchronously place a hedge trade without being restricted by trade limits and notify via Discord."""
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "hedge trade by script",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size, hedge=True)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Hedge trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Hedge trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Hedge trade executed successfully at {now}, order={result}"
+        message = (f"Hedge trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol, message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def close_trades_by_symbol(symbol):
     """Asynchronously close all open trades for a symbol."""
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
 
-    open_positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol)
-
-    if open_positions is None or len(open_positions) == 0:
+    report = await close_all(symbol)
+    if not report.requests:
         print(f"No open positions for {symbol}.")
         return
 
-    for position in open_positions:
-        ticket = position.ticket
-        lot = position.volume
-        trade_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        symbol_info = await asyncio.to_thread(mt5.symbol_info, symbol)
-
-        if symbol_info is None:
-            print(f"Symbol {symbol} not found.")
-            continue
-
-        price = symbol_info.bid if trade_type == mt5.ORDER_TYPE_SELL else symbol_info.ask
-
-        close_request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": lot,
-            "type": trade_type,
-            "position": ticket,
-            "price": price,
-            "deviation": 20,
-            "magic": 123456,
-            "comment": "Closing trade by script",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_FOK,
-        }
-
-        result = await asyncio.to_thread(mt5.order_send, close_request)
-
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
-        else:
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    if report.unconfirmed:
+        await book.reconcile()  # Closed without a confirmation; drop the positions the terminal no longer has
+    closed = report.closed()
+    for ticket, result in report.results.items():
+        if ticket in closed:
             message = f"Successfully closed trade {ticket} for {symbol}."
-
+        elif result is None:
+            message = f"Failed to close trade {ticket} for {symbol}, no result from order_send"
+        else:
+            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
         print(message)
-        await send_limited_message(message)
+    if any(report.results[ticket] is None for ticket in report.failed()):
+        session.report_failure()
+
+    message = (f"Closed {len(closed)}/{len(report.requests)} trades for {symbol} in {report.elapsed * 1000:.1f} ms "
+               f"over {report.batches} batch(es).")
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def format_message(message_type, data):
     """Asynchronously format messages for notifications and hourly updates."""
@@ -324,22 +284,11 @@ async def fetch_and_print_price(symbol_data):
         await send_discord_message_async(message)
 
 async def get_open_positions(symbol):
-    """Fetch open positions for a symbol and return position details consistently."""
-    open_positions = {"positions_exist": False, "no_of_positions": 0}  # Set default values
-    symbol_name = symbol["symbol"]
-
-    # Attempt to get open positions for the symbol
-    positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol_name)
-
-    if positions is None:
-        # Notify if there are no positions or an error occurred
-        message = f"No positions exist for {symbol_name} at {datetime.now()}"
-        await send_limited_message(symbol_name, message)
-    elif len(positions) > 0:
-        open_positions["positions_exist"] = True
-        open_positions["no_of_positions"] = len(positions)
+    """Return position details for a symbol from the local position book."""
+    await book.ensure_current()
+    no_of_positions = book.count(symbol["symbol"])
+    return {"positions_exist": no_of_positions > 0, "no_of_positions": no_of_positions}
 
-    return open_positions
 
 async def fetch_pip_difference(current_price, start_price):
     return current_price-start_price
@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from notifications import send_limited_message, send_discord_message_async
 import asyncio
 import logging
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
 from trade_codes import get_trade_return_description
 
 # Global dictionary to store the last message time for each symbol
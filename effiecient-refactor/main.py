@@ -1,3 +1,11 @@
+import os
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+
+# MT5_BACKEND=fake runs the bot against the fake_mt5 simulator instead of a live terminal
+if os.environ.get("MT5_BACKEND") == "fake":
+    import fake_mt5
+    fake_mt5.install_from_env()
+
 from config import symbols_config
 from utils import runBot
 import asyncio
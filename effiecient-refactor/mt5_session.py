@@ -0,0 +1,132 @@
+# mt5_session.py
+
+import asyncio
+import logging
+import random
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+
+
+class Mt5Session:
+    """Keeps one long-lived MetaTrader 5 login alive and lets callers wait until it is usable."""
+
+    def __init__(self, login, password, server, health_interval=5, backoff_base=0.5, backoff_max=30, path=None):
+        """
+        Initialize the session manager.
+
+        Parameters:
+        - login (int), password (str), server (str): Account credentials.
+        - health_interval (float): Seconds between terminal_info/account_info health checks.
+        - backoff_base (float): First reconnect delay ceiling in seconds; doubles per failed attempt.
+        - backoff_max (float): Upper bound of the reconnect delay ceiling in seconds.
+        - path (str): terminal64.exe to start; the default terminal when None.
+        """
+        self.login = login
+        self.password = password
+        self.server = server
+        self.path = path
+        self.health_interval = health_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.connect_callbacks = []  # Called without arguments after every successful (re)connect
+        self.connects = 0
+        self.loop = None
+        self.ready = None
+        self.wakeup = None
+        self.supervisor = None
+
+    def start(self):
+        """Starts the supervisor task on the running event loop if it is not already running there."""
+        loop = asyncio.get_running_loop()
+        if self.supervisor is not None and not self.supervisor.done() and self.loop is loop:
+            return
+        self.loop = loop
+        self.ready = asyncio.Event()
+        self.wakeup = asyncio.Event()
+        self.supervisor = loop.create_task(self.supervise())
+
+    async def stop(self):
+        """Stops the supervisor task; the terminal connection itself is left open."""
+        if self.supervisor is not None:
+            self.supervisor.cancel()
+            try:
+                await self.supervisor
+            except asyncio.CancelledError:
+                pass
+            self.supervisor = None
+
+    async def wait_ready(self, timeout=None):
+        """Waits until the session is logged in. Returns False if it is not ready within timeout seconds."""
+        self.start()
+        if self.ready.is_set():
+            return True
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def use_account(self, login, password, server, path=None):
+        """Switches the session to another account (and terminal); a running supervisor logs in again."""
+        self.login = login
+        self.password = password
+        self.server = server
+        self.path = path
+        if self.ready is not None:
+            self.loop.call_soon_threadsafe(self.ready.clear)
+            self.report_failure()
+
+    def report_failure(self):
+        """Asks the supervisor for an immediate health check, e.g. after order_send returned None."""
+        if self.wakeup is not None:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def is_healthy(self):
+        """Cheap liveness check: terminal connected and still logged into our account."""
+        terminal, account = await gateway.call_many([
+            ("terminal_info", (), {}),
+            ("account_info", (), {}),
+        ])
+        return (terminal is not None and terminal.connected
+                and account is not None and account.login == self.login)
+
+    async def connect(self):
+        """Runs initialize and login once. Returns True on success."""
+        initialized = await gateway.initialize(self.path) if self.path else await gateway.initialize()
+        if not initialized:
+            logging.error(f"Failed to initialize MetaTrader5: {await gateway.last_error()}")
+            return False
+        if not await gateway.login(self.login, self.password, self.server):
+            logging.error(f"Login failed for account {self.login}: {await gateway.last_error()}")
+            return False
+        self.connects += 1
+        print(f"Successfully logged into account {self.login} on server {self.server}")
+        for callback in self.connect_callbacks:
+            callback()
+        return True
+
+    async def supervise(self):
+        """Health-checks the session and reconnects with jittered exponential backoff on failure."""
+        attempt = 0
+        while True:
+            if self.ready.is_set():
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.health_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+                if await self.is_healthy():
+                    continue
+                logging.error(f"MetaTrader5 session for account {self.login} lost; reconnecting")
+                self.ready.clear()
+
+            # An already logged-in terminal (e.g. from a previous event loop) needs no new login
+            if (attempt == 0 and self.connects and await self.is_healthy()) or await self.connect():
+                attempt = 0
+                self.ready.set()
+                continue
+
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+            attempt += 1
+            logging.error(f"Reconnect attempt {attempt} failed; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
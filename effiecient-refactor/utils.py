@@ -5,6 +5,15 @@ import pytz
 from config import symbols_config  # Import symbols_config from config.py
 import logging
 from notifications import send_discord_message_async
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from mt5_session import Mt5Session
+from position_book import book
+from symbol_registry import registry
+from bulk_close import close_all
+from order_templates import order_templates
+from order_executor import executor
+from trade_codes import get_trade_return_description
 
 # Dictionaries to store prices
 start_prices = {}
@@ -14,6 +23,8 @@ MESSAGE_INTERVAL = 60  # Interval for limiting message sending, in seconds
 last_message_time = {}  # Store last message sent time for each symbol
 
 TRADE_LIMIT = 3  # Maximum of 3 trades per symbol
+CONNECT_TIMEOUT = 30  # Seconds to wait for the session at startup
+ORDER_READY_TIMEOUT = 5  # Seconds an order waits for a lost session to come back
 
 
 async def send_limited_message(symbol, message):
@@ -32,24 +43,18 @@ async def log_error_and_notify(message):
     await send_limited_message("general", message)
 
 
-async def connect_mt5():
-    """Asynchronously initialize and log in to MetaTrader 5."""
-    initialized = await asyncio.to_thread(mt5.initialize)
-    if not initialized:
-        await log_error_and_notify("Failed to initialize MetaTrader5")
-        return False
-
-    login = 213171528
-    password = "AHe@Yps3"
-    server = "OctaFX-Demo"
+# Long-lived MetaTrader 5 login shared by every order call
+session = Mt5Session(213171528, "AHe@Yps3", "OctaFX-Demo")  # Replace with actual login, password and server
+session.connect_callbacks.append(book.invalidate)  # Positions are reseeded after every (re)connect
+session.connect_callbacks.append(registry.invalidate)  # Symbol specs are reloaded after every (re)connect
 
-    authorized = await asyncio.to_thread(mt5.login, login, password, server)
-    if not authorized:
-        await log_error_and_notify(f"Login failed for account {login}")
-        return False
 
-    logging.info(f"Successfully logged into account {login} on server {server}")
-    return True
+async def connect_mt5():
+    """Asynchronously wait until the shared MetaTrader 5 session is initialized and logged in."""
+    connected = await session.wait_ready(CONNECT_TIMEOUT)
+    if not connected:
+        await log_error_and_notify("Failed to connect to MetaTrader5")
+    return connected
 
 
 # trade_management
@@ -59,155 +64,125 @@ async def place_trade_notify(symbol, action, lot_size):
     if open_positions["no_of_positions"] >= TRADE_LIMIT:
         await send_limited_message(symbol, f"Trade limit reached for {symbol}. No further trades will be placed.")
         return  # Skip trade placement if limit is reached
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "python script open",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Trade executed successfully at {now}, order={result}"
+        message = (f"Trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol,message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def hedge_place_trade(symbol, action, lot_size):
     """Asynchronously place a hedge trade without being restricted by trade limits and notify via Discord."""
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "hedge trade by script",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size, hedge=True)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Hedge trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Hedge trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Hedge trade executed successfully at {now}, order={result}"
+        message = (f"Hedge trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol, message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def close_trades_by_symbol(symbol):
     """Asynchronously close all open trades for a symbol."""
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
 
-    open_positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol)
-
-    if open_positions is None or len(open_positions) == 0:
+    report = await close_all(symbol)
+    if not report.requests:
         print(f"No open positions for {symbol}.")
         return
 
-    for position in open_positions:
-        ticket = position.ticket
-        lot = position.volume
-        trade_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        symbol_info = await asyncio.to_thread(mt5.symbol_info, symbol)
-
-        if symbol_info is None:
-            print(f"Symbol {symbol} not found.")
-            continue
-
-        price = symbol_info.bid if trade_type == mt5.ORDER_TYPE_SELL else symbol_info.ask
-
-        close_request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": lot,
-            "type": trade_type,
-            "position": ticket,
-            "price": price,
-            "deviation": 20,
-            "magic": 123456,
-            "comment": "Closing trade by script",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_FOK,
-        }
-
-        result = await asyncio.to_thread(mt5.order_send, close_request)
-
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
-        else:
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    if report.unconfirmed:
+        await book.reconcile()  # Closed without a confirmation; drop the positions the terminal no longer has
+    closed = report.closed()
+    for ticket, result in report.results.items():
+        if ticket in closed:
             message = f"Successfully closed trade {ticket} for {symbol}."
-
+        elif result is None:
+            message = f"Failed to close trade {ticket} for {symbol}, no result from order_send"
+        else:
+            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
         print(message)
-        await send_limited_message(symbol, message)
+    if any(report.results[ticket] is None for ticket in report.failed()):
+        session.report_failure()
+
+    message = (f"Closed {len(closed)}/{len(report.requests)} trades for {symbol} in {report.elapsed * 1000:.1f} ms "
+               f"over {report.batches} batch(es).")
+    print(message)
+    await send_limited_message(symbol, message)
 
 
 async def fetch_current_price(symbol_config):
     """Fetch the current price of a given symbol."""
     symbol_name = symbol_config["symbol"]
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
         return None
 
-    tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+    tick = await gateway.symbol_info_tick(symbol_name)
     return tick.bid if tick else None
 
 
@@ -215,9 +190,8 @@ async def fetch_start_price(symbol):
     """Fetch the start price of the day or last Friday closing price for a given symbol."""
     symbol_name = symbol["symbol"]
     now = datetime.now(pytz.timezone('Asia/Kolkata'))
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
 
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching start price.")
         return None
 
@@ -225,7 +199,7 @@ async def fetch_start_price(symbol):
         return await fetch_friday_closing_price(symbol)
 
     start_of_day_utc = now.replace(hour=0, minute=0, second=0).astimezone(pytz.utc)
-    rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
+    rates = await gateway.copy_rates_from(symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
 
     if rates:
         start_price = rates[0]["close"]
@@ -245,7 +219,7 @@ async def fetch_friday_closing_price(symbol):
     last_friday = last_friday.replace(hour=23, minute=59, second=59)
     utc_from = last_friday.astimezone(pytz.utc)
 
-    rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
+    rates = await gateway.copy_rates_from(symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
     if rates and len(rates) > 0:
         closing_price = rates[0]['close']
         logging.info(f"Fetched last Friday's closing price for {symbol_name}: {closing_price}")
@@ -256,19 +230,16 @@ async def fetch_friday_closing_price(symbol):
 
 
 async def get_open_positions(symbol):
-    """Fetch open positions for a symbol and return position details consistently."""
+    """Return position details for a symbol from the local position book."""
     symbol_name = symbol["symbol"]
-    positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol_name)
+    await book.ensure_current()
+    no_of_positions = book.count(symbol_name)
 
-    open_positions = {
-        "positions_exist": len(positions) > 0,
-        "no_of_positions": len(positions) if positions else 0
-    }
-
-    if not positions:
+    if not no_of_positions:
         await send_limited_message(symbol_name, f"No positions exist for {symbol_name} at {datetime.now()}")
 
-    return open_positions
+    return {"positions_exist": no_of_positions > 0, "no_of_positions": no_of_positions}
+
 
 
 async def fetch_pip_difference(current_price, start_price):
@@ -342,6 +313,7 @@ async def runBot():
     # Step 1: Connect to MetaTrader5
     while not await connect_mt5():
         await asyncio.sleep(1)
+    await order_templates.build()  # Selects every configured symbol in one round trip and prebuilds its orders
 
     # Step 2: Fetch start prices once
     start_price_tasks = [fetch_start_price(symbol_config) for symbol_config in symbols_config]
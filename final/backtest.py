@@ -0,0 +1,408 @@
+# backtest.py
+# Replays recorded ticks or bars through the real ThresholdTradingStrategy against a simulated broker.
+#
+#     python backtest.py ticks.csv    # time_msc,symbol,bid,ask, the fake_mt5 tick file format
+#     python backtest.py              # M5 history of every configured symbol from the local bar store
+
+import asyncio
+import contextlib
+import csv
+import logging
+import math
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytz
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from logic import ThresholdTradingStrategy
+
+# One row per fill or requote in a backtest's trade log
+TRADE_DTYPE = np.dtype([
+    ("time_msc", "i8"),
+    ("ticket", "i8"),
+    ("entry", "U7"),  # 'in', 'out' or 'requote'
+    ("side", "U4"),
+    ("volume", "f8"),
+    ("quote", "f8"),  # Bid or ask the order was sent at
+    ("price", "f8"),  # Fill price after slippage; nan for requotes
+    ("profit", "f8"),  # Realized profit of 'out' rows
+])
+
+EQUITY_DTYPE = np.dtype([
+    ("time_msc", "i8"),
+    ("equity", "f8"),
+])
+
+EPOCH = date(1970, 1, 1)
+
+PRICING_DISTANCE = 1000  # Points the terminal is asked to price a lot over; keeps its rounding to cents negligible
+
+
+class FillModel:
+    """
+    Market order fills: buys at the ask and sells at the bid, slipped against the order by a random number
+    of points. Orders that would slip further than their deviation are requoted instead of filled.
+    """
+
+    def __init__(self, point, slippage_points=0.0, open_deviation=50, close_deviation=20, seed=0):
+        """
+        Initialize the fill model.
+
+        Parameters:
+        - point (float): Price distance of one point.
+        - slippage_points (float): Mean adverse slippage in points (exponentially distributed); 0 fills at the quote.
+        - open_deviation (int): Deviation of opening orders in points, as in order_templates.OPEN_DEVIATION.
+        - close_deviation (int): Deviation of closing orders in points, as in order_templates.CLOSE_DEVIATION.
+        - seed (int): Seed of the slippage draws, so a backtest can be repeated exactly.
+        """
+        self.point = point
+        self.slippage_points = slippage_points
+        self.open_deviation = open_deviation
+        self.close_deviation = close_deviation
+        self.random = random.Random(seed)
+
+    def fill(self, side, bid, ask, closing=False):
+        """
+        Returns:
+        - tuple: (quote, fill price), the fill price being None when the order is requoted.
+        """
+        quote = ask if side == "buy" else bid
+        slippage = self.random.expovariate(1 / self.slippage_points) if self.slippage_points else 0.0
+        if slippage > (self.close_deviation if closing else self.open_deviation):
+            return quote, None
+        return quote, quote + slippage * self.point if side == "buy" else quote - slippage * self.point
+
+
+class SimulatedBroker:
+    """Positions, fills and realized profit of one symbol, priced at the tick set by quote()."""
+
+    def __init__(self, fill_model, lot_value=100000):
+        """
+        Initialize the broker.
+
+        Parameters:
+        - fill_model (FillModel): Fill model of every order.
+        - lot_value (float): Profit in the account currency of one lot moving by 1.0 in price: the contract
+          size times the rate of the quote currency in the account currency.
+        """
+        self.fill_model = fill_model
+        self.lot_value = lot_value
+        self.positions = {}  # ticket -> (side, volume, open price)
+        self.trades = []  # TRADE_DTYPE rows
+        self.next_ticket = 1
+        self.realized = 0.0
+        # Open volume and volume-weighted open prices per side, for marking equity to market
+        self.buy_volume = self.buy_cost = self.sell_volume = self.sell_cost = 0.0
+        self.time_msc = 0
+        self.bid = self.ask = math.nan
+
+    def quote(self, time_msc, bid, ask):
+        self.time_msc = time_msc
+        self.bid = bid
+        self.ask = ask
+
+    def open(self, side, volume):
+        quote, price = self.fill_model.fill(side, self.bid, self.ask)
+        if price is None:
+            self.trades.append((self.time_msc, 0, "requote", side, volume, quote, math.nan, 0.0))
+            return None
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.positions[ticket] = (side, volume, price)
+        if side == "buy":
+            self.buy_volume += volume
+            self.buy_cost += volume * price
+        else:
+            self.sell_volume += volume
+            self.sell_cost += volume * price
+        self.trades.append((self.time_msc, ticket, "in", side, volume, quote, price, 0.0))
+        return ticket
+
+    def close_all(self):
+        """Closes every open position with an opposite market order, as close_trades_by_symbol does."""
+        for ticket, (side, volume, open_price) in list(self.positions.items()):
+            close_side = "sell" if side == "buy" else "buy"
+            quote, price = self.fill_model.fill(close_side, self.bid, self.ask, closing=True)
+            if price is None:
+                self.trades.append((self.time_msc, ticket, "requote", close_side, volume, quote, math.nan, 0.0))
+                continue
+            direction = 1 if side == "buy" else -1
+            profit = round(direction * (price - open_price) * volume * self.lot_value, 2)
+            self.realized += profit
+            del self.positions[ticket]
+            if side == "buy":
+                self.buy_volume -= volume
+                self.buy_cost -= volume * open_price
+            else:
+                self.sell_volume -= volume
+                self.sell_cost -= volume * open_price
+            self.trades.append((self.time_msc, ticket, "out", close_side, volume, quote, price, profit))
+
+    def exposure(self):
+        """(realized, buy volume, buy cost, sell volume, sell cost): everything equity depends on besides prices."""
+        return self.realized, self.buy_volume, self.buy_cost, self.sell_volume, self.sell_cost
+
+
+class BacktestStrategy(ThresholdTradingStrategy):
+    """ThresholdTradingStrategy whose trades go to a SimulatedBroker instead of being printed."""
+
+    def __init__(self, symbol_config, broker):
+        super().__init__(symbol_config)
+        self.broker = broker
+        self.lot_size = symbol_config.get("lot_size", 1.0)
+
+    async def place_initial_trade(self, direction, price):
+        self.broker.open(direction, self.lot_size)
+
+    async def place_hedging_trades(self, price):
+        opposite_direction = "sell" if self.initial_direction == "buy" else "buy"
+        self.broker.open(opposite_direction, self.lot_size)
+        self.broker.open(opposite_direction, self.lot_size)
+        self.hedging_prices.append(price)
+
+    async def close_trade(self, direction, price, reason):
+        self.broker.close_all()
+
+
+class BacktestResult:
+    """Trade log, equity curve and throughput of one backtest."""
+
+    __slots__ = ("symbol", "trades", "equity", "ticks", "elapsed")
+
+    def __init__(self, symbol, trades, equity, ticks, elapsed):
+        self.symbol = symbol
+        self.trades = trades  # TRADE_DTYPE array
+        self.equity = equity  # EQUITY_DTYPE array, one row per tick, open positions marked to market
+        self.ticks = ticks
+        self.elapsed = elapsed
+
+    def summary(self):
+        """Profit, win rate, drawdown, fill counts and speed of the run."""
+        closes = self.trades[self.trades["entry"] == "out"]
+        profits = closes["profit"]
+        gross_profit = float(profits[profits > 0].sum())
+        gross_loss = float(-profits[profits < 0].sum())
+        equity = self.equity["equity"]
+        drawdown = float((np.maximum.accumulate(equity) - equity).max()) if len(equity) else 0.0
+        return {
+            "symbol": self.symbol,
+            "ticks": self.ticks,
+            "ticks_per_second": round(self.ticks / self.elapsed) if self.elapsed else None,
+            "fills": int((self.trades["entry"] != "requote").sum()),
+            "requotes": int((self.trades["entry"] == "requote").sum()),
+            "closed": len(closes),
+            "win_rate": round(float((profits > 0).mean()), 3) if len(closes) else None,
+            "net_profit": round(float(profits.sum()), 2),
+            "gross_profit": round(gross_profit, 2),
+            "gross_loss": round(gross_loss, 2),
+            "profit_factor": round(gross_profit / gross_loss, 2) if gross_loss else None,
+            "max_drawdown": round(drawdown, 2),
+            "final_equity": round(float(equity[-1]), 2) if len(equity) else 0.0,
+        }
+
+    def write_trades(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(TRADE_DTYPE.names)
+            writer.writerows(self.trades.tolist())
+
+
+class Backtester:
+    """Drives a BacktestStrategy tick by tick, with a new start price at every trading day."""
+
+    def __init__(self, symbol_config, fill_model=None, timezone="Asia/Kolkata", start_prices=None, verbose=False):
+        """
+        Initialize the backtester.
+
+        Parameters:
+        - symbol_config (dict): Symbol configuration as in config.py; point is optional. P&L is in the account
+          currency when it has a lot_value (see priced_configs), and otherwise in the quote currency of
+          contract_size (100000 by default) units per lot.
+        - fill_model (FillModel): Fill model; fills at the quote without slippage by default.
+        - timezone (str): Timezone whose midnight starts a trading day.
+        - start_prices (dict): ISO date -> start price, e.g. from start_prices.json; days without one
+          start at their first bid.
+        - verbose (bool): Keep the strategy's printing; off by default, as printing dominates the run time.
+        """
+        self.symbol_config = symbol_config
+        self.point = symbol_config.get("point", symbol_config["pip_size"] / 10)
+        self.fill_model = fill_model if fill_model is not None else FillModel(self.point)
+        self.timezone = pytz.timezone(timezone)
+        self.start_prices = start_prices or {}
+        self.verbose = verbose
+        self.lot_value = symbol_config.get("lot_value", symbol_config.get("contract_size", 100000))
+
+    def day_starts(self, times_msc):
+        """
+        Returns:
+        - tuple: (index of the first tick of every trading day, day number of every tick).
+        """
+        offset = datetime.fromtimestamp(int(times_msc[0]) // 1000, self.timezone).utcoffset().total_seconds()
+        days = (times_msc // 1000 + int(offset)) // 86400
+        return np.flatnonzero(np.diff(days, prepend=days[0] - 1)), days
+
+    async def run(self, ticks):
+        """
+        Replays ticks (any structured array with time_msc, bid and ask, sorted by time).
+
+        Returns:
+        - BacktestResult: Trade log, equity curve and summary statistics of the run.
+        """
+        started = time.perf_counter()
+        broker = SimulatedBroker(self.fill_model, self.lot_value)
+        strategy = BacktestStrategy(self.symbol_config, broker)
+        core = strategy.core
+        times = np.ascontiguousarray(ticks["time_msc"], dtype=np.int64)
+        bids = np.ascontiguousarray(ticks["bid"], dtype=np.float64)
+        asks = np.ascontiguousarray(ticks["ask"], dtype=np.float64)
+        count = len(times)
+        if not count:
+            return BacktestResult(self.symbol_config["symbol"], np.zeros(0, TRADE_DTYPE),
+                                  np.zeros(0, EQUITY_DTYPE), 0, 0.0)
+
+        # Like process_ticks, only bid changes reach the strategy
+        changed = np.flatnonzero(np.diff(bids, prepend=np.nan) != 0)
+        starts, days = self.day_starts(times)
+        bounds = np.searchsorted(changed, np.append(starts, count))
+        events = [0]  # Tick index from which each exposure applies
+        exposures = [broker.exposure()]
+
+        with contextlib.ExitStack() as stack:
+            if not self.verbose:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            for day, first in enumerate(starts.tolist()):
+                start_price = float(self.start_prices.get(day_key(int(days[first])), bids[first]))
+                core.set_start(start_price)
+                on_price = core.on_price
+                indices = changed[bounds[day]:bounds[day + 1]]
+                for index, price in zip(indices.tolist(), bids[indices].tolist()):
+                    action = on_price(price)
+                    if action:
+                        broker.quote(int(times[index]), price, float(asks[index]))
+                        await strategy.act(action, start_price, price)
+                        events.append(index)
+                        exposures.append(broker.exposure())
+
+        # Exposure only changes at actions, so equity is marked to market piecewise over every tick
+        lengths = np.diff(np.append(events, count))
+        realized, buy_volume, buy_cost, sell_volume, sell_cost = (
+            np.repeat(column, lengths) for column in np.array(exposures).T)
+        equity = np.empty(count, dtype=EQUITY_DTYPE)
+        equity["time_msc"] = times
+        equity["equity"] = realized + broker.lot_value * (buy_volume * bids - buy_cost + sell_cost - sell_volume * asks)
+
+        trades = np.array(broker.trades, dtype=TRADE_DTYPE)
+        return BacktestResult(self.symbol_config["symbol"], trades, equity, count, time.perf_counter() - started)
+
+
+async def lot_values(symbol_names):
+    """
+    Profit in the account currency of one lot moving by 1.0 in price, per symbol, from the terminal's
+    order_calc_profit at the current bid. Cross-currency rates are taken as they are now, not as they were
+    at each historical tick.
+
+    Returns:
+    - dict: symbol name -> lot value; symbols the terminal cannot price are left out.
+    """
+    import MetaTrader5 as mt5
+    from mt5_gateway import gateway
+    from symbol_registry import registry
+    await registry.load(symbol_names)
+    ticks = await gateway.call_many([("symbol_info_tick", (name,), {}) for name in symbol_names])
+    calls = []
+    distances = {}
+    for name, tick in zip(symbol_names, ticks):
+        spec = registry.get(name)
+        if tick is None or spec is None:
+            continue
+        distances[name] = PRICING_DISTANCE * spec.point
+        calls.append(("order_calc_profit", (mt5.ORDER_TYPE_BUY, name, 1.0, tick.bid, tick.bid + distances[name]), {}))
+    profits = await gateway.call_many(calls)
+    return {name: profit / distances[name] for name, profit in zip(distances, profits) if profit}
+
+
+async def priced_configs(symbols_config, timeout=10):
+    """
+    Copies of the symbol configurations with lot_value set from the terminal, so backtests report P&L in the
+    account currency. The configurations are returned unchanged when no terminal is ready within timeout seconds.
+    """
+    from utils import session
+    if not await session.wait_ready(timeout):
+        logging.warning("No terminal to price lots in the account currency; P&L stays in each quote currency")
+        await session.stop()
+        return symbols_config
+    try:
+        values = await lot_values([symbol["symbol"] for symbol in symbols_config])
+    finally:
+        await session.stop()
+    for symbol in symbols_config:
+        if "lot_value" not in symbol and symbol["symbol"] not in values:
+            logging.warning(f"Could not price {symbol['symbol']} in the account currency; its P&L stays in its quote currency")
+    return [{**symbol, "lot_value": values[symbol["symbol"]]}
+            if "lot_value" not in symbol and symbol["symbol"] in values else symbol
+            for symbol in symbols_config]
+
+
+def day_key(day):
+    """ISO date of a day number as returned by Backtester.day_starts."""
+    return (EPOCH + timedelta(days=day)).isoformat()
+
+
+def ticks_from_bars(rates, point, seconds, spread_points=None):
+    """
+    Four ticks per bar (open, high and low in the likelier order, close) for backtests over bar history.
+
+    Parameters:
+    - rates (np.ndarray): Bars as returned by copy_rates_* or BarStore.range.
+    - point (float): Price distance of one point.
+    - seconds (int): Bar length in seconds.
+    - spread_points (int): Spread to quote asks at; each bar's own spread when None.
+
+    Returns:
+    - np.ndarray: Structured array with time_msc, bid and ask.
+    """
+    count = len(rates)
+    bullish = rates["close"] >= rates["open"]
+    ticks = np.empty(count * 4, dtype=[("time_msc", "i8"), ("bid", "f8"), ("ask", "f8")])
+    # A bullish bar more likely went down to its low before its high
+    ticks["bid"][0::4] = rates["open"]
+    ticks["bid"][1::4] = np.where(bullish, rates["low"], rates["high"])
+    ticks["bid"][2::4] = np.where(bullish, rates["high"], rates["low"])
+    ticks["bid"][3::4] = rates["close"]
+    for step in range(4):
+        ticks["time_msc"][step::4] = rates["time"] * 1000 + step * seconds * 250
+    spread = rates["spread"] if spread_points is None else np.full(count, spread_points)
+    ticks["ask"] = ticks["bid"] + np.repeat(spread, 4) * point
+    return ticks
+
+
+async def backtest_main():
+    from config import symbols_config
+    symbols_config = await priced_configs(symbols_config)
+    if len(sys.argv) > 1:
+        from fake_mt5.simulator import load_tick_file
+        sources = load_tick_file(sys.argv[1])
+    else:
+        from bar_store import bar_store
+        sources = {}
+        for symbol in symbols_config:
+            series = bar_store.series(symbol["symbol"])
+            if len(series):
+                point = symbol.get("point", symbol["pip_size"] / 10)
+                sources[symbol["symbol"]] = ticks_from_bars(series.bars, point, series.seconds)
+
+    for symbol in symbols_config:
+        ticks = sources.get(symbol["symbol"])
+        if ticks is None:
+            print(f"No history for {symbol['symbol']}")
+            continue
+        result = await Backtester(symbol).run(ticks)
+        result.write_trades(f"backtest_{symbol['symbol']}_trades.csv")
+        print(result.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(backtest_main())
@@ -0,0 +1,200 @@
+# bar_store.py
+
+import MetaTrader5 as mt5
+import logging
+import os
+from datetime import datetime
+import numpy as np
+import pytz
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+
+# Same layout as the rates arrays returned by copy_rates_*
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("tick_volume", "<u8"),
+    ("spread", "<i4"),
+    ("real_volume", "<u8"),
+])
+
+# Timeframe -> (file name suffix, bar length in seconds)
+TIMEFRAMES = {
+    mt5.TIMEFRAME_M1: ("M1", 60),
+    mt5.TIMEFRAME_M5: ("M5", 300),
+    mt5.TIMEFRAME_M15: ("M15", 900),
+    mt5.TIMEFRAME_M30: ("M30", 1800),
+    mt5.TIMEFRAME_H1: ("H1", 3600),
+    mt5.TIMEFRAME_H4: ("H4", 14400),
+    mt5.TIMEFRAME_D1: ("D1", 86400),
+}
+
+
+def _seconds(value):
+    """Epoch seconds of a datetime (naive means UTC) or of a number that already is one."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = pytz.utc.localize(value)
+        return int(value.timestamp())
+    return int(value)
+
+
+def _open_memmap(path, dtype):
+    count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class BarSeries:
+    """Closed bars of one symbol and timeframe, in a memory-mapped file plus a contiguous time index."""
+
+    def __init__(self, directory, symbol, timeframe):
+        name, self.seconds = TIMEFRAMES[timeframe]
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.directory = directory
+        self.bars_path = os.path.join(directory, f"{symbol}_{name}.bars")
+        self.index_path = os.path.join(directory, f"{symbol}_{name}.time")
+        self._repair()
+        self._map()
+
+    def _repair(self):
+        """Cuts both files to the same number of whole records, e.g. after a crash in the middle of an append."""
+        counts = [os.path.getsize(path) // itemsize if os.path.exists(path) else 0
+                  for path, itemsize in ((self.bars_path, BAR_DTYPE.itemsize), (self.index_path, 8))]
+        count = min(counts)
+        for path, itemsize in ((self.bars_path, BAR_DTYPE.itemsize), (self.index_path, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != count * itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(count * itemsize)
+
+    def _map(self):
+        self.bars = _open_memmap(self.bars_path, BAR_DTYPE)
+        self.times = _open_memmap(self.index_path, np.dtype("<i8"))
+
+    def __len__(self):
+        return len(self.times)
+
+    def last_time(self):
+        """Open time of the newest stored bar, None when empty."""
+        return int(self.times[-1]) if len(self.times) else None
+
+    def append(self, rates):
+        """
+        Appends the bars of rates that are newer than the last stored bar.
+
+        Returns:
+        - int: Number of bars appended.
+        """
+        if rates is None or not len(rates):
+            return 0
+        last = self.last_time()
+        if last is not None:
+            rates = rates[rates["time"] > last]
+            if not len(rates):
+                return 0
+        bars = np.zeros(len(rates), dtype=BAR_DTYPE)
+        for field in BAR_DTYPE.names:
+            if field in rates.dtype.names:
+                bars[field] = rates[field]
+        os.makedirs(self.directory, exist_ok=True)
+        # Bars first, index last: a crash in between leaves extra bars that _repair() drops
+        with open(self.bars_path, "ab") as f:
+            f.write(bars.tobytes())
+        with open(self.index_path, "ab") as f:
+            f.write(bars["time"].tobytes())
+        self._map()
+        return len(bars)
+
+    def range(self, start, end):
+        """Bars with an open time in [start, end], as a read-only view on the file (no copy)."""
+        lo = int(self.times.searchsorted(_seconds(start), side="left"))
+        hi = int(self.times.searchsorted(_seconds(end), side="right"))
+        return self.bars[lo:hi]
+
+    def close_at(self, when):
+        """
+        Close of the bar open at when, the way copy_rates_from(symbol, timeframe, when, 1) returns it.
+
+        None unless a later bar is stored too, i.e. the bar is known to be complete.
+        """
+        position = int(self.times.searchsorted(_seconds(when), side="right"))
+        if position == 0 or position >= len(self.times):
+            return None
+        return float(self.bars["close"][position - 1])
+
+
+class BarStore:
+    """Local history of closed bars per symbol and timeframe, synced incrementally from the terminal."""
+
+    def __init__(self, directory="bars", history_days=90, chunk_days=7):
+        """
+        Initialize the bar store.
+
+        Parameters:
+        - directory (str): Folder holding one .bars and one .time file per symbol and timeframe.
+        - history_days (int): How far back the first sync of a series reaches.
+        - chunk_days (int): Days requested per copy_rates_range call, so one sync never holds the gateway for long.
+        """
+        self.directory = directory
+        self.history_days = history_days
+        self.chunk_days = chunk_days
+        self.series_by_key = {}  # (symbol, timeframe) -> BarSeries
+
+    def series(self, symbol, timeframe=mt5.TIMEFRAME_M5):
+        key = (symbol, timeframe)
+        series = self.series_by_key.get(key)
+        if series is None:
+            series = self.series_by_key[key] = BarSeries(self.directory, symbol, timeframe)
+        return series
+
+    def range(self, symbol, timeframe, start, end):
+        """Stored bars of a symbol with an open time in [start, end], without touching the terminal."""
+        return self.series(symbol, timeframe).range(start, end)
+
+    async def sync(self, symbol_names, timeframe=mt5.TIMEFRAME_M5, until=None):
+        """
+        Fetches the bars each series is missing since its last stored bar, all symbols per gateway round trip.
+
+        The newest bar returned by the terminal may still be forming, so it is left for the next sync.
+
+        Returns:
+        - dict: symbol name -> number of bars appended.
+        """
+        until = _seconds(until) if until is not None else _seconds(datetime.now(pytz.utc))
+        chunk = self.chunk_days * 86400
+        cursors = {}
+        for name in symbol_names:
+            last = self.series(name, timeframe).last_time()
+            cursors[name] = last + 1 if last is not None else until - self.history_days * 86400
+        appended = {name: 0 for name in symbol_names}
+
+        while cursors:
+            calls = []
+            for name, start in cursors.items():
+                date_from = datetime.fromtimestamp(start, pytz.utc)
+                date_to = datetime.fromtimestamp(min(start + chunk, until), pytz.utc)
+                calls.append(("copy_rates_range", (name, timeframe, date_from, date_to), {}))
+            results = await gateway.call_many(calls)
+
+            next_cursors = {}
+            for (name, start), rates in zip(list(cursors.items()), results):
+                if rates is None:
+                    logging.error(f"copy_rates_range failed for {name}: {await gateway.last_error()}")
+                    continue
+                end = start + chunk
+                if end >= until and len(rates):
+                    rates = rates[:-1]  # Possibly still forming
+                appended[name] += self.series(name, timeframe).append(rates)
+                if end < until:
+                    next_cursors[name] = end + 1
+            cursors = next_cursors
+        return appended
+
+
+# Shared bar store used by every module in this bot
+bar_store = BarStore()
@@ -1,14 +1,25 @@
-import MetaTrader5 as mt5
 import asyncio
 import logging
-from datetime import datetime, timedelta
+import numpy as np
 import pytz
 from config import symbols_config
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from symbol_registry import registry
+from start_price_store import start_prices
+
+# One row per configured symbol, as returned by PriceFetcher.snapshot()
+TICK_SNAPSHOT_DTYPE = np.dtype([
+    ("symbol", "U16"),
+    ("bid", "f8"),
+    ("ask", "f8"),
+    ("time_msc", "i8"),
+])
 
 class PriceFetcher:
     def __init__(self, symbols_config):
         self.symbols_config = symbols_config
-        self.start_prices = {}  # To store start prices for each symbol
+        self.symbol_names = [symbol["symbol"] for symbol in symbols_config]
         self.timezone = pytz.timezone('Asia/Kolkata')  # Set the timezone
 
     async def log_error_and_notify(self, message):
@@ -18,12 +29,11 @@ class PriceFetcher:
     async def fetch_current_price(self, symbol):
         """Fetches the current price for a given symbol."""
         symbol_name = symbol["symbol"]
-        selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-        if not selected:
+        if await registry.ensure(symbol_name) is None:
             await self.log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
             return None
 
-        tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+        tick = await gateway.symbol_info_tick(symbol_name)
         if tick:
             return tick.bid
         else:
@@ -31,45 +41,50 @@ class PriceFetcher:
             return None
 
     async def refresh_start_prices(self):
-        """Refreshes start prices for all symbols at 12:00 AM each day."""
-        current_day = datetime.now(self.timezone).date()
-
-        for symbol in self.symbols_config:
-            symbol_name = symbol["symbol"]
-            start_of_day = datetime.now(self.timezone).replace(hour=0, minute=0, second=0, microsecond=0)
-            start_of_day_utc = start_of_day.astimezone(pytz.utc)
-
-            # Fetch the first available price after midnight
-            rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
-            if rates is not None and len(rates) > 0:
-                start_price = rates[0]["close"]
-                # Update start price in cache
-                self.start_prices[symbol_name] = {"price": start_price, "date": current_day}
-            else:
-                await self.log_error_and_notify(f"Failed to get start price at 12:00 AM for {symbol_name}")
+        """Makes sure today's start price of every symbol is known, fetching only the missing ones."""
+        prices = await start_prices.ensure(self.symbol_names)
+        for name in self.symbol_names:
+            if name not in prices:
+                await self.log_error_and_notify(f"Failed to get start price for {name}")
+        return prices
 
     async def get_start_price(self, symbol):
-        """Retrieves the cached start price for the symbol, refreshing if needed."""
-        symbol_name = symbol["symbol"]
-        current_day = datetime.now(self.timezone).date()
+        """Retrieves today's start price for the symbol from the start price store."""
+        return await start_prices.start_price(symbol["symbol"])
+
+    async def snapshot(self):
+        """
+        Reads the latest tick of every configured symbol in one gateway round trip.
 
-        # Refresh start prices if they are not for today
-        if symbol_name not in self.start_prices or self.start_prices[symbol_name]["date"] != current_day:
-            await self.refresh_start_prices()
+        Returns:
+        - np.recarray: One row per symbol with symbol, bid, ask and time_msc.
+          Symbols without a tick have NaN prices and a time_msc of 0.
+        """
+        for name in await registry.load(self.symbol_names):
+            await self.log_error_and_notify(f"Failed to select symbol {name} for fetching current price.")
 
-        return self.start_prices.get(symbol_name, {}).get("price")
+        ticks = await gateway.call_many([("symbol_info_tick", (name,), {}) for name in self.symbol_names])
+        snapshot = np.empty(len(ticks), dtype=TICK_SNAPSHOT_DTYPE)
+        for row, (name, tick) in enumerate(zip(self.symbol_names, ticks)):
+            if tick:
+                snapshot[row] = (name, tick.bid, tick.ask, tick.time_msc)
+            else:
+                snapshot[row] = (name, np.nan, np.nan, 0)
+        return snapshot.view(np.recarray)
 
     async def fetch_all_current_prices(self):
         """Fetches current prices along with the start prices for each symbol."""
         result = {}
-        for symbol in self.symbols_config:
+        snapshot = await self.snapshot()
+        for symbol, row in zip(self.symbols_config, snapshot):
+            if np.isnan(row.bid):
+                await self.log_error_and_notify(f"Failed to get current price for {symbol['symbol']}")
+                continue
             start_price = await self.get_start_price(symbol)
-            current_price = await self.fetch_current_price(symbol)
-            if current_price is not None:
-                result[symbol["symbol"]] = {
-                    "start_price": start_price,
-                    "current_price": current_price
-                }
+            result[symbol["symbol"]] = {
+                "start_price": start_price,
+                "current_price": float(row.bid)
+            }
         return result
 
     async def monitor_prices(self):
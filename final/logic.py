@@ -1,15 +1,40 @@
 # threshold_trading_strategy.py
 
 import asyncio
+import numpy as np
+from ring_buffer import RingBuffer
+from threshold_core import Action, ThresholdCore
+
+HEDGE_HISTORY = 256  # Hedging prices kept per strategy; older ones only count towards the running mean
+
+# Order side of the initial trade for each opening Action
+DIRECTIONS = {Action.OPEN_BUY: "buy", Action.OPEN_SELL: "sell"}
 
 
 class ThresholdTradingStrategy:
-    def __init__(self, symbol_config):
+    """Async adapter around ThresholdCore: runs the order side effects for the actions the core returns."""
+
+    live = False  # Whether the order methods reach the broker; these only print, so positions never reflect them
+
+    def __init__(self, symbol_config, verbose=False):
         self.symbol_config = symbol_config
-        self.trade_placed = False
-        self.initial_direction = None
-        self.hedging_entry_price = None
-        self.hedging_prices = []  # Track prices where hedging is initiated
+        self.core = ThresholdCore(symbol_config["pip_size"], symbol_config["positive_pip_difference"])
+        self.verbose = verbose  # Print the threshold status of every price, not only of prices that act
+        self.hedging_prices = RingBuffer(HEDGE_HISTORY)  # Track prices where hedging is initiated
+        self.last_bid = float("nan")  # Last bid seen by process_ticks
+        self.state_store = None  # StrategyStateStore recording every transition, if any
+
+    @property
+    def trade_placed(self):
+        return self.core.trade_placed
+
+    @property
+    def initial_direction(self):
+        return DIRECTIONS.get(self.core.direction)
+
+    @property
+    def hedging_entry_price(self):
+        return self.core.hedging_entry_price
 
     async def calculate_pip_difference(self, start_price, current_price):
         """Calculate the pip difference between the current and start price."""
@@ -29,51 +54,68 @@ class ThresholdTradingStrategy:
     async def place_initial_trade(self, direction, price):
         """Simulate placing the initial trade at the 1 threshold."""
         print(f"Placing initial {direction} trade at {price}.")
-        self.trade_placed = True
-        self.initial_direction = direction
 
     async def place_hedging_trades(self, price):
         """Simulate placing two opposite hedging trades and log the hedging price."""
         opposite_direction = "sell" if self.initial_direction == "buy" else "buy"
         print(f"Hedging initiated: Placing two {opposite_direction} trades at {price}.")
-        self.hedging_entry_price = price  # Track hedging entry price
         self.hedging_prices.append(price)  # Log the price at which hedging is initiated
 
     async def close_trade(self, direction, price, reason):
         """Simulate closing a trade."""
         print(f"Closing {direction} trade at {price}. Reason: {reason}")
-        self.trade_placed = False  # Reset after closing
-        self.hedging_entry_price = None  # Reset hedging entry price
-
-    async def trigger_trade_by_threshold(self, start_price, current_price):
-        """Core trading logic for threshold detection, hedging, and closure."""
-        threshold_data = await self.check_thresholds(start_price, current_price)
-        no_of_thresholds = round(threshold_data["thresholds"], 2)
-        pip_difference = round(threshold_data["pip_difference"], 4)
 
+    async def act(self, action, start_price, current_price):
+        """Carries out an Action returned by the core."""
+        if self.state_store is not None:
+            # Recorded before the orders go out, so a crash in between is seen as an open trade on restart
+            self.state_store.record(self.symbol_config["symbol"], self.core)
         print(f"[ThresholdTradingStrategy] Symbol: {self.symbol_config['symbol']}, Start Price: {start_price}, "
-              f"Current Price: {current_price}, Pip Difference: {pip_difference}, "
-              f"Thresholds: {no_of_thresholds}")
-
-        # Step 1: Place the initial trade at the 1 or -1 threshold
-        if not self.trade_placed and abs(no_of_thresholds) >= 1:
-            direction = "buy" if no_of_thresholds > 0 else "sell"
-            await self.place_initial_trade(direction, current_price)
-
-        # Step 2: Trigger hedging if price reverses to or below the 0.5 threshold after initial trade
-        elif self.trade_placed and abs(no_of_thresholds) <= 0.5 and self.hedging_entry_price is None:
-            print(
-                f"[ThresholdTradingStrategy] Reversal detected at {current_price} with Thresholds: {no_of_thresholds}. Initiating hedging.")
+              f"Current Price: {current_price}, Pip Difference: {round(current_price - start_price, 4)}, "
+              f"Thresholds: {self.core.thresholds_at(current_price)}")
+
+        if action == Action.OPEN_BUY or action == Action.OPEN_SELL:
+            await self.place_initial_trade(DIRECTIONS[action], current_price)
+        elif action == Action.HEDGE:
+            print(f"[ThresholdTradingStrategy] Reversal detected at {current_price} "
+                  f"with Thresholds: {self.core.thresholds_at(current_price)}. Initiating hedging.")
             await self.place_hedging_trades(current_price)
+        elif action == Action.CLOSE:
+            close_direction = "sell" if self.initial_direction == "buy" else "buy"
+            await self.close_trade(close_direction, current_price, "Opposite 1 threshold reached after hedging")
 
-        # Step 3: Close trade if opposite 1 threshold is reached from the hedging entry
-        elif self.hedging_entry_price is not None:
-            opposite_threshold = abs((current_price - self.hedging_entry_price) / self.symbol_config['pip_size']) / \
-                                 self.symbol_config["positive_pip_difference"]
-
-            if opposite_threshold >= 1:
-                close_direction = "sell" if self.initial_direction == "buy" else "buy"
-                await self.close_trade(close_direction, current_price, "Opposite 1 threshold reached after hedging")
+    async def trigger_trade_by_threshold(self, start_price, current_price):
+        """Core trading logic for threshold detection, hedging, and closure."""
+        if start_price != self.core.start_price:
+            self.core.set_start(start_price)
+        action = self.core.on_price(current_price)
+        if action:
+            await self.act(action, start_price, current_price)
+        elif self.verbose:
+            print(f"[ThresholdTradingStrategy] Symbol: {self.symbol_config['symbol']}, Start Price: {start_price}, "
+                  f"Current Price: {current_price}, Thresholds: {self.core.thresholds_at(current_price)}")
+
+    async def process_ticks(self, start_price, ticks):
+        """Run the threshold logic on every bid change in a batch of ticks from a TickStream."""
+        bids = ticks["bid"]
+        if not len(bids):
+            return
+        changed = bids[np.diff(bids, prepend=self.last_bid) != 0]
+        self.last_bid = float(bids[-1])
+        if self.verbose:
+            for price in changed.tolist():
+                await self.trigger_trade_by_threshold(start_price, price)
+            return
+
+        # Prices without an action never leave the synchronous core
+        core = self.core
+        if start_price != core.start_price:
+            core.set_start(start_price)
+        on_price = core.on_price
+        for price in changed.tolist():
+            action = on_price(price)
+            if action:
+                await self.act(action, start_price, price)
 
     async def monitor_price_changes(self, start_price, price_fetcher):
         """Monitor price changes using provided price fetcher."""
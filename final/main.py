@@ -1,10 +1,29 @@
+import os
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+
+# MT5_BACKEND=fake runs the bot against the fake_mt5 simulator instead of a live terminal
+if os.environ.get("MT5_BACKEND") == "fake":
+    import fake_mt5
+    fake_mt5.install_from_env()
+
 import asyncio
 from fetch_prices import PriceFetcher
 from logic import ThresholdTradingStrategy
+from tick_stream import TickStream
+from tick_dispatcher import TickDispatcher
+from order_templates import order_templates, OPEN_MAGIC
+from bar_store import bar_store
+from position_book import book
+from strategy_state import StrategyStateStore
+from mt5_gateway import gateway
 from config import symbols_config
 from utils import connect_mt5
 from scheduler import scheduler_main
 
+LATENCY_DUMP_FILE = os.environ.get("MT5_LATENCY_FILE", "mt5_latency.json")
+LATENCY_DUMP_INTERVAL = 60  # Seconds between latency histogram dumps
+STRATEGY_STATE_PATH = os.environ.get("STRATEGY_STATE_PATH", "strategy_state")
+
 
 async def connect():
     """Connects to MetaTrader5 and returns connection status."""
@@ -22,37 +41,35 @@ async def main():
     # Step 2: Initialize PriceFetcher with symbols configuration
     price_fetcher = PriceFetcher(symbols_config)
 
-    # Step 3: Fetch and continuously update prices for each symbol
-    prices = await price_fetcher.fetch_all_current_prices()
+    # Step 3: Prebuild the order templates of every configured symbol
+    await order_templates.build()
 
-    # Step 4: Initialize and start monitoring for each symbol
-    tasks = []
-    for symbol in symbols_config:
-        start_price = prices[symbol["symbol"]]["start_price"]
+    # Step 4: Bring the local M5 history up to date; start prices are read from it
+    await bar_store.sync([symbol["symbol"] for symbol in symbols_config])
+    await price_fetcher.refresh_start_prices()
 
-        # Initialize the trading strategy for this symbol
+    # Step 5: Restore every strategy's last recorded state, checked against the open positions,
+    # and subscribe it to a single tick dispatcher
+    state_store = StrategyStateStore(STRATEGY_STATE_PATH)
+    state_store.restore()
+    await book.reconcile()
+    dispatcher = TickDispatcher(TickStream([symbol["symbol"] for symbol in symbols_config]))
+    for symbol in symbols_config:
         strategy = ThresholdTradingStrategy(symbol)
+        # Only a strategy that sends real orders can be checked against the positions its orders opened
+        positions = book.positions_for(symbol["symbol"]) if strategy.live else None
+        state_store.warm_start(symbol["symbol"], strategy.core, positions, magic=OPEN_MAGIC)
+        strategy.state_store = state_store
+        dispatcher.subscribe(strategy)
 
-        # Start monitoring price changes using shared price data
-        task = asyncio.create_task(
-            strategy.monitor_price_changes(start_price, prices)
-        )
-        tasks.append(task)
-
-    # Step 5: Update current prices periodically
-    async def update_prices():
-        while True:
-            new_prices = await price_fetcher.fetch_all_current_prices()
-            prices.update(new_prices)  # Update the shared dictionary
-            await asyncio.sleep(1)  # Adjust frequency as needed
-
-    # Step 6: Run all tasks concurrently
-    await asyncio.gather(*tasks, update_prices())
+    # Step 6: Pull every symbol's ticks once per cycle and push the bid changes to the strategies
+    await dispatcher.run()
 
 
 async def combined_main():
-    """Run scheduler_main and main concurrently."""
-    await asyncio.gather(scheduler_main(), main())
+    """Run scheduler_main and main concurrently, dumping broker latency histograms in the background."""
+    await asyncio.gather(scheduler_main(), main(),
+                         gateway.dump_latency_forever(LATENCY_DUMP_FILE, LATENCY_DUMP_INTERVAL))
 
 
 # Run the combined main function
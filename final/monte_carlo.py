@@ -0,0 +1,164 @@
+# monte_carlo.py
+# Runs the threshold/hedge state machine over thousands of bootstrapped price paths per symbol, to see the
+# drawdown and loss tails a single backtest hides.
+#
+#     python monte_carlo.py    # M5 history of every configured symbol from the local bar store
+
+import hashlib
+import json
+import math
+import asyncio
+import os
+import numpy as np
+from backtest import priced_configs
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from latency_histogram import write_json
+from threshold_core import Action
+from threshold_engine import VectorThresholdEngine
+
+PERCENTILES = (1, 5, 50, 95, 99)
+
+
+class MonteCarlo:
+    """Bootstraps price paths from a symbol's stored returns and trades all of them at once with a VectorThresholdEngine."""
+
+    def __init__(self, paths=2000, days=5, steps_per_day=288, block=12, spread_points=10, hedge_trades=2,
+                 seed=0, directory="monte_carlo"):
+        """
+        Initialize the simulator.
+
+        Parameters:
+        - paths (int): Synthetic price paths per symbol.
+        - days (int): Trading days per path; the start price moves to the current price at every day.
+        - steps_per_day (int): Price steps per day; 288 matches M5 returns.
+        - block (int): Consecutive returns drawn together, keeping short-range volatility clustering.
+        - spread_points (int): Spread between the simulated bid and ask, in points.
+        - hedge_trades (int): Opposite trades opened by each hedge (ThresholdTradingStrategy opens two).
+        - seed (int): Seed of the bootstrap; the same seed and inputs reproduce the same paths.
+        - directory (str): Directory of the results cache.
+        """
+        self.paths = paths
+        self.days = days
+        self.steps_per_day = steps_per_day
+        self.block = block
+        self.spread_points = spread_points
+        self.hedge_trades = hedge_trades
+        self.seed = seed
+        self.cache_path = os.path.join(directory, "results.json")
+        self.cache = {}  # parameter hash -> report
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                self.cache = json.load(f)
+
+    def key(self, symbol_config, returns):
+        """Hash of everything a report depends on: simulator settings, seed, symbol configuration and returns."""
+        settings = [self.paths, self.days, self.steps_per_day, self.block, self.spread_points, self.hedge_trades,
+                    self.seed, symbol_config, hashlib.sha1(np.ascontiguousarray(returns).tobytes()).hexdigest()]
+        return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+    def bootstrap(self, returns, start_price):
+        """Block-bootstrapped bid paths, as a (steps, paths) array so every step is one contiguous row."""
+        steps = self.days * self.steps_per_day
+        block = min(self.block, len(returns))
+        blocks = math.ceil(steps / block)
+        rng = np.random.default_rng(self.seed)
+        starts = rng.integers(0, len(returns) - block + 1, size=(blocks, self.paths))
+        draws = returns[(starts[:, None, :] + np.arange(block)[None, :, None]).reshape(blocks * block, self.paths)[:steps]]
+        return start_price + np.cumsum(draws, axis=0)
+
+    def simulate(self, symbol_config, closes):
+        """
+        Trades bootstrapped continuations of a symbol's close prices.
+
+        Parameters:
+        - symbol_config (dict): Symbol configuration as in config.py; point is optional. Profits are in the
+          account currency when it has a lot_value (see backtest.priced_configs), and otherwise in the quote
+          currency of contract_size (100000 by default) units per lot.
+        - closes (np.ndarray): Stored close prices; their differences are the returns drawn from.
+
+        Returns:
+        - dict: Percentiles of final equity and max drawdown, loss probability, 5% expected shortfall
+          and the mean number of hedges and closes per path.
+        """
+        returns = np.diff(np.asarray(closes, dtype=np.float64))
+        key = self.key(symbol_config, returns)
+        if key in self.cache:
+            return self.cache[key]
+
+        bids = self.bootstrap(returns, float(closes[-1]))
+        spread = self.spread_points * symbol_config.get("point", symbol_config["pip_size"] / 10)
+        lot_value = symbol_config.get("lot_value", symbol_config.get("contract_size", 100000))
+        lot = symbol_config.get("lot_size", 1.0)
+        hedge_lot = lot * self.hedge_trades
+
+        engine = VectorThresholdEngine([symbol_config] * self.paths)
+        buy_volume, buy_cost, sell_volume, sell_cost, realized, peak, drawdown = np.zeros((7, self.paths))
+        hedges = np.zeros(self.paths, dtype=np.int64)
+        closes_count = np.zeros(self.paths, dtype=np.int64)
+
+        for step, bid in enumerate(bids):
+            if step % self.steps_per_day == 0:
+                engine.start[:] = bid
+            rows, actions = engine.evaluate(bid)
+            if len(rows):
+                ask = bid + spread
+                opened = rows[actions == Action.OPEN_BUY]
+                buy_volume[opened] += lot
+                buy_cost[opened] += lot * ask[opened]
+                opened = rows[actions == Action.OPEN_SELL]
+                sell_volume[opened] += lot
+                sell_cost[opened] += lot * bid[opened]
+                hedged = rows[actions == Action.HEDGE]
+                hedges[hedged] += 1
+                # Hedges open against the initial trade: sells after a buy, buys after a sell
+                against_buy = hedged[engine.direction[hedged] == Action.OPEN_BUY]
+                sell_volume[against_buy] += hedge_lot
+                sell_cost[against_buy] += hedge_lot * bid[against_buy]
+                against_sell = hedged[engine.direction[hedged] == Action.OPEN_SELL]
+                buy_volume[against_sell] += hedge_lot
+                buy_cost[against_sell] += hedge_lot * ask[against_sell]
+                closed = rows[actions == Action.CLOSE]
+                closes_count[closed] += 1
+                realized[closed] += lot_value * (buy_volume[closed] * bid[closed] - buy_cost[closed]
+                                                     + sell_cost[closed] - sell_volume[closed] * ask[closed])
+                for column in (buy_volume, buy_cost, sell_volume, sell_cost):
+                    column[closed] = 0.0
+            equity = realized + lot_value * (buy_volume * bid - buy_cost + sell_cost - sell_volume * (bid + spread))
+            np.maximum(peak, equity, out=peak)
+            np.maximum(drawdown, peak - equity, out=drawdown)
+
+        final = equity
+        worst = np.sort(final)[:max(1, len(final) // 20)]
+        report = {
+            "symbol": symbol_config["symbol"],
+            "paths": self.paths,
+            "final_equity": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(final, PERCENTILES))},
+            "max_drawdown": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, np.percentile(drawdown, PERCENTILES))},
+            "worst_drawdown": round(float(drawdown.max()), 2),
+            "loss_probability": round(float((final < 0).mean()), 4),
+            "expected_shortfall_5": round(float(worst.mean()), 2),
+            "hedges_per_path": round(float(hedges.mean()), 2),
+            "closes_per_path": round(float(closes_count.mean()), 2),
+        }
+        self.cache[key] = report
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        write_json(self.cache_path, self.cache)
+        return report
+
+    def run(self, symbols_config, closes):
+        """Reports of every symbol with stored closes (symbol name -> close prices)."""
+        return {symbol["symbol"]: self.simulate(symbol, closes[symbol["symbol"]])
+                for symbol in symbols_config if symbol["symbol"] in closes}
+
+
+if __name__ == "__main__":
+    from config import symbols_config
+    from bar_store import bar_store
+    symbols_config = asyncio.run(priced_configs(symbols_config))
+    history = {}
+    for symbol in symbols_config:
+        series = bar_store.series(symbol["symbol"])
+        if len(series) > 1:
+            history[symbol["symbol"]] = series.bars["close"]
+    for symbol_name, report in MonteCarlo().run(symbols_config, history).items():
+        print(report)
@@ -0,0 +1,170 @@
+# parameter_sweep.py
+# Backtests every combination of a parameter grid per symbol in a process pool and ranks the results.
+#
+#     python parameter_sweep.py ticks.csv    # SWEEP_GRIDS over the configured symbols, ticks from a tick file
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from backtest import Backtester, priced_configs
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from latency_histogram import write_json
+
+TICK_COLUMNS = ("time_msc", "bid", "ask")
+
+# Grid used by the command line for every configured symbol
+SWEEP_GRIDS = {"positive_pip_difference": [10, 12, 15, 17, 20, 25, 30]}
+
+
+def share_ticks(directory, symbol_name, ticks):
+    """
+    Writes the time_msc, bid and ask columns of ticks to .npy files named after their content, once.
+
+    Returns:
+    - str: Directory of the column files, which workers map read-only with load_ticks.
+    """
+    columns = {name: np.ascontiguousarray(ticks[name], dtype=np.float64 if name != "time_msc" else np.int64)
+               for name in TICK_COLUMNS}
+    digest = hashlib.sha1()
+    for name in TICK_COLUMNS:
+        digest.update(columns[name].tobytes())
+    path = os.path.join(directory, "ticks", f"{symbol_name}_{digest.hexdigest()[:16]}")
+    if not os.path.exists(os.path.join(path, f"{TICK_COLUMNS[-1]}.npy")):
+        os.makedirs(path, exist_ok=True)
+        for name in TICK_COLUMNS:
+            np.save(os.path.join(path, f"{name}.npy"), columns[name])
+    return path
+
+
+def load_ticks(path):
+    """Column name -> read-only memory map of a directory written by share_ticks; pages are shared between processes."""
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in TICK_COLUMNS}
+
+
+def grid_cells(grid):
+    """Every combination of a parameter grid, e.g. {'a': [1, 2], 'b': [3]} -> [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def cell_key(tick_path, symbol_config):
+    """Cache key of one backtest: the tick data it ran on and its complete symbol configuration."""
+    data = json.dumps([os.path.basename(tick_path), symbol_config], sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def run_cell(tick_path, symbol_config):
+    """Worker: backtests one symbol configuration over the shared ticks and returns the summary."""
+    return asyncio.run(Backtester(symbol_config).run(load_ticks(tick_path))).summary()
+
+
+class ParameterSweep:
+    """Backtests parameter grids per symbol in parallel, caching every finished cell on disk."""
+
+    def __init__(self, symbols_config, directory="sweep", max_workers=None):
+        """
+        Initialize the sweep.
+
+        Parameters:
+        - symbols_config (list): Base configuration of every symbol; grid values override its keys.
+        - directory (str): Directory for the shared tick files and the results cache.
+        - max_workers (int): Worker processes; one per CPU by default.
+        """
+        self.symbols_config = {symbol["symbol"]: symbol for symbol in symbols_config}
+        self.directory = directory
+        self.max_workers = max_workers
+        self.cache_path = os.path.join(directory, "results.json")
+        self.cache = {}  # cell key -> summary
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                self.cache = json.load(f)
+
+    def cells(self, symbol_name, grid, tick_path):
+        """
+        The cells of one symbol's grid over the ticks shared at tick_path.
+
+        Returns:
+        - list: (symbol name, swept parameters, cache key, tick path, symbol configuration) per cell.
+        """
+        cells = []
+        for parameters in grid_cells(grid):
+            symbol_config = {**self.symbols_config[symbol_name], **parameters}
+            cells.append((symbol_name, parameters, cell_key(tick_path, symbol_config), tick_path, symbol_config))
+        return cells
+
+    def compute(self, cells):
+        """
+        Backtests the cells that are not cached yet, all in one process pool, and caches their summaries.
+        A failing cell is logged and left out of the cache; every cell that finished is cached regardless.
+
+        Returns:
+        - dict: Cache key -> exception of every cell that failed.
+        """
+        pending = {cell[2]: cell for cell in cells if cell[2] not in self.cache}
+        failures = {}
+        if pending:
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                    futures = {key: pool.submit(run_cell, cell[3], cell[4]) for key, cell in pending.items()}
+                    for key, future in futures.items():
+                        try:
+                            self.cache[key] = future.result()
+                        except Exception as e:
+                            failures[key] = e
+                            logging.error(f"Backtest of {pending[key][0]} with {pending[key][1]} failed: {e!r}")
+            finally:
+                write_json(self.cache_path, self.cache)
+        return failures
+
+    def run(self, grids, ticks, rank_by="net_profit"):
+        """
+        Backtests every cell of every symbol's grid that is not cached yet.
+
+        Parameters:
+        - grids (dict): Symbol name -> parameter grid (parameter -> list of values).
+        - ticks (dict): Symbol name -> tick array with time_msc, bid and ask.
+        - rank_by (str): Summary field the table is sorted by, best first.
+
+        Returns:
+        - list: One row per cell with symbol, the swept parameters and the summary fields, best first per symbol;
+          cells whose backtest failed are left out.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        cells = []
+        for name, grid in grids.items():
+            if name in ticks:
+                cells += self.cells(name, grid, share_ticks(self.directory, name, ticks[name]))
+        self.compute(cells)
+        rows = [{"symbol": name, **parameters, **self.cache[key]}
+                for name, parameters, key, _, _ in cells if key in self.cache]
+        rows.sort(key=lambda row: (row["symbol"], rank_key(row, rank_by)))
+        return rows
+
+
+def rank_key(row, rank_by):
+    """Sort key putting the highest value of rank_by first and cells without one last."""
+    return row[rank_by] is None, -(row[rank_by] or 0)
+
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0])
+    print("  ".join(columns))
+    for row in rows:
+        print("  ".join(str(row[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    from config import symbols_config
+    from fake_mt5.simulator import load_tick_file
+    symbols_config = asyncio.run(priced_configs(symbols_config))
+    recorded = load_tick_file(sys.argv[1])
+    sweep = ParameterSweep(symbols_config)
+    print_table(sweep.run({symbol["symbol"]: SWEEP_GRIDS for symbol in symbols_config}, recorded))
@@ -3,6 +3,10 @@ import logging
 import asyncio
 from datetime import datetime, timedelta
 import pytz
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from symbol_registry import registry
+from start_price_store import start_prices
 
 from notifications import send_discord_message_async  # Ensure this function is asynchronous
 
@@ -13,13 +17,12 @@ async def log_error_and_notify(message):
 async def fetch_current_price(symbol):
     symbol_name = symbol["symbol"]
     # Ensure the symbol is available in Market Watch
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
         return None
 
     # Fetch current price
-    tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+    tick = await gateway.symbol_info_tick(symbol_name)
     if tick:
         return tick.bid  # or tick.ask depending on your logic
     else:
@@ -36,7 +39,7 @@ async def fetch_friday_closing_price(symbol):
     last_friday = last_friday.replace(hour=23, minute=59, second=59, microsecond=0)
     utc_from = last_friday.astimezone(pytz.utc)
 
-    rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
+    rates = await gateway.copy_rates_from(symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
     if rates is not None and len(rates) > 0:
         closing_price = rates[0]['close']
         print(f"Fetched last Friday's closing price for {symbol_name}: {closing_price}")
@@ -50,27 +53,20 @@ async def fetch_price(symbol, price_type):
     symbol_name = symbol["symbol"]
 
     # Ensure the symbol is selected in Market Watch
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-    if not selected:
+    if await registry.ensure(symbol_name) is None:
         await log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching {price_type} price.")
         return None
 
     if price_type == "current":
-        tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+        tick = await gateway.symbol_info_tick(symbol_name)
         if tick:
             return tick.bid  # or tick.ask depending on requirements
 
     elif price_type == "start":
-        timezone = pytz.timezone('Asia/Kolkata')
-        now = datetime.now(timezone)
-        if now.weekday() == 0:  # Monday
-            return await fetch_friday_closing_price(symbol)
-
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        start_of_day_utc = start_of_day.astimezone(pytz.utc)
-        rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
-        if rates is not None and len(rates) > 0:
-            return rates[0]["close"]
+        # Mondays and days after a holiday start from the last trading day's close, see TradingCalendar
+        start_price = await start_prices.start_price(symbol_name)
+        if start_price is not None:
+            return start_price
 
     await log_error_and_notify(f"Failed to get {price_type} price for {symbol_name}")
     return None
@@ -133,7 +129,7 @@ async def get_open_positions_scheduler(symbol):
     open_positions = {"positions_exist": False, "no_of_positions": 0}  # Set default values
 
     # Attempt to get open positions for the symbol
-    positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol_name)
+    positions = await gateway.positions_get(symbol=symbol_name)
 
     if positions is None:
         # Notify if there are no positions or an error occurred
@@ -0,0 +1,153 @@
+# strategy_state.py
+
+import logging
+import math
+import os
+import numpy as np
+from threshold_core import Action
+
+POSITION_TYPE_BUY = 0  # MetaTrader5.POSITION_TYPE_BUY
+
+# One strategy's state after a transition; both the snapshot and the journal are arrays of these records
+STATE_DTYPE = np.dtype([
+    ("symbol", "U16"),
+    ("sequence", "<u8"),  # Increases with every record written, across all symbols
+    ("trade_placed", "?"),
+    ("direction", "i1"),  # Action.OPEN_BUY, Action.OPEN_SELL or Action.NONE
+    ("hedging_entry", "<f8"),  # nan while not hedged
+])
+
+
+def _read_records(path):
+    """Whole records of a state file; a record cut short by a crash is ignored."""
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=STATE_DTYPE)
+    count = os.path.getsize(path) // STATE_DTYPE.itemsize
+    return np.fromfile(path, dtype=STATE_DTYPE, count=count)
+
+
+class StrategyStateStore:
+    """
+    Crash-safe ThresholdCore state per symbol: every transition is appended to a journal and fsynced,
+    and every compact_every records the journal is folded into a snapshot and started afresh.
+    """
+
+    def __init__(self, path="strategy_state", compact_every=256):
+        """
+        Initialize the store.
+
+        Parameters:
+        - path (str): Path prefix of the .snapshot and .journal files.
+        - compact_every (int): Journal records after which a new snapshot is written.
+        """
+        self.snapshot_path = f"{path}.snapshot"
+        self.journal_path = f"{path}.journal"
+        self.compact_every = compact_every
+        self.states = {}  # symbol name -> STATE_DTYPE record (np.void)
+        self.sequence = 0
+        self.journal = None
+        self.journaled = 0  # Records in the current journal
+
+    def restore(self):
+        """
+        Loads the snapshot and replays the journal records written after it.
+
+        Returns:
+        - dict: symbol name -> restored STATE_DTYPE record.
+        """
+        snapshot = _read_records(self.snapshot_path)
+        journal = _read_records(self.journal_path)
+        self.states = {str(record["symbol"]): record for record in snapshot}
+        snapshot_sequence = int(snapshot["sequence"].max()) if len(snapshot) else 0
+        # Records up to the snapshot's sequence are already in it (the process died before truncating the journal)
+        for record in journal[journal["sequence"] > snapshot_sequence]:
+            self.states[str(record["symbol"])] = record
+        self.sequence = max(snapshot_sequence, int(journal["sequence"].max()) if len(journal) else 0)
+        self.close()
+        self.journal = open(self.journal_path, "ab")
+        self.journal.truncate(len(journal) * STATE_DTYPE.itemsize)  # Drop a torn last record
+        self.journaled = len(journal)
+        return dict(self.states)
+
+    def record(self, symbol_name, core):
+        """Appends the state of a core to the journal and makes it durable before returning."""
+        if self.journal is None:
+            self.restore()
+        self.sequence += 1
+        hedging_entry = core.hedging_entry_price if core.hedging_entry_price is not None else math.nan
+        record = np.array([(symbol_name, self.sequence, core.trade_placed, core.direction, hedging_entry)],
+                          dtype=STATE_DTYPE)
+        self.journal.write(record.tobytes())
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.states[symbol_name] = record[0]
+        self.journaled += 1
+        if self.journaled >= self.compact_every:
+            self.compact()
+
+    def close(self):
+        """Closes the journal; a later record() restores the store again first."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def compact(self):
+        """Writes every symbol's latest state as the new snapshot, then empties the journal."""
+        temp_path = f"{self.snapshot_path}.tmp"
+        snapshot = np.array(list(self.states.values()), dtype=STATE_DTYPE)
+        with open(temp_path, "wb") as f:
+            f.write(snapshot.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.journal.truncate(0)
+        self.journaled = 0
+
+    def warm_start(self, symbol_name, core, positions, magic=None):
+        """
+        Restores a core from its last recorded state and reconciles it with the open positions it placed.
+
+        - Recorded as trading but none of its positions are open: they were closed while the bot was down;
+          start fresh.
+        - Recorded as idle but its positions are open: the process died between an order and its record; adopt
+          the oldest position's side as the initial trade, and the oldest opposite position as the hedge.
+
+        Parameters:
+        - positions (list): The symbol's open positions (ticket, type, price_open, magic), e.g. from
+          book.positions_for. None restores the recorded state as is, as for a strategy that sends no real
+          orders and so never has positions to check against.
+        - magic (int): Magic number of the strategy's orders; positions with any other magic (manual trades,
+          other bots) are ignored. Every position counts when None.
+
+        Returns:
+        - bool: True when the positions contradicted the recorded state and the core was corrected.
+        """
+        record = self.states.get(symbol_name)
+        if record is not None:
+            core.trade_placed = bool(record["trade_placed"])
+            core.direction = Action(int(record["direction"]))
+            hedging_entry = float(record["hedging_entry"])
+            core.hedging_entry_price = None if math.isnan(hedging_entry) else hedging_entry
+
+        if positions is not None and magic is not None:
+            positions = [position for position in positions if position.magic == magic]
+        corrected = False
+        if positions is not None and core.trade_placed and not positions:
+            logging.warning(f"{symbol_name}: recorded trade is no longer open; resetting strategy state")
+            core.trade_placed = False
+            core.hedging_entry_price = None
+            corrected = True
+        elif positions and not core.trade_placed:
+            ordered = sorted(positions, key=lambda position: position.ticket)
+            initial = ordered[0]
+            core.trade_placed = True
+            core.direction = Action.OPEN_BUY if initial.type == POSITION_TYPE_BUY else Action.OPEN_SELL
+            hedges = [position for position in ordered if position.type != initial.type]
+            core.hedging_entry_price = float(hedges[0].price_open) if hedges else None
+            logging.warning(f"{symbol_name}: adopting {len(positions)} open position(s) missing from the recorded state")
+            corrected = True
+
+        core.build_ladder()
+        if corrected:
+            self.record(symbol_name, core)
+        return corrected
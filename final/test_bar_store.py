@@ -0,0 +1,56 @@
+# test_bar_store.py
+
+import os
+import numpy as np
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+import fake_mt5
+
+fake_mt5.install()  # Before anything imports MetaTrader5
+
+import MetaTrader5 as mt5
+from bar_store import BAR_DTYPE, BarSeries
+
+START = 1_790_000_100  # A five-minute boundary
+
+
+def rates(count, first=START):
+    bars = np.zeros(count, dtype=BAR_DTYPE)
+    bars["time"] = first + 300 * np.arange(count)
+    bars["close"] = 1.1 + 0.0001 * np.arange(count)
+    return bars
+
+
+def test_append_skips_bars_already_stored(tmp_path):
+    series = BarSeries(tmp_path, "EURUSD", mt5.TIMEFRAME_M5)
+    assert series.append(rates(3)) == 3
+    assert series.append(rates(5)) == 2
+    assert len(series) == 5
+    assert list(series.range(START + 300, START + 900)["time"]) == [START + 300, START + 600, START + 900]
+    assert series.close_at(START + 310) == series.bars["close"][1]
+    assert series.close_at(START + 1200) is None  # The newest bar may still be open
+
+
+def test_repair_drops_bars_without_an_index_entry(tmp_path):
+    series = BarSeries(tmp_path, "EURUSD", mt5.TIMEFRAME_M5)
+    series.append(rates(3))
+    # A crash between writing the bars and their index leaves two whole bars and a partial one behind
+    with open(series.bars_path, "ab") as f:
+        f.write(rates(2, START + 900).tobytes() + b"\0" * (BAR_DTYPE.itemsize // 2))
+
+    reopened = BarSeries(tmp_path, "EURUSD", mt5.TIMEFRAME_M5)
+    assert len(reopened) == 3
+    assert os.path.getsize(reopened.bars_path) == 3 * BAR_DTYPE.itemsize
+    assert reopened.append(rates(5)) == 2
+    assert list(reopened.bars["time"]) == list(rates(5)["time"])
+
+
+def test_repair_cuts_a_torn_index(tmp_path):
+    series = BarSeries(tmp_path, "EURUSD", mt5.TIMEFRAME_M5)
+    series.append(rates(3))
+    with open(series.index_path, "ab") as f:
+        f.write(b"\1\2\3")
+
+    reopened = BarSeries(tmp_path, "EURUSD", mt5.TIMEFRAME_M5)
+    assert len(reopened) == 3
+    assert os.path.getsize(reopened.index_path) == 3 * 8
+    assert reopened.last_time() == START + 600
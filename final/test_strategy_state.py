@@ -0,0 +1,135 @@
+# test_strategy_state.py
+
+import math
+import os
+from types import SimpleNamespace
+from strategy_state import STATE_DTYPE, POSITION_TYPE_BUY, StrategyStateStore
+from threshold_core import Action, ThresholdCore
+
+POSITION_TYPE_SELL = 1
+
+
+def core_at(trade_placed=False, direction=Action.NONE, hedging_entry_price=None):
+    core = ThresholdCore(0.0001, 15, 1.1)
+    core.trade_placed = trade_placed
+    core.direction = direction
+    core.hedging_entry_price = hedging_entry_price
+    return core
+
+
+def state_of(record):
+    hedging_entry = float(record["hedging_entry"])
+    hedging_entry = None if math.isnan(hedging_entry) else hedging_entry
+    return bool(record["trade_placed"]), int(record["direction"]), hedging_entry
+
+
+def test_restore_returns_the_last_record_per_symbol(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY))
+    store.record("GBPUSD", core_at(True, Action.OPEN_SELL))
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY, 1.1012))
+    store.close()
+
+    restored = StrategyStateStore(tmp_path / "state").restore()
+    assert state_of(restored["EURUSD"]) == (True, Action.OPEN_BUY, 1.1012)
+    assert state_of(restored["GBPUSD"]) == (True, Action.OPEN_SELL, None)
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    store = StrategyStateStore(tmp_path / "state", compact_every=3)
+    for entry in (1.10, 1.11, 1.12, 1.13, 1.14):
+        store.record("EURUSD", core_at(True, Action.OPEN_BUY, entry))
+    store.close()
+    assert os.path.getsize(store.journal_path) == 2 * STATE_DTYPE.itemsize
+    assert os.path.getsize(store.snapshot_path) == STATE_DTYPE.itemsize
+
+    restarted = StrategyStateStore(tmp_path / "state", compact_every=3)
+    assert state_of(restarted.restore()["EURUSD"]) == (True, Action.OPEN_BUY, 1.14)
+    assert restarted.sequence == 5
+
+
+def test_journal_left_over_from_a_compaction_is_not_replayed(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY))
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY, 1.1012))
+    store.journal.flush()
+    stale_journal = open(store.journal_path, "rb").read()
+    store.compact()
+    store.record("GBPUSD", core_at(True, Action.OPEN_SELL))
+    store.close()
+    fresh_journal = open(store.journal_path, "rb").read()
+    # A crash between replacing the snapshot and truncating the journal leaves the old records behind
+    with open(store.journal_path, "wb") as f:
+        f.write(stale_journal + fresh_journal)
+
+    restarted = StrategyStateStore(tmp_path / "state")
+    restored = restarted.restore()
+    assert state_of(restored["EURUSD"]) == (True, Action.OPEN_BUY, 1.1012)
+    assert state_of(restored["GBPUSD"]) == (True, Action.OPEN_SELL, None)
+    assert restarted.sequence == 3
+
+
+def test_torn_last_record_is_dropped_and_truncated(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY))
+    store.close()
+    with open(store.journal_path, "ab") as f:
+        f.write(b"\x01" * (STATE_DTYPE.itemsize // 2))  # The process died halfway through a record
+
+    restarted = StrategyStateStore(tmp_path / "state")
+    assert state_of(restarted.restore()["EURUSD"]) == (True, Action.OPEN_BUY, None)
+    assert os.path.getsize(store.journal_path) == STATE_DTYPE.itemsize
+    restarted.record("EURUSD", core_at(True, Action.OPEN_BUY, 1.1012))
+    restarted.close()
+
+    assert state_of(StrategyStateStore(tmp_path / "state").restore()["EURUSD"]) == (True, Action.OPEN_BUY, 1.1012)
+
+
+def test_restore_without_files_is_empty(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    assert store.restore() == {}
+    assert store.sequence == 0
+    store.close()
+
+
+def position(ticket, type, price_open, magic=234000):
+    return SimpleNamespace(ticket=ticket, type=type, price_open=price_open, magic=magic)
+
+
+def test_warm_start_resets_a_trade_closed_while_down(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_BUY, 1.1012))
+    core = core_at()
+    assert store.warm_start("EURUSD", core, [], magic=234000)
+    assert not core.trade_placed and core.hedging_entry_price is None
+    store.close()
+
+
+def test_warm_start_adopts_untracked_positions(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    core = core_at()
+    positions = [position(12, POSITION_TYPE_SELL, 1.1005), position(11, POSITION_TYPE_BUY, 1.1015),
+                 position(10, POSITION_TYPE_SELL, 1.2, magic=0)]  # A manual trade, not the strategy's
+    assert store.warm_start("EURUSD", core, positions, magic=234000)
+    assert core.trade_placed and core.direction == Action.OPEN_BUY
+    assert core.hedging_entry_price == 1.1005
+    assert state_of(store.states["EURUSD"]) == (True, Action.OPEN_BUY, 1.1005)
+    store.close()
+
+
+def test_warm_start_ignores_other_magic_numbers(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_SELL))
+    core = core_at()
+    assert store.warm_start("EURUSD", core, [position(10, POSITION_TYPE_SELL, 1.1, magic=0)], magic=234000)
+    assert not core.trade_placed
+    store.close()
+
+
+def test_warm_start_without_positions_keeps_the_recorded_state(tmp_path):
+    store = StrategyStateStore(tmp_path / "state")
+    store.record("EURUSD", core_at(True, Action.OPEN_SELL, 1.0995))
+    core = core_at()
+    assert not store.warm_start("EURUSD", core, None)
+    assert (core.trade_placed, core.direction, core.hedging_entry_price) == (True, Action.OPEN_SELL, 1.0995)
+    store.close()
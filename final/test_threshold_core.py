@@ -0,0 +1,116 @@
+# test_threshold_core.py
+
+import random
+import numpy as np
+import pytest
+from threshold_core import Action, ThresholdCore
+from threshold_engine import VectorThresholdEngine
+
+PIP_SIZE = 0.0001
+THRESHOLD_PIPS = 15
+POINT = 0.00001
+
+
+class LegacyStrategy:
+    """The branching of ThresholdTradingStrategy.trigger_trade_by_threshold before ThresholdCore existed."""
+
+    def __init__(self, pip_size, threshold_pips):
+        self.pip_size = pip_size
+        self.threshold_pips = threshold_pips
+        self.trade_placed = False
+        self.hedging_entry_price = None
+
+    def step(self, start_price, current_price):
+        no_of_thresholds = round((current_price - start_price) / self.pip_size / self.threshold_pips, 2)
+        if not self.trade_placed and abs(no_of_thresholds) >= 1:
+            self.trade_placed = True
+            return Action.OPEN_BUY if no_of_thresholds > 0 else Action.OPEN_SELL
+        elif self.trade_placed and abs(no_of_thresholds) <= 0.5 and self.hedging_entry_price is None:
+            self.hedging_entry_price = current_price
+            return Action.HEDGE
+        elif self.hedging_entry_price is not None:
+            opposite_threshold = abs((current_price - self.hedging_entry_price) / self.pip_size) / self.threshold_pips
+            if opposite_threshold >= 1:
+                self.trade_placed = False
+                self.hedging_entry_price = None
+                return Action.CLOSE
+        return Action.NONE
+
+
+def random_walk(seed, count=20000, start=1.1, step_points=8):
+    """Prices on the symbol's point grid, wandering a few thresholds either side of start and back."""
+    rng = random.Random(seed)
+    points = 0
+    prices = []
+    for _ in range(count):
+        points += rng.randint(-step_points, step_points) - round(points * 0.002)
+        prices.append(round(start + points * POINT, 5))
+    return prices
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_core_matches_legacy_branching(seed):
+    start = 1.1
+    core = ThresholdCore(PIP_SIZE, THRESHOLD_PIPS, start)
+    legacy = LegacyStrategy(PIP_SIZE, THRESHOLD_PIPS)
+    actions = []
+    for price in random_walk(seed, start=start):
+        action = core.on_price(price)
+        assert action == legacy.step(start, price), price
+        actions.append(action)
+    # The walk has to exercise every transition for the comparison to mean anything
+    assert {Action.HEDGE, Action.CLOSE} <= set(actions)
+    assert {Action.OPEN_BUY, Action.OPEN_SELL} & set(actions)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ladder_matches_full_evaluation(seed):
+    start = 1.1
+    laddered = ThresholdCore(PIP_SIZE, THRESHOLD_PIPS, start)
+    plain = ThresholdCore(PIP_SIZE, THRESHOLD_PIPS, start)
+    for price in random_walk(seed, start=start, step_points=3):
+        assert laddered.on_price(price) == plain.evaluate(price), price
+        assert laddered.hedging_entry_price == plain.hedging_entry_price
+
+
+def test_hedge_and_close_around_the_levels():
+    start = 1.1
+    core = ThresholdCore(PIP_SIZE, THRESHOLD_PIPS, start)
+    assert core.on_price(start) == Action.NONE
+    assert core.on_price(start + core.threshold_distance) == Action.OPEN_BUY
+    assert core.on_price(start + core.hedge_distance + POINT) == Action.NONE
+    hedge_price = start + core.hedge_distance - POINT
+    assert core.on_price(hedge_price) == Action.HEDGE
+    assert core.on_price(hedge_price + core.threshold_distance) == Action.CLOSE
+    assert not core.trade_placed and core.hedging_entry_price is None
+
+
+def test_no_action_without_start_price():
+    core = ThresholdCore(PIP_SIZE, THRESHOLD_PIPS)
+    assert core.levels == []
+    assert all(core.on_price(price) == Action.NONE for price in random_walk(0, count=1000))
+    core.set_start(1.1)
+    assert core.on_price(1.1 + core.threshold_distance) == Action.OPEN_BUY
+
+
+def test_engine_matches_cores():
+    symbols = [
+        {"symbol": "EURUSD", "pip_size": 0.0001, "positive_pip_difference": 15},
+        {"symbol": "USDJPY", "pip_size": 0.01, "positive_pip_difference": 20},
+        {"symbol": "GBPUSD", "pip_size": 0.0001, "positive_pip_difference": 10},
+    ]
+    starts = {"EURUSD": 1.1, "USDJPY": 150.0, "GBPUSD": 1.3}
+    engine = VectorThresholdEngine(symbols)
+    engine.set_starts(starts)
+    cores = [ThresholdCore(s["pip_size"], s["positive_pip_difference"], starts[s["symbol"]]) for s in symbols]
+    rng = random.Random(7)
+    walks = [random_walk(1, start=1.1), [round(150.0 + (p - 1.1) * 1000, 3) for p in random_walk(2, start=1.1)],
+             random_walk(3, start=1.3)]
+    for step in range(len(walks[0])):
+        prices = np.array([walk[step] for walk in walks])
+        prices[rng.randrange(len(prices))] = np.nan  # Some symbols have no price in a snapshot
+        rows, actions = engine.evaluate(prices)
+        acted = dict(zip(rows.tolist(), actions.tolist()))
+        for row, core in enumerate(cores):
+            expected = Action.NONE if np.isnan(prices[row]) else core.on_price(float(prices[row]))
+            assert acted.get(row, Action.NONE) == expected
@@ -0,0 +1,77 @@
+# test_tick_stream.py
+
+import asyncio
+import time
+import numpy as np
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+import fake_mt5
+from fake_mt5.simulator import Simulator, TICK_DTYPE, generate_ticks
+
+fake_mt5.install()  # Before anything imports MetaTrader5
+
+from tick_stream import MAX_COUNT_GROWTH, TickCursor, TickStream
+
+
+def ticks_at(*times_msc):
+    ticks = np.zeros(len(times_msc), dtype=TICK_DTYPE)
+    ticks["time_msc"] = times_msc
+    ticks["time"] = np.array(times_msc) // 1000
+    ticks["bid"] = 1.1 + 0.00001 * np.arange(len(times_msc))
+    return ticks
+
+
+def test_cursor_drops_ticks_delivered_before():
+    cursor = TickCursor(1000)
+    assert list(cursor.new_ticks(ticks_at(1000, 1500, 1500))["time_msc"]) == [1000, 1500, 1500]
+    # The next pull restarts at the whole second and repeats everything seen so far
+    fresh = cursor.new_ticks(ticks_at(1000, 1500, 1500, 1500, 1700))
+    assert list(fresh["time_msc"]) == [1500, 1700]
+    assert (cursor.time_msc, cursor.seen_at_time) == (1700, 1)
+    assert len(cursor.new_ticks(ticks_at(1000, 1500, 1500, 1500, 1700))) == 0
+
+
+def test_cursor_counts_ticks_sharing_its_millisecond():
+    cursor = TickCursor(2000)
+    cursor.new_ticks(ticks_at(2000, 2000))
+    assert cursor.seen_at_time == 2
+    fresh = cursor.new_ticks(ticks_at(2000, 2000, 2000))
+    assert len(fresh) == 1 and cursor.seen_at_time == 3
+
+
+def pull_all(stream, limit=200):
+    """Pulls until the stream is no longer backlogged; returns the delivered ticks and the number of pulls."""
+    async def main():
+        delivered = []
+        for pulls in range(1, limit + 1):
+            delivered.extend(ticks for _, ticks in await stream.pull())
+            if not stream.backlogged:
+                return np.concatenate(delivered) if delivered else ticks_at(), pulls
+        raise AssertionError("stream never caught up")
+
+    return asyncio.run(main())
+
+
+def test_stream_gets_through_seconds_busier_than_max_ticks():
+    start = (int(time.time()) - 30) * 1000
+    source = generate_ticks({"EURUSD": (1.1, 0.00001)}, start, 20, ticks_per_second=200)["EURUSD"]
+    fake_mt5.install(Simulator({"EURUSD": source}, start_msc=start + 25000))
+    stream = TickStream(["EURUSD"], max_ticks=50)
+    stream.cursors["EURUSD"] = TickCursor(start - 1)
+
+    delivered, pulls = pull_all(stream)
+    assert len(delivered) == len(source)
+    assert (np.diff(delivered["time_msc"]) >= 0).all()
+    assert stream.counts == {}  # Back to max_ticks once caught up
+
+
+def test_stream_stuck_at_the_count_ceiling_stops_spinning():
+    start = (int(time.time()) - 30) * 1000
+    busy = ticks_at(*[start] * 400)  # One millisecond with more ticks than the stream may ever request
+    fake_mt5.install(Simulator({"EURUSD": busy}, start_msc=start + 1000))
+    stream = TickStream(["EURUSD"], max_ticks=2)
+    stream.cursors["EURUSD"] = TickCursor(start - 1)
+
+    delivered, pulls = pull_all(stream)
+    assert stream.counts["EURUSD"] == 2 * MAX_COUNT_GROWTH
+    assert len(delivered) == 2 * MAX_COUNT_GROWTH
+    assert pulls <= 2 * MAX_COUNT_GROWTH.bit_length()  # A pull to find it stuck and one with the doubled count
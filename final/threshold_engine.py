@@ -0,0 +1,82 @@
+# threshold_engine.py
+
+import numpy as np
+from threshold_core import Action
+
+
+class VectorThresholdEngine:
+    """
+    ThresholdCore for every symbol at once: start prices, threshold distances and state flags live in
+    NumPy arrays, and a whole snapshot of prices is evaluated in one vectorized pass.
+
+    The transitions and float arithmetic are ThresholdCore's, so an engine and a set of cores fed the same
+    prices agree on every action. Strategies can therefore keep their own cores and be handed only the
+    prices the engine reports as acting.
+    """
+
+    def __init__(self, symbols_config):
+        """
+        Initialize the engine.
+
+        Parameters:
+        - symbols_config (list): Symbol dicts with symbol, pip_size and positive_pip_difference; row i of
+          every array belongs to symbols_config[i].
+        """
+        self.names = [symbol["symbol"] for symbol in symbols_config]
+        self.index = {name: row for row, name in enumerate(self.names)}
+        pip_size = np.array([symbol["pip_size"] for symbol in symbols_config], dtype=np.float64)
+        threshold_pips = np.array([symbol["positive_pip_difference"] for symbol in symbols_config], dtype=np.float64)
+        self.threshold_distance = pip_size * threshold_pips
+        self.open_distance = 0.995 * self.threshold_distance
+        self.hedge_distance = 0.505 * self.threshold_distance
+        count = len(self.names)
+        self.start = np.full(count, np.nan)
+        self.trade_placed = np.zeros(count, dtype=bool)
+        self.direction = np.zeros(count, dtype=np.int8)  # Action.OPEN_BUY or OPEN_SELL once a trade is placed
+        self.hedging_entry = np.full(count, np.nan)  # nan while not hedged
+        self.actions = np.zeros(count, dtype=np.int8)  # Scratch row of the last evaluation
+
+    def set_start(self, symbol_name, start_price):
+        """Moves the thresholds of one symbol to a new start price."""
+        self.start[self.index[symbol_name]] = start_price
+
+    def set_starts(self, start_prices):
+        """Sets the start prices of several symbols from a symbol name -> price dict."""
+        for name, price in start_prices.items():
+            self.start[self.index[name]] = price
+
+    def evaluate(self, prices):
+        """
+        Advances every symbol by one price.
+
+        Parameters:
+        - prices (np.ndarray): One float64 price per symbol; nan for symbols without a price this time.
+
+        Returns:
+        - tuple: (rows, actions), the rows whose state changed and the Action each of them took.
+        """
+        difference = prices - self.start
+        distance = np.abs(difference)
+        hedged = ~np.isnan(self.hedging_entry)
+        waiting = ~self.trade_placed
+
+        actions = self.actions
+        actions[:] = Action.NONE
+        actions[waiting & (difference >= self.open_distance)] = Action.OPEN_BUY
+        actions[waiting & (difference <= -self.open_distance)] = Action.OPEN_SELL
+        actions[self.trade_placed & ~hedged & (distance < self.hedge_distance)] = Action.HEDGE
+        actions[hedged & (np.abs(prices - self.hedging_entry) >= self.threshold_distance)] = Action.CLOSE
+
+        rows = np.flatnonzero(actions)
+        if len(rows):
+            taken = actions[rows]
+            opened = rows[(taken == Action.OPEN_BUY) | (taken == Action.OPEN_SELL)]
+            self.trade_placed[opened] = True
+            self.direction[opened] = actions[opened]
+            hedging = rows[taken == Action.HEDGE]
+            self.hedging_entry[hedging] = prices[hedging]
+            closed = rows[taken == Action.CLOSE]
+            self.trade_placed[closed] = False
+            self.hedging_entry[closed] = np.nan
+            return rows, taken
+        return rows, actions[rows]
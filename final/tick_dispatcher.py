@@ -0,0 +1,93 @@
+# tick_dispatcher.py
+
+import asyncio
+import logging
+import time
+import numpy as np
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from latency_histogram import LatencyHistogram
+from start_price_store import start_prices
+
+
+class TickDispatcher:
+    """
+    The only reader of prices: pulls every symbol's new ticks once per cycle from a TickStream and pushes
+    the bid changes to the strategies subscribed to that symbol, so strategies never poll.
+
+    Dispatch lag, from the start of the pull that returned a batch to the moment the batch is handed to the
+    strategies, is kept in a latency histogram per symbol. Both ends are local monotonic times: time_msc is
+    the trade server's wall clock, whose time zone differs from UTC by broker.
+    """
+
+    def __init__(self, tick_stream, report_interval=60):
+        """
+        Initialize the dispatcher.
+
+        Parameters:
+        - tick_stream (TickStream): Stream over every symbol any strategy may subscribe to.
+        - report_interval (float): Seconds between dispatch lag summaries in the log.
+        """
+        self.tick_stream = tick_stream
+        self.report_interval = report_interval
+        self.subscribers = {}  # symbol name -> strategies with symbol_config and process_ticks(start_price, ticks)
+        self.last_bid = {}  # symbol name -> last bid pushed
+        self.lag = {}  # symbol name -> LatencyHistogram of dispatch lag
+        self.cycles = 0
+        self.dispatched = 0  # Ticks pushed to strategies
+
+    def subscribe(self, strategy):
+        """Delivers the ticks of strategy.symbol_config's symbol to strategy.process_ticks from now on."""
+        self.subscribers.setdefault(strategy.symbol_config["symbol"], []).append(strategy)
+
+    def changed(self, symbol_name, ticks):
+        """The ticks whose bid differs from the one before it, the first compared with the last bid pushed."""
+        bids = ticks["bid"]
+        changed = ticks[np.diff(bids, prepend=self.last_bid.get(symbol_name, np.nan)) != 0]
+        if len(changed):
+            self.last_bid[symbol_name] = float(bids[-1])
+        return changed
+
+    async def dispatch(self, batches, pulled_at=None):
+        """
+        Pushes one pull's batches to their subscribers.
+
+        Parameters:
+        - batches (list): (symbol name, ticks) pairs from TickStream.pull().
+        - pulled_at (float): time.monotonic() when the pull started; now by default.
+        """
+        if pulled_at is None:
+            pulled_at = time.monotonic()
+        known = await start_prices.ensure(list(self.subscribers))
+        for symbol_name, ticks in batches:
+            strategies = self.subscribers.get(symbol_name)
+            start_price = known.get(symbol_name)
+            if not strategies or start_price is None:
+                continue
+            ticks = self.changed(symbol_name, ticks)
+            if not len(ticks):
+                continue
+            self.lag.setdefault(symbol_name, LatencyHistogram()).record(time.monotonic() - pulled_at)
+            self.dispatched += len(ticks)
+            for strategy in strategies:
+                await strategy.process_ticks(start_price, ticks)
+
+    def stats(self):
+        """Cycle and tick counts, and dispatch lag in milliseconds per symbol."""
+        lag = {name: histogram.summary() for name, histogram in self.lag.items()}
+        return {"cycles": self.cycles, "dispatched": self.dispatched, "lag": lag}
+
+    async def run(self):
+        """Pulls and dispatches forever, sleeping whenever the stream is not backlogged."""
+        stream = self.tick_stream
+        next_report = time.monotonic() + self.report_interval
+        while True:
+            if len(stream.cursors) < len(stream.symbol_names):
+                await stream.start()
+            pulled_at = time.monotonic()
+            await self.dispatch(await stream.pull(), pulled_at)
+            self.cycles += 1
+            if time.monotonic() >= next_report:
+                next_report = time.monotonic() + self.report_interval
+                logging.info(f"Tick dispatch: {self.stats()}")
+            if not stream.backlogged:
+                await asyncio.sleep(stream.poll_interval)
@@ -0,0 +1,114 @@
+# tick_stream.py
+
+import MetaTrader5 as mt5
+import asyncio
+import logging
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+
+MAX_COUNT_GROWTH = 64  # A symbol stuck inside one busy second has its count raised up to this multiple of max_ticks
+
+
+class TickCursor:
+    """Remembers the last tick delivered for a symbol so the next pull starts right after it."""
+
+    __slots__ = ("time_msc", "seen_at_time")
+
+    def __init__(self, time_msc):
+        self.time_msc = time_msc
+        self.seen_at_time = 0  # Ticks already delivered that share the cursor's millisecond
+
+    def new_ticks(self, ticks):
+        """Drops ticks delivered by an earlier pull and advances the cursor past the rest."""
+        times = ticks["time_msc"]
+        start = int(times.searchsorted(self.time_msc, side="left"))
+        at_cursor = int(times.searchsorted(self.time_msc, side="right")) - start
+        start += min(self.seen_at_time, at_cursor)
+        fresh = ticks[start:]
+        if len(fresh):
+            last_time = int(fresh["time_msc"][-1])
+            same_time = len(fresh) - int(fresh["time_msc"].searchsorted(last_time, side="left"))
+            if last_time == self.time_msc:
+                self.seen_at_time += same_time
+            else:
+                self.time_msc = last_time
+                self.seen_at_time = same_time
+        return fresh
+
+
+class TickStream:
+    """Pulls every tick since the previous call with copy_ticks_from, for all symbols at once."""
+
+    def __init__(self, symbol_names, poll_interval=0.25, max_ticks=10000, flags=mt5.COPY_TICKS_INFO):
+        """
+        Initialize the tick stream.
+
+        Parameters:
+        - symbol_names (list): Symbols to stream.
+        - poll_interval (float): Seconds to wait between pulls when nothing is backlogged.
+        - max_ticks (int): Maximum ticks requested per symbol per pull.
+        - flags (int): copy_ticks_from flags; COPY_TICKS_INFO streams bid/ask changes.
+        """
+        self.symbol_names = list(symbol_names)
+        self.poll_interval = poll_interval
+        self.max_ticks = max_ticks
+        self.flags = flags
+        self.cursors = {}  # symbol name -> TickCursor
+        self.counts = {}  # symbol name -> ticks requested per pull, when raised above max_ticks
+        self.backlogged = False  # True when the last pull hit its count for some symbol and should be repeated now
+
+    async def start(self):
+        """Places the cursor of every symbol without one on its latest tick, in one gateway round trip."""
+        names = [name for name in self.symbol_names if name not in self.cursors]
+        ticks = await gateway.call_many([("symbol_info_tick", (name,), {}) for name in names])
+        for name, tick in zip(names, ticks):
+            if tick is None:
+                logging.error(f"Failed to get tick information for {name}; will retry on the next pull")
+                continue
+            self.cursors[name] = TickCursor(tick.time_msc)
+
+    async def pull(self):
+        """
+        Fetches the ticks that arrived since the previous pull.
+
+        Returns:
+        - list: (symbol name, ticks) pairs for the symbols that have new ticks, where ticks
+          is the NumPy structured array returned by copy_ticks_from.
+        """
+        names = [name for name in self.symbol_names if name in self.cursors]
+        counts = [self.counts.get(name, self.max_ticks) for name in names]
+        calls = [("copy_ticks_from", (name, self.cursors[name].time_msc // 1000, count, self.flags), {})
+                 for name, count in zip(names, counts)]
+        results = await gateway.call_many(calls)
+
+        batches = []
+        self.backlogged = False
+        for name, count, ticks in zip(names, counts, results):
+            if ticks is None:
+                logging.error(f"Failed to copy ticks for {name}")
+                continue
+            fresh = self.cursors[name].new_ticks(ticks)
+            if len(fresh):
+                batches.append((name, fresh))
+            if len(ticks) < count:
+                self.counts.pop(name, None)
+            elif len(fresh):
+                self.backlogged = True
+            elif count < self.max_ticks * MAX_COUNT_GROWTH:
+                # copy_ticks_from starts at a whole second; when one second holds more than `count`
+                # ticks, every pull returns the same ones, so the next pull asks for more
+                self.counts[name] = count * 2
+                self.backlogged = True
+            else:
+                logging.warning(f"More than {count} ticks of {name} share one second; waiting for the next poll")
+        return batches
+
+    async def stream(self):
+        """Yields (symbol name, ticks) batches forever, sleeping unless the last pull was truncated and made progress."""
+        while True:
+            if len(self.cursors) < len(self.symbol_names):
+                await self.start()
+            for name, ticks in await self.pull():
+                yield name, ticks
+            if not self.backlogged:
+                await asyncio.sleep(self.poll_interval)
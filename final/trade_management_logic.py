@@ -1,144 +1,129 @@
-import MetaTrader5 as mt5
-import asyncio
+from datetime import datetime
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from position_book import book
+from bulk_close import close_all
+from order_templates import order_templates
+from order_executor import executor
+from trade_codes import get_trade_return_description
+from utils import session, ORDER_READY_TIMEOUT
 from notifications import send_limited_message, send_discord_message_async
 
+TRADE_LIMIT = 3  # Maximum of 3 trades per symbol
+
+async def get_open_positions(symbol):
+    """Return position details for a symbol from the local position book."""
+    await book.ensure_current()
+    no_of_positions = book.count(symbol["symbol"])
+    return {"positions_exist": no_of_positions > 0, "no_of_positions": no_of_positions}
+
 async def place_trade_notify(symbol, action, lot_size):
     """Asynchronously place a trade and notify via Discord."""
     open_positions = await get_open_positions({"symbol": symbol})
     if open_positions["no_of_positions"] >= TRADE_LIMIT:
         await send_limited_message(symbol, f"Trade limit reached for {symbol}. No further trades will be placed.")
         return  # Skip trade placement if limit is reached
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "python script open",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Trade executed successfully at {now}, order={result}"
+        message = (f"Trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol,message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def hedge_place_trade(symbol, action, lot_size):
     """Asynchronously place a hedge trade without being restricted by trade limits and notify via Discord."""
-    if not await connect_mt5():
+    if not await session.wait_ready(ORDER_READY_TIMEOUT):
+        print(f"MetaTrader5 session not ready; skipping order for {symbol}")
         return
-    selected = await asyncio.to_thread(mt5.symbol_select, symbol, True)
-    if not selected:
+    templates = await order_templates.get(symbol)
+    if templates is None:
         print(f"Failed to select symbol {symbol}")
         return
 
-    price_info = await asyncio.to_thread(mt5.symbol_info_tick, symbol)
+    price_info = await gateway.symbol_info_tick(symbol)
     if price_info is None:
         print(f"Failed to get tick information for {symbol}")
         return
 
-    price = price_info.ask if action == 'buy' else price_info.bid
-    lot = lot_size if lot_size is not None else 1.0
-    deviation = 50
-
-    request = {
-        "action": mt5.TRADE_ACTION_DEAL,
-        "symbol": symbol,
-        "volume": lot,
-        "type": mt5.ORDER_TYPE_BUY if action == 'buy' else mt5.ORDER_TYPE_SELL,
-        "price": price,
-        "deviation": deviation,
-        "magic": 234000,
-        "comment": "hedge trade by script",
-        "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": mt5.ORDER_FILLING_FOK,
-    }
-
-    result = await asyncio.to_thread(mt5.order_send, request)
-
-    if result is None:
-        message = f"Order send error: {mt5.last_error()}"
+    request = templates.open_request(action, price_info, lot_size, hedge=True)
+
+    report = await executor.execute(request)
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    result = report.result
+
+    if report.status == "done":
+        if report.unconfirmed:
+            await book.reconcile()  # Filled without a confirmation; pick the position up from the terminal
+        now = datetime.now()
+        message = f"Hedge trade executed successfully at {now}, order={result}, attempts: {report.timings()}"
+    elif result is None:
+        session.report_failure()
+        message = f"Order send error: {await gateway.last_error()}, attempts: {report.timings()}"
         print(message)
         await send_discord_message_async(message)
+        return
     else:
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Hedge trade request failed for {symbol}, retcode={result.retcode}"
-        else:
-            now = datetime.now()
-            message = f"Hedge trade executed successfully at {now}, order={result}"
+        message = (f"Hedge trade request {report.status} for {symbol}, retcode={result.retcode} "
+                   f"({get_trade_return_description(result.retcode)}), attempts: {report.timings()}")
 
-        print(message)
-        await send_limited_message(symbol, message)
+    print(message)
+    await send_limited_message(symbol, message)
 
 async def close_trades_by_symbol(symbol):
-    open_positions = await asyncio.to_thread(mt5.positions_get, symbol=symbol)
-
-    if open_positions is None or len(open_positions) == 0:
+    report = await close_all(symbol)
+    if not report.requests:
         print(f"No open positions for {symbol}.")
         return
 
-    for position in open_positions:
-        ticket = position.ticket
-        lot = position.volume
-        trade_type = mt5.ORDER_TYPE_SELL if position.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
-        symbol_info = await asyncio.to_thread(mt5.symbol_info, symbol)
-
-        if symbol_info is None:
-            print(f"Symbol {symbol} not found.")
-            continue
-
-        price = symbol_info.bid if trade_type == mt5.ORDER_TYPE_SELL else symbol_info.ask
-
-        close_request = {
-            "action": mt5.TRADE_ACTION_DEAL,
-            "symbol": symbol,
-            "volume": lot,
-            "type": trade_type,
-            "position": ticket,
-            "price": price,
-            "deviation": 20,
-            "magic": 123456,
-            "comment": "Closing trade by script",
-            "type_time": mt5.ORDER_TIME_GTC,
-            "type_filling": mt5.ORDER_FILLING_FOK,
-        }
-
-        result = await asyncio.to_thread(mt5.order_send, close_request)
-
-        if result.retcode != mt5.TRADE_RETCODE_DONE:
-            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
-        else:
+    for filled_request, filled_result in report.fills:
+        book.apply_order_result(filled_request, filled_result)
+    if report.unconfirmed:
+        await book.reconcile()  # Closed without a confirmation; drop the positions the terminal no longer has
+    closed = report.closed()
+    for ticket, result in report.results.items():
+        if ticket in closed:
             message = f"Successfully closed trade {ticket} for {symbol}."
-
+        elif result is None:
+            message = f"Failed to close trade {ticket} for {symbol}, no result from order_send"
+        else:
+            message = f"Failed to close trade {ticket} for {symbol}, error code: {result.retcode}"
         print(message)
-        await send_limited_message(message)
\ No newline at end of file
+    if any(report.results[ticket] is None for ticket in report.failed()):
+        session.report_failure()
+
+    message = (f"Closed {len(closed)}/{len(report.requests)} trades for {symbol} in {report.elapsed * 1000:.1f} ms "
+               f"over {report.batches} batch(es).")
+    print(message)
+    await send_limited_message(symbol, message)
\ No newline at end of file
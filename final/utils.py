@@ -1,21 +1,20 @@
-import MetaTrader5 as mt5
-import asyncio
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_session import Mt5Session
+from symbol_registry import registry
+from position_book import book
 
-async def connect_mt5():
-    """Asynchronously initialize and log in to MetaTrader 5."""
-    initialized = await asyncio.to_thread(mt5.initialize)
-    if not initialized:
-        print("Failed to initialize MetaTrader5")
-        return False
+CONNECT_TIMEOUT = 30  # Seconds to wait for the session at startup
+ORDER_READY_TIMEOUT = 5  # Seconds an order waits for a lost session to come back
 
-    login = 213171528  # Replace with your actual login
-    password = "AHe@Yps3"  # Replace with your actual password
-    server = "OctaFX-Demo"  # Replace with your actual server
+# Long-lived MetaTrader 5 login shared by every module
+session = Mt5Session(213171528, "AHe@Yps3", "OctaFX-Demo")  # Replace with your actual login, password and server
+session.connect_callbacks.append(registry.invalidate)  # Symbol specs are reloaded after every (re)connect
+session.connect_callbacks.append(book.invalidate)  # Positions are reseeded after every (re)connect
 
-    authorized = await asyncio.to_thread(mt5.login, login, password, server)
-    if not authorized:
-        print(f"Login failed for account {login}")
-        return False
 
-    print(f"Successfully logged into account {login} on server {server}")
-    return True
+async def connect_mt5():
+    """Asynchronously wait until the shared MetaTrader 5 session is initialized and logged in."""
+    connected = await session.wait_ready(CONNECT_TIMEOUT)
+    if not connected:
+        print("Failed to initialize MetaTrader5")
+    return connected
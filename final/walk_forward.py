@@ -0,0 +1,176 @@
+# walk_forward.py
+# Walk-forward optimization: parameters are chosen on each train window and judged on the test window after it.
+#
+#     python walk_forward.py ticks.csv    # SWEEP_GRIDS over the configured symbols, ticks from a tick file
+
+import asyncio
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from backtest import Backtester, EQUITY_DTYPE, day_key, priced_configs
+from parameter_sweep import ParameterSweep, SWEEP_GRIDS, TICK_COLUMNS, share_ticks, load_ticks, rank_key
+
+
+class Window:
+    """One train/test split of a symbol's history, with the ticks of both halves already shared on disk."""
+
+    __slots__ = ("symbol", "train_days", "test_days", "train_path", "test_path", "cells", "best", "test")
+
+    def __init__(self, symbol, train_days, test_days, train_path, test_path):
+        self.symbol = symbol
+        self.train_days = train_days  # (first, last) ISO date
+        self.test_days = test_days
+        self.train_path = train_path
+        self.test_path = test_path
+        self.cells = []  # Sweep cells over the train ticks
+        self.best = None  # Row of the best train cell
+        self.test = None  # Out-of-sample summary with the best parameters
+
+    def report(self):
+        return {
+            "symbol": self.symbol,
+            "train": self.train_days,
+            "test": self.test_days,
+            "parameters": {name: self.best[name] for name in self.cells[0][1]} if self.best else None,
+            "train_profit": self.best["net_profit"] if self.best else None,
+            "test_profit": self.test["net_profit"] if self.test else None,
+        }
+
+
+def run_test(tick_path, symbol_config):
+    """Worker: backtests one test window and returns its summary and equity curve."""
+    result = asyncio.run(Backtester(symbol_config).run(load_ticks(tick_path)))
+    return result.summary(), result.equity
+
+
+class WalkForward:
+    """Rolls train and test windows over each symbol's history, optimizing with a ParameterSweep."""
+
+    def __init__(self, symbols_config, train_days=20, test_days=5, directory="sweep", max_workers=None):
+        """
+        Initialize the walk-forward driver.
+
+        Parameters:
+        - symbols_config (list): Base configuration of every symbol.
+        - train_days (int): Trading days each optimization sees.
+        - test_days (int): Trading days each choice is tested on; windows move on by this much.
+        - directory (str): Directory of the sweep's shared ticks and results cache.
+        - max_workers (int): Worker processes; one per CPU by default.
+        """
+        self.sweep = ParameterSweep(symbols_config, directory, max_workers)
+        self.train_days = train_days
+        self.test_days = test_days
+        self.max_workers = max_workers
+
+    def windows(self, symbol_name, ticks):
+        """
+        Splits ticks into rolling windows and writes every window's ticks once, so no worker slices them again.
+
+        Returns:
+        - list: Window per train/test split, oldest first.
+        """
+        backtester = Backtester(self.sweep.symbols_config[symbol_name])
+        times = np.asarray(ticks["time_msc"])
+        starts, days = backtester.day_starts(times)
+        bounds = np.append(starts, len(times))
+        dates = [day_key(int(days[first])) for first in starts.tolist()]
+
+        windows = []
+        for train_start in range(0, len(starts) - self.train_days - self.test_days + 1, self.test_days):
+            test_start = train_start + self.train_days
+            test_end = test_start + self.test_days
+            train = slice(bounds[train_start], bounds[test_start])
+            test = slice(bounds[test_start], bounds[test_end])
+            windows.append(Window(
+                symbol_name,
+                (dates[train_start], dates[test_start - 1]),
+                (dates[test_start], dates[test_end - 1]),
+                share_ticks(self.sweep.directory, symbol_name, {name: ticks[name][train] for name in TICK_COLUMNS}),
+                share_ticks(self.sweep.directory, symbol_name, {name: ticks[name][test] for name in TICK_COLUMNS}),
+            ))
+        return windows
+
+    def run(self, grids, ticks, rank_by="net_profit"):
+        """
+        Optimizes every train window of every symbol and tests the winners, both phases in one process pool each.
+
+        Parameters:
+        - grids (dict): Symbol name -> parameter grid.
+        - ticks (dict): Symbol name -> tick array with time_msc, bid and ask.
+        - rank_by (str): Summary field the best train cell is chosen by.
+
+        Returns:
+        - dict: Symbol name -> {"windows": window reports, "equity": stitched out-of-sample EQUITY_DTYPE curve}.
+        """
+        windows = []
+        for name, grid in grids.items():
+            if name not in ticks:
+                continue
+            for window in self.windows(name, ticks[name]):
+                window.cells = self.sweep.cells(name, grid, window.train_path)
+                windows.append(window)
+
+        # Phase 1: every train cell of every window, in parallel and cached
+        self.sweep.compute([cell for window in windows for cell in window.cells])
+        for window in windows:
+            rows = [{**parameters, **self.sweep.cache[key]}
+                    for _, parameters, key, _, _ in window.cells if key in self.sweep.cache]
+            window.best = min(rows, key=lambda row: rank_key(row, rank_by)) if rows else None
+
+        # Phase 2: every test window with its winning parameters, in parallel (windows without any train result are skipped)
+        tested = [window for window in windows if window.best is not None]
+        curves = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = []
+            for window in tested:
+                parameters = {name: window.best[name] for name in window.cells[0][1]}
+                symbol_config = {**self.sweep.symbols_config[window.symbol], **parameters}
+                futures.append(pool.submit(run_test, window.test_path, symbol_config))
+            for window, future in zip(tested, futures):
+                try:
+                    window.test, equity = future.result()
+                except Exception as e:
+                    logging.error(f"Test of {window.symbol} {window.test_days} failed: {e!r}")
+                    continue
+                curves.setdefault(window.symbol, []).append(equity)
+
+        results = {}
+        for name, equities in curves.items():
+            results[name] = {
+                "windows": [window.report() for window in windows if window.symbol == name],
+                "equity": stitch(equities),
+            }
+        return results
+
+
+def stitch(equities):
+    """
+    Joins the equity curves of consecutive test windows, each starting from where the previous one ended.
+
+    Positions still open at the end of a window count at their marked-to-market value.
+    """
+    stitched = np.empty(sum(len(equity) for equity in equities), dtype=EQUITY_DTYPE)
+    position = 0
+    carried = 0.0
+    for equity in equities:
+        stitched["time_msc"][position:position + len(equity)] = equity["time_msc"]
+        stitched["equity"][position:position + len(equity)] = equity["equity"] + carried
+        position += len(equity)
+        if len(equity):
+            carried += float(equity["equity"][-1])
+    return stitched
+
+
+if __name__ == "__main__":
+    from config import symbols_config
+    from fake_mt5.simulator import load_tick_file
+    symbols_config = asyncio.run(priced_configs(symbols_config))
+    recorded = load_tick_file(sys.argv[1])
+    results = WalkForward(symbols_config).run({symbol["symbol"]: SWEEP_GRIDS for symbol in symbols_config}, recorded)
+    for symbol_name, result in results.items():
+        for report in result["windows"]:
+            print(report)
+        equity = result["equity"]
+        np.save(f"walk_forward_{symbol_name}_equity.npy", equity)
+        print(f"{symbol_name}: out-of-sample equity {equity['equity'][-1] if len(equity) else 0.0:.2f}")
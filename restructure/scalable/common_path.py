@@ -0,0 +1,12 @@
+# common_path.py
+# Modules shared by every tree (gateway, order templates, fake_mt5, ...) live once in common/ at the
+# repository root; importing this module puts that directory on sys.path. Tree-local modules such as
+# config keep precedence, so the shared modules pick up the configuration of the tree they run in.
+
+import os
+import sys
+
+COMMON_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "common"))
+
+if COMMON_DIR not in sys.path:
+    sys.path.append(COMMON_DIR)
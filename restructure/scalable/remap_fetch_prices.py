@@ -3,6 +3,10 @@
 import MetaTrader5 as mt5
 import asyncio
 import logging
+import numpy as np
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from symbol_registry import registry
 from datetime import datetime, timedelta
 import pytz
 
@@ -25,12 +29,11 @@ class PriceFetcher:
     async def fetch_current_price(self, symbol):
         """Fetches the current price for a given symbol."""
         symbol_name = symbol["symbol"]
-        selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-        if not selected:
+        if await registry.ensure(symbol_name) is None:
             await self.log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
             return None
 
-        tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+        tick = await gateway.symbol_info_tick(symbol_name)
         if tick:
             return tick.bid  # or tick.ask depending on your requirements
         else:
@@ -47,7 +50,7 @@ class PriceFetcher:
         last_friday = last_friday.replace(hour=23, minute=59, second=59, microsecond=0)
         utc_from = last_friday.astimezone(pytz.utc)
 
-        rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
+        rates = await gateway.copy_rates_from(symbol_name, mt5.TIMEFRAME_M5, utc_from, 1)
         if rates is not None and len(rates) > 0:
             closing_price = rates[0]['close']
             print(f"Fetched last Friday's closing price for {symbol_name}: {closing_price}")
@@ -60,13 +63,12 @@ class PriceFetcher:
         """Fetches the price based on type: start or current."""
         symbol_name = symbol["symbol"]
 
-        selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-        if not selected:
+        if await registry.ensure(symbol_name) is None:
             await self.log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching {price_type} price.")
             return None
 
         if price_type == "current":
-            tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+            tick = await gateway.symbol_info_tick(symbol_name)
             if tick:
                 return tick.bid  # or tick.ask depending on requirements
 
@@ -78,7 +80,7 @@ class PriceFetcher:
 
             start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
             start_of_day_utc = start_of_day.astimezone(pytz.utc)
-            rates = await asyncio.to_thread(mt5.copy_rates_from, symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
+            rates = await gateway.copy_rates_from(symbol_name, mt5.TIMEFRAME_M5, start_of_day_utc, 1)
             if rates is not None and len(rates) > 0:
                 return rates[0]["close"]
 
@@ -116,3 +118,13 @@ class PriceFetcher:
         tasks = [self.fetch_current_price(symbol) for symbol in self.symbols_config]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         return {symbol["symbol"]: price for symbol, price in zip(self.symbols_config, results)}
+
+    async def fetch_bids(self, symbol_names):
+        """
+        Fetches the current bid of several symbols in one gateway round trip.
+
+        Returns:
+        - np.ndarray: One bid per symbol name, nan where no tick was available.
+        """
+        ticks = await gateway.call_many([("symbol_info_tick", (name,), {}) for name in symbol_names])
+        return np.array([tick.bid if tick else np.nan for tick in ticks], dtype=np.float64)
@@ -4,8 +4,11 @@ import MetaTrader5 as mt5
 import asyncio
 from remap_fetch_prices import PriceFetcher
 from remap_trade_logic_generic import ThresholdTradingStrategy
+from threshold_engine import VectorThresholdEngine
 from config import symbols_config
 
+SNAPSHOT_INTERVAL = 1  # Seconds between price snapshots
+
 
 async def initialize_and_run_trading_strategy():
     if not mt5.initialize():
@@ -14,21 +17,30 @@ async def initialize_and_run_trading_strategy():
 
     fetcher = PriceFetcher(symbols_config)
 
-    strategies = []
+    traded = []  # (symbol config, start price) of every symbol with prices
     for symbol in symbols_config:
         prices = await fetcher.fetch_start_and_current_price(symbol)
         if prices:
             start_price = prices["start_price"]
             current_price = prices["current_price"]
             print(f"Symbol: {symbol['symbol']}, Start Price: {start_price}, Current Price: {current_price}")
-
-            strategy = ThresholdTradingStrategy(symbol)
-            strategies.append(strategy.monitor_price_changes(start_price, fetcher.fetch_current_price))
+            traded.append((symbol, float(start_price)))
         else:
             print(f"Failed to fetch prices for {symbol['symbol']}")
 
-    await asyncio.gather(*strategies)
-    mt5.shutdown()
+    # One engine evaluates every symbol per snapshot; a strategy only hears about prices that act
+    engine = VectorThresholdEngine([symbol for symbol, _ in traded])
+    engine.set_starts({symbol["symbol"]: start_price for symbol, start_price in traded})
+    strategies = [ThresholdTradingStrategy(symbol) for symbol, _ in traded]
+    try:
+        while traded:
+            bids = await fetcher.fetch_bids(engine.names)
+            rows, _ = engine.evaluate(bids)
+            for row in rows.tolist():
+                await strategies[row].trigger_trade_by_threshold(traded[row][1], float(bids[row]))
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+    finally:
+        mt5.shutdown()
 
 
 if __name__ == "__main__":
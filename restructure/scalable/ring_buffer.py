@@ -0,0 +1,59 @@
+# ring_buffer.py
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity float64 history: keeps the last `capacity` values in a preallocated array and
+    running aggregates over everything ever appended, so its memory never grows.
+    """
+
+    __slots__ = ("values", "capacity", "count", "total")
+
+    def __init__(self, capacity):
+        """
+        Initialize the buffer.
+
+        Parameters:
+        - capacity (int): Number of most recent values kept.
+        """
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.capacity = capacity
+        self.count = 0  # Values appended since creation, including those overwritten
+        self.total = 0.0  # Sum of every value appended
+
+    def append(self, value):
+        self.values[self.count % self.capacity] = value
+        self.count += 1
+        self.total += value
+
+    def __len__(self):
+        """Number of values held, at most capacity."""
+        return min(self.count, self.capacity)
+
+    def mean(self):
+        """Mean of every value ever appended; nan when empty."""
+        return self.total / self.count if self.count else float("nan")
+
+    def latest(self):
+        """Most recent value; None when empty."""
+        return float(self.values[(self.count - 1) % self.capacity]) if self.count else None
+
+    def last(self, n=None):
+        """Copy of the last n values held (all of them by default), oldest first."""
+        held = len(self)
+        n = held if n is None else min(n, held)
+        end = self.count % self.capacity
+        if n <= end:
+            return self.values[end - n:end].copy()
+        return np.concatenate((self.values[self.capacity - (n - end):], self.values[:end]))
+
+    def tolist(self):
+        return self.last().tolist()
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __repr__(self):
+        return f"RingBuffer(count={self.count}, mean={self.mean()}, last={self.tolist()})"
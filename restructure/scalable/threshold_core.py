@@ -0,0 +1,122 @@
+# threshold_core.py
+
+import enum
+import math
+from bisect import bisect_right
+
+
+class Action(enum.IntEnum):
+    """What the strategy wants done after a price; NONE is falsy so callers can test `if action:`."""
+    NONE = 0
+    OPEN_BUY = 1  # Initial trade at the +1 threshold
+    OPEN_SELL = 2  # Initial trade at the -1 threshold
+    HEDGE = 3  # Price fell back to the 0.5 threshold after the initial trade
+    CLOSE = 4  # Price moved one threshold away from the hedging entry
+
+
+class ThresholdCore:
+    """
+    Synchronous state machine behind ThresholdTradingStrategy.
+
+    The trigger prices (start +-1 and +-0.5 thresholds, and hedging entry +-1 threshold once hedged) are
+    kept in a sorted ladder, rebuilt only when the start price or the hedging entry changes. A price
+    strictly between the same two levels as the last quiet price cannot act and is dismissed with two
+    comparisons; any other price is evaluated and its band located with bisect. Prices within a hair of
+    a level are always evaluated.
+    """
+
+    __slots__ = ("pip_size", "threshold_pips", "threshold_distance", "open_distance", "hedge_distance",
+                 "start_price", "trade_placed", "direction", "hedging_entry_price", "levels", "margin", "low", "high")
+
+    def __init__(self, pip_size, threshold_pips, start_price=float("nan")):
+        """
+        Initialize the core.
+
+        Parameters:
+        - pip_size (float): Price distance of one pip.
+        - threshold_pips (float): Pips per threshold (the symbol's positive_pip_difference).
+        - start_price (float): Price the thresholds are measured from.
+        """
+        self.pip_size = pip_size
+        self.threshold_pips = threshold_pips
+        self.threshold_distance = pip_size * threshold_pips
+        # Threshold counts used to be rounded to 2 decimals before comparing: >= 1 and <= 0.5 after rounding
+        self.open_distance = 0.995 * self.threshold_distance
+        self.hedge_distance = 0.505 * self.threshold_distance
+        # A level and the subtraction it stands for can round apart by an ulp, so bands stop this short of it
+        self.margin = 1e-6 * self.threshold_distance
+        self.trade_placed = False
+        self.direction = Action.NONE  # OPEN_BUY or OPEN_SELL once the initial trade is placed
+        self.hedging_entry_price = None
+        self.set_start(start_price)
+
+    def set_start(self, start_price):
+        """Moves the thresholds to a new start price (once per trading day) and rebuilds the ladder."""
+        self.start_price = start_price
+        self.build_ladder()
+
+    def build_ladder(self):
+        """Sorts the current trigger prices into self.levels and forgets the last quiet band."""
+        if math.isnan(self.start_price):
+            levels = []  # Nothing can trigger without a start price
+        else:
+            levels = [self.start_price - self.open_distance, self.start_price - self.hedge_distance,
+                      self.start_price + self.hedge_distance, self.start_price + self.open_distance]
+        if self.hedging_entry_price is not None:
+            levels += [self.hedging_entry_price - self.threshold_distance,
+                       self.hedging_entry_price + self.threshold_distance]
+        levels.sort()
+        self.levels = levels
+        self.low = self.high = math.nan  # Every comparison with nan fails, so the next price is evaluated
+
+    def thresholds_at(self, price):
+        """Thresholds between the start price and price, rounded to 2 decimals; for reporting only."""
+        return round((price - self.start_price) / self.pip_size / self.threshold_pips, 2)
+
+    def on_price(self, price):
+        """Advances the state machine by one price and returns the Action to take."""
+        if self.low < price < self.high:
+            return Action.NONE
+        action = self.evaluate(price)
+        if action:
+            # The new state may act again within this band (a close beyond +-1 reopens on the next price)
+            self.low = self.high = math.nan
+        else:
+            levels = self.levels
+            index = bisect_right(levels, price)
+            low = levels[index - 1] + self.margin if index else -math.inf
+            high = levels[index] - self.margin if index < len(levels) else math.inf
+            if low < price < high:
+                self.low = low
+                self.high = high
+            else:
+                self.low = self.high = math.nan  # Too close to a level to vouch for its neighbours
+        return action
+
+    def evaluate(self, price):
+        """The state machine itself, without the ladder shortcut."""
+        if not self.trade_placed:
+            difference = price - self.start_price
+            if difference >= self.open_distance:
+                self.trade_placed = True
+                self.direction = Action.OPEN_BUY
+                return Action.OPEN_BUY
+            if difference <= -self.open_distance:
+                self.trade_placed = True
+                self.direction = Action.OPEN_SELL
+                return Action.OPEN_SELL
+            return Action.NONE
+
+        if self.hedging_entry_price is None:
+            if abs(price - self.start_price) < self.hedge_distance:
+                self.hedging_entry_price = price
+                self.build_ladder()
+                return Action.HEDGE
+            return Action.NONE
+
+        if abs(price - self.hedging_entry_price) >= self.threshold_distance:
+            self.trade_placed = False
+            self.hedging_entry_price = None
+            self.build_ladder()
+            return Action.CLOSE
+        return Action.NONE
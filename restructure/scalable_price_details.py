@@ -1,7 +1,9 @@
 # price_fetcher.py
-import MetaTrader5 as mt5
 import asyncio
 import logging
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from mt5_gateway import gateway
+from symbol_registry import registry
 from config import symbols_config
 
 class PriceFetcher:
@@ -16,12 +18,11 @@ class PriceFetcher:
     async def fetch_current_price(self, symbol):
         """Fetches the current price for a given symbol."""
         symbol_name = symbol["symbol"]
-        selected = await asyncio.to_thread(mt5.symbol_select, symbol_name, True)
-        if not selected:
+        if await registry.ensure(symbol_name) is None:
             await self.log_error_and_notify(f"Failed to select symbol {symbol_name} for fetching current price.")
             return None
 
-        tick = await asyncio.to_thread(mt5.symbol_info_tick, symbol_name)
+        tick = await gateway.symbol_info_tick(symbol_name)
         if tick:
             return tick.bid
         else:
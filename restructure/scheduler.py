@@ -1,11 +1,15 @@
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime
 import pytz
 import MetaTrader5 as mt5
 from trade_logic import calculate_pip_difference, calculate_thresholds, check_thresholds
 from config import symbols_config
 from utils import fetch_start_and_current_price, log_error_and_notify, format_message, get_open_positions_scheduler
 from notifications import send_discord_message_async  # Ensure this function is asynchronous
+import common_path  # noqa: F401 -- puts the shared modules in common/ on sys.path
+from job_scheduler import JobScheduler
+
+HOURLY_UPDATE_CRON = "0,30 9-23 * * *"
 
 
 async def scheduled_task():
@@ -70,39 +74,10 @@ async def process_symbol(symbol, start_price, current_price):
     return threshold_data
 
 async def scheduler():
-    scheduled_times = [
-        '09:00', '09:30', '10:00', '10:30', '11:00', '11:30', '12:00', '12:30',
-        '13:00', '13:30', '14:00', '14:30', '15:00', '15:30', '16:00', '16:30',
-        '17:00', '17:30', '18:00', '18:30', '19:00', '19:30', '20:00', '20:30',
-        '21:00', '21:30', '22:00', '22:30', '23:00', '23:30'
-    ]
-
-    timezone = pytz.timezone('Asia/Kolkata')
-
-    while True:
-        now = datetime.now(timezone)
-        today = now.date()
-        scheduled_datetimes = [
-            timezone.localize(datetime.combine(today, datetime.strptime(t, '%H:%M').time()))
-            for t in scheduled_times
-        ]
-
-        next_run_time = None
-        for scheduled_time in scheduled_datetimes:
-            if scheduled_time > now:
-                next_run_time = scheduled_time
-                break
-
-        if not next_run_time:
-            next_day = now + timedelta(days=1)
-            next_run_time = timezone.localize(
-                datetime.combine(next_day.date(), datetime.strptime(scheduled_times[0], '%H:%M').time())
-            )
-
-        sleep_duration = (next_run_time - now).total_seconds()
-        print(f"Sleeping for {sleep_duration} seconds until next scheduled task at {next_run_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        await asyncio.sleep(sleep_duration)
-        await scheduled_task()
+    job_scheduler = JobScheduler()
+    # The half-hourly updates from 09:00 to 23:30
+    job_scheduler.add("hourly_update", HOURLY_UPDATE_CRON, scheduled_task)
+    await job_scheduler.run()
 
 async def scheduler_main():
     if not mt5.initialize():